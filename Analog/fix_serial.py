@@ -4,10 +4,14 @@ ESP32 LDR Serial Connection Fixer
 แก้ไขปัญหา serial connection และทดสอบการเชื่อมต่อ
 """
 
+import argparse
+import os
 import serial
 import time
 import sys
 
+from ldr_telemetry.probe import PROBE_TIMEOUT, discover, format_result, probe_port
+
 def check_serial_ports():
     """ตรวจสอบ serial ports ที่มีอยู่"""
     import serial.tools.list_ports
@@ -25,43 +29,15 @@ def check_serial_ports():
     return [port.device for port in ports]
 
 def test_serial_connection(port, baud_rate=115200):
-    """ทดสอบการเชื่อมต่อ serial"""
+    """ทดสอบการเชื่อมต่อ serial (หยุดทันทีที่ได้ข้อมูลที่ถูกต้อง)"""
     print(f"\n🔌 ทดสอบการเชื่อมต่อ {port}...")
-    
-    try:
-        ser = serial.Serial(port, baud_rate, timeout=2)
-        print(f"✅ เชื่อมต่อสำเร็จ: {port}")
-        
-        # รอข้อมูล 5 วินาที
-        print("⏳ รอข้อมูลจาก ESP32 (5 วินาที)...")
-        start_time = time.time()
-        data_received = False
-        
-        while time.time() - start_time < 5:
-            if ser.in_waiting:
-                try:
-                    line = ser.readline().decode('utf-8').strip()
-                    if line:
-                        print(f"📊 ข้อมูลที่ได้รับ: {line}")
-                        data_received = True
-                except:
-                    pass
-            time.sleep(0.1)
-        
-        if data_received:
-            print("✅ ESP32 ส่งข้อมูลได้ปกติ")
-        else:
-            print("⚠️  ESP32 ไม่ส่งข้อมูล")
-            print("💡 ตรวจสอบว่า ESP32 กำลังรันโค้ดหรือไม่")
-        
-        ser.close()
-        return True
-        
-    except Exception as e:
-        print(f"❌ ไม่สามารถเชื่อมต่อได้: {e}")
-        return False
+    result = probe_port(port, baud_rate)
+    print(format_result(result))
+    if result.error is None and not result.ok:
+        print("💡 ตรวจสอบว่า ESP32 กำลังรันโค้ดหรือไม่")
+    return result.error is None
 
-def fix_serial_connection():
+def fix_serial_connection(baud_rate=115200, timeout=PROBE_TIMEOUT, use_cache=True):
     """แก้ไขปัญหา serial connection"""
     print("🔧 ESP32 Serial Connection Fixer")
     print("=" * 50)
@@ -74,12 +50,15 @@ def fix_serial_connection():
         print("💡 ตรวจสอบว่า ESP32 เชื่อมต่อแล้วหรือไม่")
         return None
     
-    # ทดสอบแต่ละ port
-    working_ports = []
-    for port in ports:
-        if test_serial_connection(port):
-            working_ports.append(port)
+    # ทดสอบทุก port พร้อมกัน (หรือ port ที่จำไว้จากครั้งก่อน)
+    print(f"\n⏳ รอข้อมูลจาก ESP32 (สูงสุด {timeout:.0f} วินาที)...")
+    start_time = time.time()
+    results = discover(baud_rate, timeout, use_cache=use_cache)
+    for result in results:
+        print(f"  {format_result(result)}")
+    print(f"⏱️  ใช้เวลา {time.time() - start_time:.1f} วินาที")
     
+    working_ports = [result.port for result in results if result.ok]
     if working_ports:
         print(f"\n✅ Ports ที่ใช้งานได้: {working_ports}")
         return working_ports[0]
@@ -95,139 +74,34 @@ ESP32 LDR Working Real-Time Plotter
 แก้ไขปัญหา serial connection แล้ว
 """
 
-import serial
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from collections import deque
-import time
+import sys
+
+from ldr_telemetry import main
 
 # Configuration
 SERIAL_PORT = '{port}'  # Port ที่แก้ไขแล้ว
 BAUD_RATE = 115200
-MAX_POINTS = 100
-
-# Data storage
-adc_data = deque(maxlen=MAX_POINTS)
-voltage_data = deque(maxlen=MAX_POINTS)
-light_data = deque(maxlen=MAX_POINTS)
-time_data = deque(maxlen=MAX_POINTS)
-
-# Initialize plot
-fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 8))
-fig.suptitle('ESP32 LDR Real-Time Monitor (Fixed)', fontsize=16)
-
-# Setup subplots
-ax1.set_ylabel('ADC Value')
-ax1.set_ylim(0, 4095)
-ax1.grid(True)
-line1, = ax1.plot([], [], 'b-', linewidth=2)
-
-ax2.set_ylabel('Voltage (V)')
-ax2.set_ylim(0, 3.3)
-ax2.grid(True)
-line2, = ax2.plot([], [], 'g-', linewidth=2)
-
-ax3.set_ylabel('Light Level (%)')
-ax3.set_ylim(0, 100)
-ax3.set_xlabel('Time (seconds)')
-ax3.grid(True)
-line3, = ax3.plot([], [], 'r-', linewidth=2)
-
-# Serial connection with error handling
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    print(f"✅ Connected to {{SERIAL_PORT}}")
-    print("📊 Real-time plotting started...")
-    print("🔍 Close the plot window to stop")
-except Exception as e:
-    print(f"❌ Error: {{e}}")
-    print("💡 ตรวจสอบว่า ESP32 เชื่อมต่อแล้วหรือไม่")
-    exit(1)
 
-def parse_data(line):
-    """Parse data from ESP32"""
-    try:
-        if ',' in line:
-            parts = line.strip().split(',')
-            if len(parts) >= 3:
-                adc = int(parts[0])
-                voltage = float(parts[1])
-                light = float(parts[2])
-                return adc, voltage, light
-    except:
-        pass
-    return None
-
-def animate(frame):
-    """Real-time animation"""
-    global adc_data, voltage_data, light_data, time_data
-    
-    # Read data from serial with error handling
-    try:
-        if ser.in_waiting:
-            line = ser.readline().decode('utf-8').strip()
-            if line:
-                data = parse_data(line)
-                if data:
-                    adc, voltage, light = data
-                    
-                    # Add to data arrays
-                    current_time = time.time()
-                    adc_data.append(adc)
-                    voltage_data.append(voltage)
-                    light_data.append(light)
-                    time_data.append(current_time)
-                    
-                    # Print current values
-                    print(f"ADC: {{adc:4d}} | Voltage: {{voltage:5.2f}}V | Light: {{light:5.1f}}%")
-    except Exception as e:
-        print(f"Serial read error: {{e}}")
-        # ไม่ต้องหยุดการทำงาน
-    
-    # Update plots
-    if len(time_data) > 1:
-        # Convert time to relative seconds
-        time_rel = [(t - time_data[0]) for t in time_data]
-        
-        # Update line data
-        line1.set_data(time_rel, list(adc_data))
-        line2.set_data(time_rel, list(voltage_data))
-        line3.set_data(time_rel, list(light_data))
-        
-        # Update axis limits for scrolling
-        if len(time_rel) > 1:
-            x_min = max(0, time_rel[-1] - 20)
-            x_max = time_rel[-1] + 1
-            
-            ax1.set_xlim(x_min, x_max)
-            ax2.set_xlim(x_min, x_max)
-            ax3.set_xlim(x_min, x_max)
-    
-    return line1, line2, line3
-
-# Start animation
-print("🚀 Starting animation...")
-ani = animation.FuncAnimation(fig, animate, interval=100, blit=False)
-
-try:
-    plt.tight_layout()
-    plt.show()
-except KeyboardInterrupt:
-    print("\\n⏹️  Stopping...")
-
-# Cleanup
-ser.close()
-print("🔌 Serial connection closed")
+if __name__ == "__main__":
+    sys.exit(main(profile='working', port=SERIAL_PORT, baud_rate=BAUD_RATE))
 '''
-    
-    with open('/Users/kbbk/Week-11-Microcontroller-applications/Analog/working_plotter.py', 'w') as f:
+
+    # เขียนไว้ข้าง ๆ ldr_telemetry เพื่อให้ import ได้
+    output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'working_plotter.py')
+    with open(output_path, 'w') as f:
         f.write(plotter_code)
     
     print(f"\n✅ สร้างไฟล์ working_plotter.py สำหรับ port {port}")
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='ESP32 LDR serial connection fixer')
+    arg_parser.add_argument('--baud', type=int, default=115200, help='baud rate')
+    arg_parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT, help='seconds to wait per port')
+    arg_parser.add_argument('--rescan', action='store_true', help='ignore the remembered port and probe all')
+    args = arg_parser.parse_args()
+
     # แก้ไขปัญหา serial connection
-    working_port = fix_serial_connection()
+    working_port = fix_serial_connection(args.baud, args.timeout, use_cache=not args.rescan)
     
     if working_port:
         print(f"\n🎯 ใช้ port: {working_port}")
@@ -0,0 +1,31 @@
+"""
+ESP32 LDR telemetry core
+reader, parser, ring buffer, filters และ renderer ที่ plotter ทุกตัวใช้ร่วมกัน
+"""
+
+from .buffer import SampleBuffer
+from .config import SERIAL_PORT, BAUD_RATE, PROFILES, PlotterConfig, get_profile
+from .filters import (CatmullRomUpsampler, FilterBank, Smoother, WindowFilter, make_filter, parse_filter_spec, smooth_data, apply_moving_average,
+                      interpolate_data, moving_average, moving_median, savgol_trailing, window_filter)
+from .clock import ClockSync
+from .connection import ConnectionManager
+from .console import CONSOLE_MODES, ConsoleLogger
+from .handoff import OVERFLOW_POLICIES, BatchQueue
+from .metrics import STAGES, Histogram, Metrics, MetricsServer, prometheus_text
+from .parser import FrameParser, Sample, parse_data, light_status, get_status_text
+from .protocol import PROTOCOLS, BinaryDecoder, BlockDecoder, encode_blocks, encode_frames, frames_to_samples
+from .reader import SerialReader, open_serial
+from .spectrum import SPECTRUM_MODES, SpectrumEstimator
+from .app import Plotter, main
+
+__all__ = [
+    'SERIAL_PORT', 'BAUD_RATE', 'PROFILES', 'PlotterConfig', 'get_profile',
+    'FrameParser', 'Sample', 'parse_data', 'light_status', 'get_status_text',
+    'PROTOCOLS', 'BinaryDecoder', 'BlockDecoder', 'encode_blocks', 'encode_frames', 'frames_to_samples',
+    'ClockSync', 'ConnectionManager', 'SerialReader', 'open_serial', 'CONSOLE_MODES', 'ConsoleLogger',
+    'OVERFLOW_POLICIES', 'BatchQueue', 'SampleBuffer',
+    'STAGES', 'Histogram', 'Metrics', 'MetricsServer', 'prometheus_text', 'SPECTRUM_MODES', 'SpectrumEstimator',
+    'CatmullRomUpsampler', 'FilterBank', 'Smoother', 'WindowFilter', 'make_filter', 'parse_filter_spec', 'smooth_data', 'apply_moving_average', 'interpolate_data',
+    'moving_average', 'moving_median', 'savgol_trailing', 'window_filter',
+    'Plotter', 'main',
+]
@@ -0,0 +1,448 @@
+"""
+Plotter application
+เชื่อม reader → parser → buffer → filter → renderer และ entry point `main()`
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+import serial
+
+from .buffer import SampleBuffer
+from .clock import ClockSync
+from .config import SERIAL_PORT, BAUD_RATE, PROFILES, get_profile
+from .connection import ConnectionManager
+from .console import CONSOLE_MODES, ConsoleLogger
+from .decimate import DECIMATION_MODES
+from .filters import CatmullRomUpsampler, Smoother, parse_filter_spec
+from .handoff import OVERFLOW_POLICIES, BatchQueue
+from .metrics import HUD_INTERVAL, Metrics, MetricsServer, format_hud, prometheus_text
+from .parser import DEVICE_TIME, FrameParser, parse_data
+from .protocol import PROTOCOLS, BlockDecoder, frames_to_samples
+from .reader import READER_MODES, SerialReader
+from .spectrum import SPECTRUM_MODES, SpectrumEstimator
+
+
+@dataclass
+class IngestStats:
+    """Counters from the ingestion stage"""
+    samples: int = 0  # samples moved into the buffers so far
+    last_batch: int = 0  # samples ingested on the last frame
+    backlog: int = 0  # samples received but not yet ingested
+    lag_seconds: float = 0.0  # age of the newest ingested sample
+    max_lag_seconds: float = 0.0
+    malformed: int = 0  # lines that didn't parse
+    dropped: int = 0  # binary frames (or block samples) lost according to the sequence numbers
+    overflow: int = 0  # samples discarded because the handoff queue was full
+
+
+class Plotter:
+    """Reads samples from a `SerialReader` into the buffers and drives the dashboard"""
+
+    def __init__(self, config, reader, dashboard=None):
+        self.config = config
+        self.reader = reader
+        self.dashboard = dashboard
+        self.buffer = SampleBuffer(config.max_points)
+        self.smoother = None
+        if config.smooth_factor is not None:
+            self.smoother = Smoother(config.max_points, config.smooth_factor, config.smooth_filters,
+                                     process_variance=config.kalman_process_variance,
+                                     measurement_variance=config.kalman_measurement_variance,
+                                     window=config.median_window, cutoff=config.biquad_cutoff,
+                                     sample_rate=config.sample_rate)
+        # Upsampled copy of the smoothed (or raw) lines
+        self.interpolator = None
+        if config.interpolation_points > 1:
+            self.interpolator = CatmullRomUpsampler(config.interpolation_points, config.max_points)
+        self.parser = FrameParser(config.min_fields)
+        # Optional spectrum panel: FFTs of the samples added since the previous frame
+        self.spectrum = None
+        if config.spectrum is not None:
+            self.spectrum = SpectrumEstimator(config.spectrum_segment, config.spectrum_overlap,
+                                              averages=config.spectrum_averages,
+                                              max_segments=config.spectrum_max_segments)
+        # Device timestamps → host time (when the firmware sends them)
+        self.clock = ClockSync() if config.device_clock else None
+        self._last_time = 0.0  # newest mapped time (reader thread only)
+        self._last_received = None  # receive time of the previous batch (reader thread only)
+        # Reader thread → animate(): bounded, whole batches at a time
+        self.data_queue = BatchQueue(config.queue_capacity, policy=config.overflow)
+        self.sinks = []  # callables(times, block) that get every ingested batch (e.g. Recorder.write)
+        self.gap_sinks = []  # callables(time) told about every reconnect gap (e.g. Recorder.mark_gap)
+        self._gaps = deque()  # reader thread → ingest(): time of the last sample before each reconnect
+        self.stats = IngestStats()
+        # Stage timings (the reader adds read/decode) and sample → pixel lag
+        self.metrics = Metrics()
+        if reader is not None:
+            reader.metrics = self.metrics
+        self._frame_start = None
+        self._frame_newest = None
+        self._hud_updated = 0.0
+        if dashboard is not None:
+            dashboard.on_drawn.append(self._on_drawn)
+        # Console output on its own thread (summary lines, or buffered per-sample lines)
+        self.console = ConsoleLogger(config.console, config.console_interval)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the console logger and the background serial thread (threaded profiles only)"""
+        self.console.start()
+        if self.config.threaded and self._thread is None:
+            self._thread = threading.Thread(target=self.reader.run, args=(self._on_line, self._stop),
+                                            kwargs={'on_reconnect': self._on_reconnect}, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.data_queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.console.close()
+
+    def _on_line(self, line, received_ns=None):
+        """Parse a line (or a batch of byte frames) and queue the samples with their times"""
+        start = time.perf_counter()
+        if received_ns is None:
+            received_ns = time.monotonic_ns()
+        if isinstance(line, tuple):
+            # from a sample bus: already parsed and on the host clock, plus the gap times
+            times, block, gaps = line
+            self._gaps.extend(gaps)
+            if len(block):
+                self._last_time = times[-1]
+                self.data_queue.put(times, block)
+            return
+        if isinstance(line, np.ndarray):
+            # binary frames or continuous-ADC block samples: only the ADC comes from the board
+            block = frames_to_samples(line)
+        elif isinstance(line, list):
+            # batch mode: a list of byte frames, parsed in one go
+            block = self.parser.parse(line)
+        else:
+            sample = parse_data(line, self.config.min_fields)
+            if sample is None:
+                self.parser.malformed += 1
+                return
+            block = np.array([(*sample, np.nan)], dtype=np.float64)
+        if len(block):
+            times = self._timestamps(block, received_ns * 1e-9)
+            self._last_time = times[-1]
+            self.metrics.observe('parse', time.perf_counter() - start)
+            # Only the reader thread may wait for the UI; when polling there is nobody to wait for
+            self.data_queue.put(times, block, timeout=None if self.config.threaded else 0)
+
+    def _on_reconnect(self):
+        """The port was reopened: break the plot lines and restart the device clock mapping"""
+        self._gaps.append(self._last_time)
+        if self.clock is not None:
+            self.clock.reset()  # the board may have rebooted
+
+    def _timestamps(self, block, received):
+        """Host time of each sample: mapped device time if present, else back-dated from the receive time
+
+        Samples without a device time that arrive together (one poll after a
+        UI stall) are spaced 1 / sample_rate apart up to `received`, but not
+        before the previous batch arrived, so they don't share one x value.
+        """
+        count = len(block)
+        step = 1.0 / self.config.sample_rate
+        if self._last_received is not None:
+            step = max(0.0, min(step, (received - self._last_received) / count))
+        self._last_received = received
+        times = received - step * np.arange(count - 1, -1, -1, dtype=np.float64)
+        if self.clock is not None:
+            stamped = np.flatnonzero(~np.isnan(block[:, DEVICE_TIME]))
+            if len(stamped):
+                device = self.clock.unwrap(block[stamped, DEVICE_TIME])
+                self.clock.update(device, np.full(len(stamped), received))
+                mapped = self.clock.to_host(device)
+                valid = ~np.isnan(mapped)
+                times[stamped[valid]] = mapped[valid]
+        # A new offset estimate must not move the x axis backwards
+        np.maximum.accumulate(times, out=times)
+        if times[0] < self._last_time:
+            np.maximum(times, self._last_time, out=times)
+        self._last_time = times[-1]
+        return times
+
+    def _poll(self):
+        """Read whatever the port has right now (non-threaded profiles)"""
+        connection = self.reader.connection
+        if connection is not None and not connection.connected:
+            # Port closed after a read error: another attempt once the backoff delay has passed
+            if self.reader.reconnect():
+                self._on_reconnect()
+            return
+        try:
+            if self.reader.mode == 'batch':
+                frames = self.reader.read_frames()
+                if len(frames):
+                    self._on_line(frames, self.reader.received_ns)
+            else:
+                line = self.reader.readline()
+                if line:
+                    self._on_line(line, self.reader.received_ns)
+        except (serial.SerialException, OSError) as e:
+            self.reader.read_errors += 1
+            if self.reader.connection is None:
+                print(f"Serial read error: {e}")
+            elif self.reader.reconnect(e):
+                self._on_reconnect()
+
+    def add_sample(self, sample, timestamp=None):
+        """Append one sample to the buffers"""
+        self.add_samples([time.monotonic() if timestamp is None else timestamp], [sample])
+
+    def add_samples(self, timestamps, samples):
+        """Append a batch of samples (Samples or an (n, 4) array) to the buffers and the filter bank"""
+        if len(samples) == 0:
+            return
+        values = np.asarray(samples, dtype=np.float64)
+        start = time.perf_counter()
+        self.buffer.extend(timestamps, values)
+        buffered = time.perf_counter()
+        self.metrics.observe('buffer', buffered - start)
+        lines = values[:, :3]
+        if self.smoother is not None:
+            lines = self.smoother.extend(lines)
+        if self.interpolator is not None:
+            self.interpolator.extend(timestamps, lines)
+        if self.smoother is not None or self.interpolator is not None:
+            self.metrics.observe('filter', time.perf_counter() - buffered)
+        self.console.log(values)
+
+    def ingest(self):
+        """Ingestion stage: move pending samples into the buffers
+
+        Takes at most `config.frame_budget` samples per call (0 = no
+        limit); anything left over stays queued for the next frame and is
+        reported in `stats.backlog`. Returns how many were added.
+        """
+        if not self.config.threaded:
+            self._poll()
+
+        gaps, times, block = self.take()
+        for gap in gaps:
+            self.buffer.mark_gap(gap)
+            for sink in self.gap_sinks:
+                sink(gap)
+        if len(block):
+            self.add_samples(times, block)
+            for sink in self.sinks:
+                sink(times, block)
+        return len(block)
+
+    def take(self):
+        """(gap times, times, block) pending from the reader, with `stats` updated, but not buffered
+
+        For consumers that only pass the samples on (the sample bus daemon);
+        `ingest()` is this plus the buffers, filters and sinks.
+        """
+        gaps = []
+        while self._gaps:
+            gaps.append(self._gaps.popleft())
+        # Everything pending (up to the budget) in one batch
+        times, block = self.data_queue.take(self.config.frame_budget or None)
+        count = len(block)
+
+        stats = self.stats
+        stats.samples += count
+        stats.last_batch = count
+        stats.backlog = self.data_queue.depth
+        stats.overflow = self.data_queue.dropped
+        stats.malformed = self.parser.malformed
+        if self.reader.decoder is not None:
+            stats.dropped = self.reader.decoder.dropped
+        if count:
+            stats.lag_seconds = time.monotonic() - times[-1]
+        elif stats.backlog == 0:
+            stats.lag_seconds = 0.0
+        stats.max_lag_seconds = max(stats.max_lag_seconds, stats.lag_seconds)
+        self.console.dropped = stats.overflow + stats.dropped
+        return gaps, times, block
+
+    def animate(self, frame):
+        """Animation function for real-time plotting"""
+        self.ingest()
+        if self.spectrum is not None:
+            start = time.perf_counter()
+            self.spectrum.update(self.buffer)
+            self.metrics.observe('spectrum', time.perf_counter() - start)
+        self._frame_start = time.perf_counter()
+        self._frame_newest = self.buffer.time[-1] if len(self.buffer) else None
+        hud = self.dashboard.hud_text
+        if hud is not None and time.monotonic() - self._hud_updated >= HUD_INTERVAL:
+            self._hud_updated = time.monotonic()
+            hud.set_text(format_hud(self))
+        return self.dashboard.update(self.buffer, self.smoother, self.interpolator, self.spectrum)
+
+    def _on_drawn(self):
+        """A frame is on screen: render time since `animate` and the newest sample's age"""
+        if self._frame_start is None:
+            return  # a redraw without new data (resize, zoom)
+        self.metrics.observe('render', time.perf_counter() - self._frame_start)
+        if self._frame_newest is not None:
+            self.metrics.lag.observe(time.monotonic() - self._frame_newest)
+        self._frame_start = None
+
+
+def build_arg_parser(profile='full', port=SERIAL_PORT, baud_rate=BAUD_RATE):
+    parser = argparse.ArgumentParser(description='ESP32 LDR real-time plotter')
+    parser.add_argument('--port', default=port, help='serial port or pyserial URL (e.g. loop://)')
+    parser.add_argument('--baud', type=int, default=baud_rate, help='baud rate')
+    parser.add_argument('--bus', metavar='NAME',
+                        help='read from the sample bus of `python3 -m ldr_telemetry.bus` instead of the port')
+    parser.add_argument('--profile', default=profile, choices=sorted(PROFILES), help='plotter profile')
+    parser.add_argument('--max-points', type=int, help='number of points to display')
+    parser.add_argument('--interval', type=int, help='update interval in milliseconds')
+    parser.add_argument('--reader', dest='reader_mode', choices=READER_MODES, help='serial reader mode')
+    parser.add_argument('--protocol', choices=PROTOCOLS,
+                        help='text, binary, block or auto (switch when SerialPlotter.c sends binary frames or blocks)')
+    parser.add_argument('--host-clock', dest='device_clock', action='store_false', default=None,
+                        help='stamp samples with the receive time even if the firmware sends timestamps')
+    parser.add_argument('--frame-budget', type=int, help='max samples ingested per frame (0 = no limit)')
+    parser.add_argument('--queue-size', dest='queue_capacity', type=int,
+                        help='max samples waiting between the serial reader and the plot')
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, help='what to do when the queue is full')
+    parser.add_argument('--filter', dest='smooth_filters', type=parse_filter_spec,
+                        help="smoothing filter for all channels (ema, kalman, mean, median, savgol, biquad, none) "
+                             "or per channel, e.g. 'adc=kalman,light=median'")
+    parser.add_argument('--interpolate', dest='interpolation_points', type=int,
+                        help='Catmull-Rom points per sample interval for the smooth lines (0 or 1 = off)')
+    parser.add_argument('--decimate', dest='decimation', choices=DECIMATION_MODES,
+                        help='reduce points per line to the axis pixel width')
+    parser.add_argument('--blit', action='store_true', default=None, help='blitted rendering (faster redraws)')
+    parser.add_argument('--console', choices=CONSOLE_MODES,
+                        help='summary line per interval (default), every sample (buffered) or nothing')
+    parser.add_argument('--console-interval', type=float, help='seconds between console summary lines')
+    parser.add_argument('--hud', action='store_true', default=None, help='per-stage latency and rates on the plot')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics at http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--spectrum', choices=SPECTRUM_MODES,
+                        help='fourth panel with the ADC power spectrum (Welch) or a spectrogram')
+    parser.add_argument('--spectrum-segment', type=int, help='FFT length in samples (default 256)')
+    parser.add_argument('--spectrum-overlap', type=float, help='overlap between segments, 0..0.9 (default 0.5)')
+    return parser
+
+
+def start_metrics_server(port, source):
+    """Serve `source()` at http://127.0.0.1:port/metrics (None without a port or if it is taken)"""
+    if port is None:
+        return None
+    try:
+        server = MetricsServer(source, port).start()
+    except OSError as e:
+        print(f"❌ Metrics endpoint on port {port}: {e}")
+        return None
+    print(f"📡 Metrics at http://127.0.0.1:{server.port}/metrics")
+    return server
+
+
+def main(argv=None, profile='full', port=SERIAL_PORT, baud_rate=BAUD_RATE):
+    """Entry point shared by the plotter scripts"""
+    args = build_arg_parser(profile, port, baud_rate).parse_args(argv)
+    config = get_profile(args.profile).with_overrides(max_points=args.max_points, update_interval=args.interval,
+                                                      reader_mode=args.reader_mode, protocol=args.protocol,
+                                                      device_clock=args.device_clock,
+                                                      frame_budget=args.frame_budget, blit=args.blit,
+                                                      queue_capacity=args.queue_capacity, overflow=args.overflow,
+                                                      decimation=args.decimation, smooth_filters=args.smooth_filters,
+                                                      interpolation_points=args.interpolation_points,
+                                                      console=args.console, console_interval=args.console_interval,
+                                                      hud=args.hud, metrics_port=args.metrics_port,
+                                                      spectrum=args.spectrum, spectrum_segment=args.spectrum_segment,
+                                                      spectrum_overlap=args.spectrum_overlap)
+
+    if args.bus is not None:
+        # Shared memory from the acquisition daemon: parsed samples, any number of viewers
+        from .bus import BusReader
+
+        config = config.with_overrides(threaded=True)
+        connection = None
+        try:
+            reader = BusReader(args.bus, backfill=config.max_points)
+            print(f"✅ Attached to sample bus '{args.bus}' (daemon pid {reader.subscriber.pid})")
+        except FileNotFoundError:
+            print(f"❌ No sample bus '{args.bus}' (start it with: python3 -m ldr_telemetry.bus --port ...)")
+            return 1
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    else:
+        # Serial connection (reopened automatically if the board goes away)
+        connection = ConnectionManager(args.port, args.baud, timeout=config.serial_timeout)
+        try:
+            ser = connection.open()
+            print(f"✅ Connected to {args.port} at {args.baud} baud")
+        except (serial.SerialException, OSError, ValueError) as e:
+            print(f"❌ Error connecting to serial port: {e}")
+            return 1
+        reader = SerialReader(ser, config.reader_mode, config.protocol, connection=connection)
+    print("📊 Real-time plotting started...")
+    print("🔍 Close the plot window to stop")
+
+    from .renderer import Dashboard
+
+    plotter = Plotter(config, reader, Dashboard(config))
+    server = start_metrics_server(config.metrics_port, lambda: prometheus_text({None: plotter}))
+    plotter.start()
+
+    # Start animation
+    print("🚀 Starting real-time animation...")
+    if config.smooth_factor is not None:
+        print(f"📊 Smoothing factor: {config.smooth_factor}")
+        print("🎯 Showing both raw and smoothed data")
+    if config.spectrum is not None:
+        print(f"🎵 Spectrum panel: {config.spectrum}, {config.spectrum_segment}-point FFT, "
+              f"{config.spectrum_overlap:.0%} overlap")
+    try:
+        plotter.dashboard.show(plotter.animate)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping...")
+    finally:
+        # Cleanup
+        plotter.stop()
+        reader.close()
+        if server is not None:
+            server.close()
+    print(f"📈 Samples: {plotter.stats.samples} | Malformed lines: {plotter.parser.malformed} | "
+          f"Max lag: {plotter.stats.max_lag_seconds:.2f}s")
+    handoff = plotter.data_queue
+    if handoff.batches:
+        print(f"📬 Queue: {handoff.batches} batches (avg {handoff.samples / handoff.batches:.1f}, max {handoff.max_batch}) | "
+              f"Max depth: {handoff.max_depth}/{handoff.capacity} | Dropped ({handoff.policy}): {handoff.dropped}")
+    stages = [f"{stage} {h.quantile(0.5) * 1e3:.3f}/{h.quantile(0.99) * 1e3:.3f}"
+              for stage, h in plotter.metrics.stages.items() if h.count]
+    if stages:
+        print(f"⏱️  Stage p50/p99 (ms): {' | '.join(stages)}")
+    decoder = plotter.reader.decoder
+    if isinstance(decoder, BlockDecoder) and decoder.frames:
+        print(f"📦 ADC blocks: {decoder.frames} ({decoder.samples} samples at {decoder.sample_rate} Hz) | "
+              f"Dropped samples: {decoder.dropped} | Overruns: {decoder.overruns} | CRC errors: {decoder.crc_errors}")
+    elif plotter.reader.binary:
+        print(f"📦 Binary frames: {decoder.frames} | Dropped: {decoder.dropped} | CRC errors: {decoder.crc_errors}")
+    spectrum = plotter.spectrum
+    if spectrum is not None and spectrum.segments:
+        peak = spectrum.peak()
+        print(f"🎵 Spectrum: {spectrum.segments} segments ({spectrum.skipped} skipped) at {spectrum.sample_rate:.0f} Hz"
+              + (f" | Peak: {peak[0]:.1f} Hz" if peak else ""))
+    if plotter.clock is not None and plotter.clock.offset is not None:
+        print(f"⏱️  Device clock drift: {plotter.clock.drift * 1e6:+.1f} ppm")
+    if connection is None:
+        print(f"📡 Sample bus: {reader.subscriber.samples} samples read | Lost (fell behind): {reader.lost} | "
+              f"Daemon restarts: {reader.reattached}")
+        print("🔌 Detached from the sample bus")
+    else:
+        if connection.outages or not connection.connected:
+            latencies = [outage.reconnect_latency for outage in connection.outages]
+            print(f"🔁 Reconnects: {len(connection.outages)} | Downtime: {connection.downtime:.1f}s | "
+                  f"Max reconnect latency: {max(latencies, default=0.0):.2f}s")
+        print("🔌 Serial connection closed")
+    print("👋 Goodbye!")
+    return 0
@@ -0,0 +1,1032 @@
+"""
+Benchmarks
+วัดประสิทธิภาพของ hot path โดยไม่ต้องใช้บอร์ดจริง (ใช้ pseudo-terminal แทน)
+
+    python3 -m ldr_telemetry.bench reader
+    python3 -m ldr_telemetry.bench parser
+    python3 -m ldr_telemetry.bench protocol
+    python3 -m ldr_telemetry.bench handoff
+    python3 -m ldr_telemetry.bench console
+    python3 -m ldr_telemetry.bench recorder
+    python3 -m ldr_telemetry.bench multi
+    python3 -m ldr_telemetry.bench bus
+    python3 -m ldr_telemetry.bench buffer
+    python3 -m ldr_telemetry.bench render
+    python3 -m ldr_telemetry.bench filters
+    python3 -m ldr_telemetry.bench smoothing
+    python3 -m ldr_telemetry.bench interpolation
+    python3 -m ldr_telemetry.bench spectrum
+    python3 -m ldr_telemetry.bench suite --out bench-results/today.json
+    python3 -m ldr_telemetry.bench compare bench-results/old.json bench-results/today.json
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import queue
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tty
+import warnings
+from collections import deque
+
+import numpy as np
+import serial
+
+from .buffer import SampleBuffer
+from .decimate import DECIMATION_MODES
+from .parser import Sample
+from .probe import FORMATS
+from .reader import READER_MODES, SerialReader
+
+TARGET_LINES_PER_SEC = 10_000
+SUITE_VERSION = 1  # bump when a suite metric changes meaning
+SUITE_DIR = 'bench-results'
+REGRESSION_THRESHOLD = 10.0  # percent worse than the baseline before `compare` fails
+# Suite metrics and whether a larger value is better
+SUITE_METRICS = {
+    'ingest_lines_per_sec': True,
+    'frame_ms_mean': False,
+    'frame_ms_p50': False,
+    'frame_ms_p99': False,
+    'latency_ms_p50': False,
+    'latency_ms_p99': False,
+    'memory_growth_kb': False,
+}
+
+
+def open_pty():
+    """Create a raw pseudo-terminal; returns (master_fd, slave_path, slave_fd)"""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    return master, os.ttyname(slave), slave
+
+
+def sample_lines(count):
+    """`count` lines in the SerialPlotter.c format as one bytes payload"""
+    lines = []
+    for i in range(count):
+        adc = (i * 37) % 4096
+        light = adc / 4095 * 100
+        status = 0 if light < 20 else 1 if light < 50 else 2 if light < 80 else 3
+        lines.append(f"{adc},{adc * 3.3 / 4095:.2f},{light:.1f},{status}\n")
+    return ''.join(lines).encode()
+
+
+def _legacy_parse_data(line):
+    """The original realtime_plot.py parser (bare except, CSV only)"""
+    try:
+        if ',' in line:
+            parts = line.strip().split(',')
+            if len(parts) >= 4:
+                return (int(parts[0]), float(parts[1]), float(parts[2]), int(parts[3]))
+    except:
+        pass
+    return None
+
+
+def bench_parser(lines=100_000, batch_size=300):
+    """lines/s from byte frames to (n, 4) columns: per-line decode + parse vs FrameParser"""
+    from .parser import FrameParser, parse_data
+
+    csv = sample_lines(lines).split(b'\n')[:-1]
+    formats = {
+        'csv': csv,
+        'key_value': [b'ADC:%s,Voltage:%s,LightLevel:%s' % tuple(frame.split(b',')[:3]) for frame in csv],
+        'mixed': [b'I (%d) boot: noise' % i if i % 10 == 0 else frame for i, frame in enumerate(csv)],
+    }
+    results = {}
+    for name, frames in formats.items():
+        row = {}
+        for label, parse in (('legacy', _legacy_parse_data), ('parse_data', parse_data)):
+            start = time.perf_counter()
+            for offset in range(0, lines, batch_size):
+                samples = [parse(frame.decode('utf-8', errors='replace')) for frame in frames[offset:offset + batch_size]]
+                np.array([sample for sample in samples if sample], dtype=np.float64)
+            row[label] = lines / (time.perf_counter() - start)
+        parser = FrameParser()
+        start = time.perf_counter()
+        for offset in range(0, lines, batch_size):
+            parser.parse(frames[offset:offset + batch_size])
+        row['batch'] = lines / (time.perf_counter() - start)
+        row['malformed'] = parser.malformed
+        results[name] = row
+    return results
+
+
+def bench_protocol(samples=100_000, chunk_size=4096, baud_rate=115200):
+    """Bytes per sample, samples/s the link can carry and host decode rate: text vs binary frames vs blocks"""
+    from .parser import FrameParser
+    from .protocol import BinaryDecoder, BlockDecoder, encode_blocks, encode_frames, frames_to_samples
+
+    text = sample_lines(samples)
+    adc = np.array([int(line.split(b',')[0]) for line in text.split(b'\n')[:-1]])
+    binary = encode_frames(adc, timestamp_us=np.arange(samples) * 100_000)
+    block = encode_blocks(adc)
+    results = {}
+    for name, payload in (('text', text), ('binary', binary), ('block', block)):
+        parser = FrameParser()
+        decoder = BlockDecoder() if name == 'block' else BinaryDecoder()
+        pending = b''
+        start = time.perf_counter()
+        for offset in range(0, len(payload), chunk_size):
+            chunk = payload[offset:offset + chunk_size]
+            if name != 'text':
+                frames_to_samples(decoder.feed(chunk))
+                continue
+            # what SerialReader does in batch mode
+            data = pending + chunk
+            end = data.rfind(b'\n')
+            pending = data[end + 1:]
+            parser.parse(data[:end].split(b'\n'))
+        seconds = time.perf_counter() - start
+        per_sample = len(payload) / samples
+        results[name] = {'bytes_per_sample': per_sample,
+                         'link_samples_per_sec': baud_rate / 10 / per_sample,  # 8N1 = 10 bits per byte
+                         'decode_samples_per_sec': samples / seconds}
+    return results
+
+
+def bench_handoff(samples=200_000, batch_size=100, capacity=10_000):
+    """samples/s from a reader thread to the consumer: per-sample queue.Queue vs BatchQueue"""
+    from .handoff import BatchQueue
+
+    block = np.zeros((batch_size, 5))
+    times = np.zeros(batch_size)
+    results = {}
+
+    # Legacy realtime_plot.py: one put per sample, `while not empty(): get_nowait()` per frame
+    data_queue = queue.Queue()
+
+    def legacy_producer():
+        for _ in range(samples // batch_size):
+            for row in block:
+                data_queue.put((0.0, row))
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=legacy_producer)
+    thread.start()
+    received = 0
+    while received < samples:
+        while not data_queue.empty():
+            data_queue.get_nowait()
+            received += 1
+    thread.join()
+    results['queue'] = samples / (time.perf_counter() - start)
+
+    handoff = BatchQueue(capacity, policy='block')
+
+    def producer():
+        for _ in range(samples // batch_size):
+            handoff.put(times, block)
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=producer)
+    thread.start()
+    received = 0
+    while received < samples:
+        received += len(handoff.take()[0])
+    thread.join()
+    results['batch'] = samples / (time.perf_counter() - start)
+    return results
+
+
+def bench_console(samples=20_000, batch_size=10):
+    """ms per frame spent on console output in the plot loop: print per sample vs ConsoleLogger
+
+    Output goes to os.devnull, the best case for `print`; a real terminal
+    (Windows console, SSH) only makes the per-sample print slower, while
+    the logger's cost in the loop stays the same.
+    """
+    from .console import ConsoleLogger, format_sample
+
+    rng = np.random.default_rng(0)
+    block = np.column_stack([rng.integers(0, 4096, samples), rng.random(samples) * 3.3,
+                             rng.random(samples) * 100, rng.integers(0, 4, samples)]).astype(np.float64)
+    frames = samples // batch_size
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        # Legacy easy/smooth_realtime.py: print() with strftime for every sample
+        saved, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            for frame in range(frames):
+                for adc, voltage, light, status in block[frame * batch_size:(frame + 1) * batch_size]:
+                    print(format_sample(Sample(int(adc), voltage, light, int(status)), with_time=True))
+            results['print'] = (time.perf_counter() - start) / frames * 1e3
+        finally:
+            sys.stdout = saved
+
+        for mode in ('summary', 'sample_time'):
+            logger = ConsoleLogger(mode, stream=devnull)
+            logger.start()
+            start = time.perf_counter()
+            for frame in range(frames):
+                logger.log(block[frame * batch_size:(frame + 1) * batch_size])
+            results[mode] = (time.perf_counter() - start) / frames * 1e3
+            logger.close()
+    return results
+
+
+def _feed(master, payload, stop, chunk_size=4096):
+    """Write `payload` to the pty master until done or `stop` is set"""
+    view = memoryview(payload)
+    offset = 0
+    try:
+        while offset < len(view) and not stop.is_set():
+            _, writable, _ = select.select([], [master], [], 0.05)
+            if writable:
+                offset += os.write(master, view[offset:offset + chunk_size])
+    except OSError:
+        pass  # reader side closed
+
+
+def _feed_paced(master, payload, rate, stop, line_size):
+    """Write `payload` at about `rate` lines/s in 10 ms slices"""
+    step = max(1, int(rate * 0.01)) * line_size
+    start = time.perf_counter()
+    for offset in range(0, len(payload), step):
+        if stop.is_set():
+            break
+        _feed(master, payload[offset:offset + step], stop)
+        delay = start + (offset + step) / line_size / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def bench_recorder(rate=20_000, duration=5.0):
+    """Samples/s and CPU of the headless recorder fed from a pty at `rate` lines/s"""
+    from .app import Plotter
+    from .config import get_profile
+    from .recorder import RECORD_COLUMNS, Recorder, load_recording, record
+
+    # Fixed-width lines so the pacing is exact
+    payload = b''.join(b'%04d,1.65,50.0,2\n' % (i % 4096) for i in range(int(rate * duration)))
+    master, slave_path, slave = open_pty()
+    ser = serial.Serial(slave_path, 115200, timeout=0.1)
+    config = get_profile('full').with_overrides(threaded=True, reader_mode='batch', protocol='text', overflow='block')
+    plotter = Plotter(config, SerialReader(ser, config.reader_mode, config.protocol))
+    stop = threading.Event()
+    writer = threading.Thread(target=_feed_paced, args=(master, payload, rate, stop, 17), daemon=True)
+    with tempfile.TemporaryDirectory() as path:
+        recorder = Recorder(path)
+        cpu = time.process_time()
+        start = time.perf_counter()
+        writer.start()
+        record(plotter, recorder, duration)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        stop.set()
+        writer.join(timeout=1)
+        _, chunks = load_recording(path)
+        stored = sum(len(chunk['time']) for chunk in chunks)
+    ser.close()
+    os.close(master)
+    os.close(slave)
+    return {
+        'samples': stored,
+        'samples_per_sec': stored / elapsed,
+        'cpu_percent': cpu / elapsed * 100,  # includes the pty writer thread
+        'bytes_per_sample': sum(np.dtype(dtype).itemsize for dtype in RECORD_COLUMNS.values()),
+    }
+
+
+def bench_multi(devices=(1, 2, 4, 8), rate=1_000, duration=5.0):
+    """CPU of one DevicePool process as boards are added (each pty fed at `rate` lines/s)"""
+    from .config import get_profile
+    from .multi import FLUSH_INTERVAL, DevicePool
+
+    # Feeders run in their own processes so only the acquisition side is measured
+    context = multiprocessing.get_context('fork')
+    payload = b''.join(b'%04d,1.65,50.0,2\n' % (i % 4096) for i in range(int(rate * (duration + 1))))
+    config = get_profile('full').with_overrides(console='none', frame_budget=0)
+    results = []
+    for count in devices:
+        ptys = [open_pty() for _ in range(count)]
+        stop = context.Event()
+        feeders = [context.Process(target=_feed_paced, args=(master, payload, rate, stop, 17), daemon=True)
+                   for master, _, _ in ptys]
+        pool = DevicePool(config)
+        for i, (_, slave_path, _) in enumerate(ptys):
+            pool.add(f"dev{i}", serial.Serial(slave_path, 115200, timeout=0.1))
+        for feeder in feeders:
+            feeder.start()
+        pool.start()
+        cpu = time.process_time()
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            time.sleep(FLUSH_INTERVAL)
+            pool.ingest()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        stop.set()
+        pool.close()
+        for feeder in feeders:
+            feeder.join(timeout=1)
+        for master, _, slave in ptys:
+            os.close(master)
+            os.close(slave)
+        samples = sum(row['samples'] for row in pool.metrics())
+        results.append({'devices': count, 'samples_per_sec': samples / elapsed,
+                        'cpu_percent': cpu / elapsed * 100,
+                        'max_lag_seconds': max(row['max_lag_seconds'] for row in pool.metrics())})
+    return results
+
+
+def _bus_reader(name, stop, results):
+    """Subscriber process for bench_bus: read everything, report samples, losses and the worst lag"""
+    from .bus import POLL_INTERVAL, BusSubscriber
+
+    subscriber = BusSubscriber(name)
+    max_lag = 0.0
+    while not stop.is_set():
+        times, _, _ = subscriber.read()
+        if len(times):
+            max_lag = max(max_lag, time.monotonic() - times[-1])
+        else:
+            stop.wait(POLL_INTERVAL)
+    results.put((subscriber.samples, subscriber.lost, max_lag))
+    subscriber.close()
+
+
+def bench_bus(readers=(0, 1, 4, 8), rate=20_000, duration=3.0, capacity=1 << 16):
+    """Publish cost of the shared memory sample bus as reader processes attach"""
+    from .bus import SampleBus
+
+    context = multiprocessing.get_context('fork')
+    batch = max(1, rate // 100)  # what the daemon moves every 10 ms
+    times = np.arange(batch, dtype=np.float64)
+    block = np.column_stack([np.arange(batch) % 4096, np.full(batch, 1.65), np.full(batch, 50.0), np.full(batch, 2)])
+    results = []
+    for count in readers:
+        name = f"ldr-bench-{os.getpid()}"
+        bus = SampleBus.create(name, capacity)
+        stop = context.Event()
+        reports = context.Queue()
+        processes = [context.Process(target=_bus_reader, args=(name, stop, reports), daemon=True)
+                     for _ in range(count)]
+        for process in processes:
+            process.start()
+        time.sleep(0.2)  # let them attach
+        publish = 0.0
+        batches = 0
+        cpu = time.process_time()
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            begin = time.perf_counter()
+            bus.publish(time.monotonic() - (batch - times) / rate, block)
+            publish += time.perf_counter() - begin
+            batches += 1
+            delay = start + batches * batch / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        time.sleep(0.1)  # readers catch up with the last batch
+        stop.set()
+        rows = [reports.get(timeout=5) for _ in processes]
+        for process in processes:
+            process.join(timeout=1)
+        bus.close()
+        results.append({
+            'readers': count,
+            'publish_us_per_batch': publish / batches * 1e6,
+            'publisher_cpu_percent': cpu / elapsed * 100,
+            'samples_per_reader': min((row[0] for row in rows), default=batches * batch),
+            'lost': sum(row[1] for row in rows),
+            'max_lag_ms': max((row[2] for row in rows), default=0.0) * 1e3,
+        })
+    return results
+
+
+def bench_reader(mode='batch', lines=100_000, duration=5.0):
+    """Lines/s a `SerialReader` thread sustains from a pty that is written as fast as possible"""
+    master, slave_path, slave = open_pty()
+    ser = serial.Serial(slave_path, 115200, timeout=0.1)
+    reader = SerialReader(ser, mode)
+    received = [0]
+    stop = threading.Event()
+
+    def on_line(frames, received_ns):
+        received[0] += len(frames) if isinstance(frames, list) else 1
+        if received[0] >= lines:
+            stop.set()
+
+    writer = threading.Thread(target=_feed, args=(master, sample_lines(lines), stop), daemon=True)
+    thread = threading.Thread(target=reader.run, args=(on_line, stop), daemon=True)
+    start = time.perf_counter()
+    writer.start()
+    thread.start()
+    stop.wait(duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join(timeout=1)
+    writer.join(timeout=1)
+    ser.close()
+    os.close(master)
+    os.close(slave)
+    return {
+        'mode': mode,
+        'lines': received[0],
+        'seconds': round(elapsed, 3),
+        'lines_per_sec': round(received[0] / elapsed, 1),
+    }
+
+
+def _legacy_frame(store, batch):
+    """Per-frame work of the old deque plotters: append, rebuild time_rel, copy to lists"""
+    time_data, adc_data, voltage_data, light_data = store
+    for t, adc, voltage, light in batch:
+        time_data.append(t)
+        adc_data.append(adc)
+        voltage_data.append(voltage)
+        light_data.append(light)
+    time_rel = [(t - time_data[0]) for t in time_data]
+    return time_rel, list(adc_data), list(voltage_data), list(light_data)
+
+
+def _ring_frame(buffer, times, samples):
+    buffer.extend(times, samples)
+    return (buffer.time_relative(),) + buffer.series()
+
+
+def bench_buffer(max_points, frames=200, batch_size=10):
+    """Mean per-frame cost (ms) of buffer append + plot data prep, deque vs ring"""
+    samples = [Sample(i % 4096, 1.0, 50.0, 2) for i in range(batch_size)]
+    batches = [[(f * batch_size + i) * 0.01 for i in range(batch_size)] for f in range(frames)]
+
+    store = tuple(deque(maxlen=max_points) for _ in range(4))
+    buffer = SampleBuffer(max_points)
+    # fill both to capacity first so every frame is a steady-state frame
+    fill = [i * 1e-3 for i in range(max_points)]
+    fill_samples = [samples[0]] * max_points
+    buffer.extend(fill, fill_samples)
+    for t in fill:
+        for column, value in zip(store, (t, 0, 1.0, 50.0)):
+            column.append(value)
+
+    start = time.perf_counter()
+    for times in batches:
+        _legacy_frame(store, [(t, s.adc, s.voltage, s.light) for t, s in zip(times, samples)])
+    legacy = (time.perf_counter() - start) / frames
+
+    start = time.perf_counter()
+    for times in batches:
+        _ring_frame(buffer, times, samples)
+    ring = (time.perf_counter() - start) / frames
+    return {'max_points': max_points, 'deque_ms': round(legacy * 1e3, 4), 'ring_ms': round(ring * 1e3, 4)}
+
+
+def bench_render(profile='smooth', blit=False, max_points=2_000, frames=100, batch_size=10, decimation='minmax'):
+    """Mean frame time (ms) of update + draw on the Agg backend"""
+    import matplotlib
+    matplotlib.use('Agg')
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')  # Thai status text on hosts without Thai fonts
+    from .config import get_profile
+    from .renderer import Dashboard
+
+    config = get_profile(profile).with_overrides(max_points=max_points, blit=blit, decimation=decimation)
+    dashboard = Dashboard(config)
+    dashboard.fig.tight_layout()
+    buffer = SampleBuffer(max_points)
+    rate = 100.0  # samples/s of the simulated stream
+    index = 0
+
+    def next_batch(count):
+        nonlocal index
+        times = [(index + i) / rate for i in range(count)]
+        samples = []
+        for i in range(count):
+            adc = int(2048 + 1500 * math.sin((index + i) / 50))
+            samples.append(Sample(adc, adc * 3.3 / 4095, adc / 40.95, 2))
+        index += count
+        return times, samples
+
+    buffer.extend(*next_batch(max_points))
+    dashboard.update(buffer)
+    dashboard.fig.canvas.draw()
+    dashboard.full_redraws = 0
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        buffer.extend(*next_batch(batch_size))
+        dashboard.update(buffer)
+        if blit:
+            dashboard.blit()
+        else:
+            dashboard.fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+    matplotlib.pyplot.close(dashboard.fig)
+    return {
+        'profile': profile,
+        'blit': blit,
+        'decimation': decimation,
+        'max_points': max_points,
+        'frame_ms': round(elapsed / frames * 1e3, 3),
+        'full_redraws': dashboard.full_redraws if blit else frames,
+    }
+
+
+def _legacy_moving_average(data, window_size=5):
+    """The original easy_realtime.py implementation (O(n^2))"""
+    if len(data) < window_size:
+        return list(data)
+    smoothed = []
+    for i in range(len(data)):
+        start_idx = max(0, i - window_size + 1)
+        window_data = list(data)[start_idx:i+1]
+        smoothed.append(sum(window_data) / len(window_data))
+    return smoothed
+
+
+def bench_filters(sizes, window=15, legacy_limit=20_000):
+    """Seconds per call for each window filter as the input grows"""
+    from .filters import WINDOW_KINDS, WindowFilter, window_filter
+
+    results = []
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        values = 2048 + 300 * rng.standard_normal(size)
+        row = {'samples': size}
+        if size <= legacy_limit:
+            data = deque(values.tolist())
+            start = time.perf_counter()
+            _legacy_moving_average(data, window)
+            row['legacy_mean_s'] = round(time.perf_counter() - start, 5)
+        for kind in WINDOW_KINDS:
+            start = time.perf_counter()
+            window_filter(values, window, kind)
+            row[f'{kind}_s'] = round(time.perf_counter() - start, 5)
+        # streaming: the same samples in frame-sized batches
+        stream = WindowFilter(window, 'mean')
+        start = time.perf_counter()
+        for chunk in np.array_split(values, max(1, size // 100)):
+            stream.process(chunk)
+        row['stream_mean_s'] = round(time.perf_counter() - start, 5)
+        results.append(row)
+    return results
+
+
+def bench_smoothing(samples=100_000, batch_size=300):
+    """ns/sample of the legacy per-sample smoothing vs the FilterBank on batches"""
+    from .filters import FILTER_KINDS, FilterBank, apply_kalman_filter, smooth_data
+
+    rng = np.random.default_rng(0)
+    block = np.column_stack([2048 + 300 * rng.standard_normal(samples),
+                             1.65 + 0.2 * rng.standard_normal(samples),
+                             50 + 7 * rng.standard_normal(samples)])
+    rows = block.tolist()
+    results = {}
+
+    for name, step in (('legacy_ema', lambda v, d: smooth_data(v, d, 0.2)),
+                       ('legacy_kalman', apply_kalman_filter)):
+        channels = [deque(maxlen=150) for _ in range(3)]
+        start = time.perf_counter()
+        for adc, voltage, light in rows:
+            step(adc, channels[0])
+            step(voltage, channels[1])
+            step(light, channels[2])
+        results[name] = (time.perf_counter() - start) / samples * 1e9
+
+    for kind in FILTER_KINDS:
+        bank = FilterBank((kind,) * 3, factor=0.2)
+        start = time.perf_counter()
+        for offset in range(0, samples, batch_size):
+            bank.process(block[offset:offset + batch_size])
+        results[kind] = (time.perf_counter() - start) / samples * 1e9
+    return results
+
+
+def bench_interpolation(frames=200, window=150, batch_size=3, points=10):
+    """ms/frame of rebuilding interp1d over the window vs the incremental upsampler"""
+    from .filters import CatmullRomUpsampler, interpolate_data
+
+    rng = np.random.default_rng(0)
+    total = window + frames * batch_size
+    times = np.arange(total) * 0.1
+    values = np.column_stack([2048 + 300 * rng.standard_normal(total),
+                              1.65 + 0.2 * rng.standard_normal(total),
+                              50 + 7 * rng.standard_normal(total)])
+
+    # Legacy: every frame re-interpolates the whole visible window, per channel,
+    # at `points` per sample like the upsampler (num_points is a per-sample multiplier)
+    start = time.perf_counter()
+    for frame in range(frames):
+        end = window + frame * batch_size
+        x = times[end - window:end]
+        for channel in range(3):
+            interpolate_data(x, values[end - window:end, channel], points)
+    legacy = (time.perf_counter() - start) / frames * 1e3
+
+    upsampler = CatmullRomUpsampler(points, window)
+    upsampler.extend(times[:window], values[:window])
+    start = time.perf_counter()
+    for frame in range(frames):
+        offset = window + frame * batch_size
+        upsampler.extend(times[offset:offset + batch_size], values[offset:offset + batch_size])
+        upsampler.series()
+    incremental = (time.perf_counter() - start) / frames * 1e3
+    return {'legacy_ms': legacy, 'incremental_ms': incremental}
+
+
+def bench_spectrum(rate, frames=100, fps=20, max_points=60_000, segment=256, max_segments=32):
+    """ms/frame of a full Welch recompute over the buffer vs the incremental SpectrumEstimator"""
+    from .spectrum import SpectrumEstimator
+
+    batch = max(1, rate // fps)
+    rng = np.random.default_rng(0)
+    total = max_points + frames * batch
+    times = np.arange(total) / rate
+    t = times[:, None]
+    # 100 Hz mains flicker on top of noise
+    adc = 2048 + 200 * np.sin(2 * np.pi * 100 * t) + 30 * rng.standard_normal((total, 1))
+    values = np.column_stack([adc, adc * 3.3 / 4095, adc / 40.95, np.full((total, 1), 2)])
+
+    buffer = SampleBuffer(max_points)
+    buffer.extend(times[:max_points], values[:max_points])
+    estimator = SpectrumEstimator(segment, max_segments=max_segments)
+    window = np.hanning(segment + 1)[:-1]
+    hop = segment // 2
+
+    # Full recompute: every frame re-segments and transforms the whole buffer
+    start = time.perf_counter()
+    for frame in range(frames):
+        offset = max_points + frame * batch
+        buffer.extend(times[offset:offset + batch], values[offset:offset + batch])
+        signal = buffer.adc
+        segments = np.lib.stride_tricks.sliding_window_view(signal, segment)[::hop]
+        segments = (segments - segments.mean(axis=1, keepdims=True)) * window
+        np.mean(np.abs(np.fft.rfft(segments, axis=1)) ** 2, axis=0)
+    full = (time.perf_counter() - start) / frames * 1e3
+
+    buffer = SampleBuffer(max_points)
+    buffer.extend(times[:max_points], values[:max_points])
+    estimator.update(buffer)
+    estimator.skipped = 0  # only count what the frames skip, not the initial fill
+    start = time.perf_counter()
+    for frame in range(frames):
+        offset = max_points + frame * batch
+        buffer.extend(times[offset:offset + batch], values[offset:offset + batch])
+        estimator.update(buffer)
+        estimator.psd_db()
+    incremental = (time.perf_counter() - start) / frames * 1e3
+    return {'rate': rate, 'full_ms': full, 'incremental_ms': incremental, 'skipped': estimator.skipped,
+            'peak_hz': estimator.peak()[0]}
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _host_info():
+    import matplotlib
+
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'pyserial': serial.__version__,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # bytes on macOS, kB on Linux
+
+
+def _suite_plotter(config, emulator):
+    from .app import Plotter
+    from .connection import ConnectionManager
+    from .renderer import Dashboard
+
+    connection = ConnectionManager(emulator.port, timeout=config.serial_timeout)
+    reader = SerialReader(connection.open(), config.reader_mode, config.protocol, connection=connection)
+    dashboard = Dashboard(config)
+    dashboard.fig.tight_layout()
+    return Plotter(config, reader, dashboard)
+
+
+def _draw(plotter):
+    plotter.animate(None)
+    if plotter.config.blit:
+        plotter.dashboard.blit()
+    else:
+        plotter.dashboard.fig.canvas.draw()
+
+
+def bench_profile(profile, duration=3.0, frames=200, rate=1_000, fmt='csv+timestamp', seed=0, memory_frames=50):
+    """Suite figures of one plotter profile against the emulator
+
+    - ingest: lines/s moved into the buffers from an unthrottled emulator
+      (no drawing, no frame budget)
+    - frame time: animate + draw on the Agg backend while the emulator
+      streams at `rate` samples/s
+    - latency: age of the newest sample once its frame is drawn
+    - memory: Python heap growth (tracemalloc) over `memory_frames` more
+      frames (tracing slows drawing down several times, so fewer of
+      them)
+    """
+    import tracemalloc
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')
+    from .config import get_profile
+    from .emulator import Emulator
+
+    config = get_profile(profile).with_overrides(console='none')
+    result = {'profile': profile, 'threaded': config.threaded, 'blit': config.blit}
+
+    # Ingest throughput
+    with Emulator(fmt, rate=None, seed=seed, boot_log=False).start(process=True) as emulator:
+        plotter = _suite_plotter(config.with_overrides(frame_budget=0), emulator)
+        plotter.start()
+        samples = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            samples += plotter.ingest()
+            if config.threaded:
+                time.sleep(config.update_interval / 1000)
+        elapsed = time.perf_counter() - start
+        plotter.stop()
+        plotter.reader.close()
+        plt.close(plotter.dashboard.fig)
+    result['ingest_lines_per_sec'] = samples / elapsed
+    result['malformed'] = plotter.stats.malformed
+
+    # Frame time, latency and memory at a realistic rate
+    with Emulator(fmt, rate=rate, seed=seed, boot_log=False).start(process=True) as emulator:
+        plotter = _suite_plotter(config, emulator)
+        plotter.start()
+        deadline = time.monotonic() + 1.0
+        while not len(plotter.buffer) and time.monotonic() < deadline:
+            plotter.ingest()
+            time.sleep(0.01)
+        for _ in range(10):  # warm-up: first draws build the text and tick caches
+            _draw(plotter)
+        frame_times, latencies = [], []
+        for _ in range(frames):
+            start = time.perf_counter()
+            _draw(plotter)
+            frame_times.append(time.perf_counter() - start)
+            if len(plotter.buffer):
+                latencies.append(time.monotonic() - plotter.buffer.time[-1])
+            # The rest of the frame interval, like FuncAnimation would wait
+            time.sleep(max(config.update_interval / 1000 - frame_times[-1], 0))
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(memory_frames):
+            _draw(plotter)
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        plotter.stop()
+        plotter.reader.close()
+        plt.close(plotter.dashboard.fig)
+
+    frame_ms = np.array(frame_times) * 1e3
+    result.update({
+        'frame_ms_mean': float(frame_ms.mean()),
+        'frame_ms_p50': float(np.percentile(frame_ms, 50)),
+        'frame_ms_p99': float(np.percentile(frame_ms, 99)),
+        'latency_ms_p50': float(np.percentile(latencies, 50) * 1e3) if latencies else None,
+        'latency_ms_p99': float(np.percentile(latencies, 99) * 1e3) if latencies else None,
+        'memory_growth_kb': growth / 1024,
+    })
+    return result
+
+
+def bench_suite(profiles=None, duration=3.0, frames=200, rate=1_000, fmt='csv+timestamp', seed=0, memory_frames=50):
+    """Every profile through `bench_profile`, with the host and commit for later comparison
+
+    The peak RSS is for the whole run (the profiles share one process).
+    """
+    from .config import PROFILES
+
+    settings = {'duration': duration, 'frames': frames, 'memory_frames': memory_frames, 'rate': rate, 'format': fmt,
+                'seed': seed}
+    results = {profile: bench_profile(profile, duration, frames, rate, fmt, seed, memory_frames)
+               for profile in (profiles or PROFILES)}
+    return {
+        'version': SUITE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': _git_commit(),
+        'host': _host_info(),
+        'settings': settings,
+        'peak_rss_mb': _peak_rss_mb(),
+        'results': results,
+    }
+
+
+def compare_suites(old, new, threshold=REGRESSION_THRESHOLD):
+    """Rows of (profile, metric, old, new, change %, regressed) for the metrics both runs have
+
+    The change is signed so that positive is always an improvement.
+    """
+    rows = []
+    for profile, after in new['results'].items():
+        before = old['results'].get(profile)
+        if before is None:
+            continue
+        for metric, higher_is_better in SUITE_METRICS.items():
+            a, b = before.get(metric), after.get(metric)
+            if a is None or b is None or a == 0:
+                continue
+            change = ((b - a) if higher_is_better else (a - b)) / abs(a) * 100
+            rows.append((profile, metric, a, b, change, change < -threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ldr_telemetry benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+    p = sub.add_parser('reader', help='serial reader throughput from a pty')
+    p.add_argument('--mode', choices=READER_MODES + ('all',), default='all')
+    p.add_argument('--lines', type=int, default=100_000)
+    p.add_argument('--duration', type=float, default=5.0, help='time limit per mode in seconds')
+    p = sub.add_parser('parser', help='lines/s of the per-line parser vs the batch parser')
+    p.add_argument('--lines', type=int, default=100_000)
+    p.add_argument('--batch', type=int, default=300)
+    p = sub.add_parser('protocol', help='text vs binary frames vs ADC blocks: bytes/sample and decode rate')
+    p.add_argument('--samples', type=int, default=100_000)
+    p.add_argument('--baud', type=int, default=115200)
+    p = sub.add_parser('handoff', help='reader thread → plot handoff, per-sample queue vs batch queue')
+    p.add_argument('--samples', type=int, default=200_000)
+    p.add_argument('--batch', type=int, default=100)
+    p = sub.add_parser('console', help='console output cost per frame, print per sample vs the logger thread')
+    p.add_argument('--samples', type=int, default=20_000)
+    p.add_argument('--batch', type=int, default=10)
+    p = sub.add_parser('recorder', help='headless recorder throughput and CPU from a paced pty')
+    p.add_argument('--rate', type=int, default=20_000, help='lines/s written to the pty')
+    p.add_argument('--duration', type=float, default=5.0)
+    p = sub.add_parser('multi', help='CPU of the multi-device pool as boards are added')
+    p.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8])
+    p.add_argument('--rate', type=int, default=1_000, help='lines/s per device')
+    p.add_argument('--duration', type=float, default=5.0)
+    p = sub.add_parser('bus', help='sample bus publish cost and reader lag as reader processes attach')
+    p.add_argument('--readers', type=int, nargs='+', default=[0, 1, 4, 8])
+    p.add_argument('--rate', type=int, default=20_000, help='samples/s published')
+    p.add_argument('--duration', type=float, default=3.0)
+    p = sub.add_parser('buffer', help='per-frame buffer cost as MAX_POINTS grows')
+    p.add_argument('--sizes', type=int, nargs='+', default=[200, 1_000, 10_000, 100_000])
+    p = sub.add_parser('render', help='frame time with and without blitting')
+    p.add_argument('--profile', default='smooth')
+    p.add_argument('--frames', type=int, default=100)
+    p.add_argument('--max-points', type=int, default=2_000)
+    p.add_argument('--decimate', choices=DECIMATION_MODES + ('all',), default='minmax')
+    p = sub.add_parser('filters', help='moving mean/median/Savitzky-Golay scaling')
+    p.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    p.add_argument('--window', type=int, default=15)
+    p = sub.add_parser('smoothing', help='per-sample smoothing cost, legacy vs filter bank')
+    p.add_argument('--samples', type=int, default=100_000)
+    p.add_argument('--batch', type=int, default=300)
+    p = sub.add_parser('interpolation', help='per-frame cubic interpolation, interp1d rebuild vs incremental')
+    p.add_argument('--frames', type=int, default=200)
+    p.add_argument('--window', type=int, default=150)
+    p.add_argument('--batch', type=int, default=3)
+    p.add_argument('--points', type=int, default=10, help='points per sample interval')
+    p = sub.add_parser('spectrum', help='per-frame spectrum cost, full Welch recompute vs incremental')
+    p.add_argument('--rates', type=int, nargs='+', default=[1_000, 20_000, 100_000], help='samples/s')
+    p.add_argument('--frames', type=int, default=100)
+    p.add_argument('--max-points', type=int, default=60_000)
+    p = sub.add_parser('suite', help='every profile against the emulator: ingest, frame time, latency, memory (JSON)')
+    p.add_argument('--profiles', nargs='+', help='default: all profiles')
+    p.add_argument('--duration', type=float, default=3.0, help='seconds of the ingest run per profile')
+    p.add_argument('--frames', type=int, default=200)
+    p.add_argument('--memory-frames', type=int, default=50, help='frames drawn with tracemalloc on')
+    p.add_argument('--rate', type=int, default=1_000, help='emulator samples/s while drawing')
+    p.add_argument('--format', default='csv+timestamp', choices=FORMATS, help='emulated firmware format')
+    p.add_argument('--out', help=f'JSON file (default: {SUITE_DIR}/suite-<time>.json)')
+    p = sub.add_parser('compare', help='change between two suite JSON files; fails on a regression')
+    p.add_argument('old')
+    p.add_argument('new')
+    p.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='percent worse that counts')
+    args = parser.parse_args(argv)
+
+    ok = True
+    if args.bench == 'reader':
+        modes = READER_MODES if args.mode == 'all' else (args.mode,)
+        for mode in modes:
+            result = bench_reader(mode, args.lines, args.duration)
+            print(f"📊 {mode:5s}: {result['lines']:7d} lines in {result['seconds']:.2f}s "
+                  f"= {result['lines_per_sec']:10.1f} lines/s")
+            if mode == 'batch':
+                passed = result['lines_per_sec'] >= TARGET_LINES_PER_SEC
+                ok = ok and passed
+                print(f"{'✅' if passed else '❌'} batch target: {TARGET_LINES_PER_SEC} lines/s")
+    elif args.bench == 'parser':
+        for name, row in bench_parser(args.lines, args.batch).items():
+            print(f"📊 {name:9s}: legacy {row['legacy']:10.0f} | parse_data {row['parse_data']:10.0f} | "
+                  f"batch {row['batch']:10.0f} lines/s ({row['malformed']} malformed)")
+    elif args.bench == 'protocol':
+        for name, row in bench_protocol(args.samples, baud_rate=args.baud).items():
+            print(f"📊 {name:6s}: {row['bytes_per_sample']:5.1f} bytes/sample | "
+                  f"link {row['link_samples_per_sec']:7.0f} samples/s at {args.baud} baud | "
+                  f"decode {row['decode_samples_per_sec']:10.0f} samples/s")
+    elif args.bench == 'handoff':
+        result = bench_handoff(args.samples, args.batch)
+        print(f"📊 queue.Queue: {result['queue']:12.0f} samples/s | BatchQueue: {result['batch']:12.0f} samples/s")
+    elif args.bench == 'console':
+        result = bench_console(args.samples, args.batch)
+        print(f"📊 print per sample: {result['print']:7.3f} ms/frame | logger summary: {result['summary']:7.3f} ms/frame | "
+              f"logger sample_time: {result['sample_time']:7.3f} ms/frame ({args.batch} samples/frame)")
+    elif args.bench == 'recorder':
+        result = bench_recorder(args.rate, args.duration)
+        print(f"📊 recorder: {result['samples']} samples = {result['samples_per_sec']:8.0f} samples/s | "
+              f"CPU {result['cpu_percent']:5.1f}% | {result['bytes_per_sample']} bytes/sample on disk")
+    elif args.bench == 'multi':
+        for row in bench_multi(args.devices, args.rate, args.duration):
+            print(f"📊 {row['devices']:2d} devices: {row['samples_per_sec']:8.0f} samples/s | "
+                  f"CPU {row['cpu_percent']:5.1f}% | max lag {row['max_lag_seconds']:.2f}s")
+    elif args.bench == 'bus':
+        for row in bench_bus(args.readers, args.rate, args.duration):
+            print(f"📊 {row['readers']:2d} readers: publish {row['publish_us_per_batch']:7.1f} µs/batch | "
+                  f"publisher CPU {row['publisher_cpu_percent']:5.1f}% | "
+                  f"{row['samples_per_reader']} samples/reader | lost {row['lost']} | "
+                  f"max lag {row['max_lag_ms']:.1f} ms")
+    elif args.bench == 'buffer':
+        for size in args.sizes:
+            result = bench_buffer(size)
+            print(f"📊 MAX_POINTS={size:7d}: deque {result['deque_ms']:9.4f} ms/frame | "
+                  f"ring {result['ring_ms']:7.4f} ms/frame")
+    elif args.bench == 'render':
+        decimations = DECIMATION_MODES if args.decimate == 'all' else (args.decimate,)
+        for decimation in decimations:
+            for blit in (False, True):
+                result = bench_render(args.profile, blit, args.max_points, args.frames, decimation=decimation)
+                print(f"📊 {'blit' if blit else 'full':4s} | decimate={decimation:6s}: "
+                      f"{result['frame_ms']:8.3f} ms/frame "
+                      f"({result['full_redraws']} full redraws in {args.frames} frames)")
+    elif args.bench == 'filters':
+        for row in bench_filters(args.sizes, args.window):
+            legacy = f"{row['legacy_mean_s']:9.4f}s" if 'legacy_mean_s' in row else '        -'
+            per_sample = row['mean_s'] / row['samples'] * 1e9
+            print(f"📊 n={row['samples']:8d}: legacy {legacy} | mean {row['mean_s']:.4f}s "
+                  f"({per_sample:.1f} ns/sample) | median {row['median_s']:.4f}s | "
+                  f"savgol {row['savgol_s']:.4f}s | stream {row['stream_mean_s']:.4f}s")
+    elif args.bench == 'smoothing':
+        for name, ns in bench_smoothing(args.samples, args.batch).items():
+            print(f"📊 {name:14s}: {ns:8.1f} ns/sample (3 channels)")
+    elif args.bench == 'interpolation':
+        result = bench_interpolation(args.frames, args.window, args.batch, args.points)
+        print(f"📊 interp1d rebuild: {result['legacy_ms']:8.3f} ms/frame | "
+              f"incremental: {result['incremental_ms']:8.3f} ms/frame")
+    elif args.bench == 'spectrum':
+        for rate in args.rates:
+            result = bench_spectrum(rate, args.frames, max_points=args.max_points)
+            print(f"📊 {rate:7d} samples/s: full Welch {result['full_ms']:8.3f} ms/frame | "
+                  f"incremental {result['incremental_ms']:7.3f} ms/frame "
+                  f"({result['skipped']} segments skipped, peak {result['peak_hz']:.0f} Hz)")
+    elif args.bench == 'suite':
+        report = bench_suite(args.profiles, args.duration, args.frames, args.rate, args.format,
+                             memory_frames=args.memory_frames)
+        for profile, row in report['results'].items():
+            latency = (f"{row['latency_ms_p50']:6.1f}/{row['latency_ms_p99']:6.1f} ms"
+                       if row['latency_ms_p50'] is not None else '     -')
+            print(f"📊 {profile:8s}: ingest {row['ingest_lines_per_sec']:9.0f} lines/s | "
+                  f"frame {row['frame_ms_p50']:6.2f}/{row['frame_ms_p99']:6.2f} ms | latency {latency} | "
+                  f"heap +{row['memory_growth_kb']:.0f} kB")
+        if report['peak_rss_mb'] is not None:
+            print(f"🧠 Peak RSS: {report['peak_rss_mb']:.0f} MB")
+        out = args.out or os.path.join(SUITE_DIR, time.strftime('suite-%Y%m%d-%H%M%S.json'))
+        if os.path.dirname(out):
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved {out}")
+    elif args.bench == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        if old.get('host') != new.get('host'):
+            print("⚠️  Different hosts: only compare runs from the same machine")
+        for profile, metric, before, after, change, regressed in compare_suites(old, new, args.threshold):
+            print(f"{'⚠️ ' if regressed else '  '} {profile:8s} {metric:22s} {before:12.3f} → {after:12.3f} "
+                  f"({change:+6.1f}%)")
+            ok = ok and not regressed
+        print(f"{'✅ No regressions' if ok else '❌ Regressions'} (threshold {args.threshold:.0f}%)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Sample buffer
+เก็บข้อมูลล่าสุด MAX_POINTS จุดสำหรับการพล็อต
+"""
+
+from collections import deque
+
+import numpy as np
+
+from .parser import Sample
+
+# Column layout of SampleBuffer
+SAMPLE_COLUMNS = {
+    'time': np.float64,
+    'adc': np.int16,
+    'voltage': np.float64,
+    'light': np.float64,
+    'status': np.int8,
+}
+
+
+class RingBuffer:
+    """Fixed-capacity columnar ring buffer backed by NumPy arrays
+
+    Each column is stored twice back to back (`2 * capacity` slots) and
+    every write goes to both copies, so the newest `len(self)` values are
+    always one contiguous slice. `column()` hands out that slice as a
+    view without copying, which is what `Line2D.set_data` wants.
+    """
+
+    def __init__(self, capacity, columns):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in columns.items()}
+        self._start = 0  # index of the oldest value
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def columns(self):
+        return tuple(self._data)
+
+    def column(self, name):
+        """Contiguous view of a column, oldest value first"""
+        return self._data[name][self._start:self._start + self._size]
+
+    def append(self, **values):
+        """Add one row (amortized O(1))"""
+        pos = (self._start + self._size) % self.capacity
+        for name, arr in self._data.items():
+            arr[pos] = arr[pos + self.capacity] = values[name]
+        self._advance(1)
+
+    def extend(self, **columns):
+        """Add a batch of rows given as equal-length arrays, one per column"""
+        count = len(next(iter(columns.values())))
+        if count == 0:
+            return
+        skip = max(0, count - self.capacity)  # only the newest `capacity` rows survive
+        pos = (self._start + self._size + skip) % self.capacity
+        for name, arr in self._data.items():
+            self._write(arr, pos, np.asarray(columns[name])[skip:])
+        self._advance(count)
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def _write(self, arr, pos, values):
+        cap = self.capacity
+        first = min(len(values), cap - pos)
+        arr[pos:pos + first] = values[:first]
+        arr[pos + cap:pos + cap + first] = values[:first]
+        rest = len(values) - first
+        if rest:
+            arr[:rest] = values[first:]
+            arr[cap:cap + rest] = values[first:]
+
+    def _advance(self, count):
+        overflow = self._size + count - self.capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self.capacity
+            self._size = self.capacity
+        else:
+            self._size += count
+
+
+class RollingExtrema:
+    """Min and max of the last `window` values, amortized O(1) per value
+
+    Keeps two monotonic deques of (index, value). A batch is first reduced
+    with a vectorized suffix max/min so only the values that can ever be
+    the extreme of a later window reach the Python-level deques.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._count = 0
+        self._min = deque()
+        self._max = deque()
+
+    @property
+    def minimum(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self):
+        return self._max[0][1] if self._max else None
+
+    def append(self, value):
+        """Add one value"""
+        index = self._count
+        self._count += 1
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        self._expire()
+
+    def extend(self, values):
+        """Add a batch of values"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self._count += len(values)
+        values = values[-self.window:]
+        first = self._count - len(values)
+        self._push(self._max, values, first, largest=True)
+        self._push(self._min, values, first, largest=False)
+        self._expire()
+
+    def clear(self):
+        self._count = 0
+        self._min.clear()
+        self._max.clear()
+
+    def _push(self, dq, values, first, largest):
+        # keep values[i] only if it beats everything after it in the batch
+        accumulate = np.maximum.accumulate if largest else np.minimum.accumulate
+        later = np.empty_like(values)
+        later[:-1] = accumulate(values[::-1])[::-1][1:]
+        later[-1] = -np.inf if largest else np.inf
+        keep = np.flatnonzero(values > later if largest else values < later)
+        head = values[keep[0]]  # extreme of the whole batch
+        if largest:
+            while dq and dq[-1][1] <= head:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= head:
+                dq.pop()
+        dq.extend(zip((keep + first).tolist(), values[keep].tolist()))
+
+    def _expire(self):
+        oldest = self._count - self.window
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+
+
+class SampleBuffer:
+    """Fixed-length history of time, ADC, voltage, light and status"""
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.ring = RingBuffer(max_points, SAMPLE_COLUMNS)
+        # Rolling min/max of the plotted channels for Y auto-scaling
+        self.extrema = {name: RollingExtrema(max_points) for name in ('adc', 'voltage', 'light')}
+        self._time_rel = np.empty(max_points, dtype=np.float64)
+        # Times of the last sample before each connection gap (lines are broken there)
+        self._gaps = deque()
+        self.appended = 0  # samples added so far, so readers can pick out the new ones (spectrum)
+
+    def __len__(self):
+        return len(self.ring)
+
+    @property
+    def time(self):
+        return self.ring.column('time')
+
+    @property
+    def adc(self):
+        return self.ring.column('adc')
+
+    @property
+    def voltage(self):
+        return self.ring.column('voltage')
+
+    @property
+    def light(self):
+        return self.ring.column('light')
+
+    @property
+    def status(self):
+        return self.ring.column('status')
+
+    def append(self, timestamp, sample):
+        """Add one parsed sample"""
+        self.ring.append(time=timestamp, adc=sample.adc, voltage=sample.voltage,
+                         light=sample.light, status=sample.status)
+        self.appended += 1
+        self.extrema['adc'].append(sample.adc)
+        self.extrema['voltage'].append(sample.voltage)
+        self.extrema['light'].append(sample.light)
+
+    def extend(self, timestamps, samples):
+        """Add a batch of parsed samples (a list of `Sample` or an (n, 4) array)"""
+        if len(samples) == 0:
+            return
+        values = np.asarray(samples, dtype=np.float64)
+        self.ring.extend(time=timestamps, adc=values[:, 0], voltage=values[:, 1],
+                         light=values[:, 2], status=values[:, 3])
+        self.appended += len(values)
+        self.extrema['adc'].extend(values[:, 0])
+        self.extrema['voltage'].extend(values[:, 1])
+        self.extrema['light'].extend(values[:, 2])
+
+    def mark_gap(self, timestamp):
+        """Break the lines after the sample at `timestamp` (e.g. a reconnect)"""
+        self._gaps.append(timestamp)
+
+    def gaps(self):
+        """Gap times inside the buffered window, oldest first"""
+        if len(self) and self._gaps:
+            oldest = self.time[0]
+            while self._gaps and self._gaps[0] < oldest:
+                self._gaps.popleft()
+        return np.fromiter(self._gaps, dtype=np.float64, count=len(self._gaps))
+
+    def value_range(self, name):
+        """(min, max) of a channel over the buffered window in O(1)"""
+        extrema = self.extrema[name]
+        return extrema.minimum, extrema.maximum
+
+    def latest(self):
+        """Most recent sample"""
+        return Sample(int(self.adc[-1]), float(self.voltage[-1]), float(self.light[-1]), int(self.status[-1]))
+
+    def time_relative(self):
+        """Times in seconds since the oldest sample in the buffer
+
+        Written into a preallocated scratch array; the result is only
+        valid until the next call.
+        """
+        times = self.time
+        out = self._time_rel[:len(times)]
+        np.subtract(times, times[0], out=out)
+        return out
+
+    def series(self):
+        """(adc, voltage, light) as views, in plotting order"""
+        return self.adc, self.voltage, self.light
@@ -0,0 +1,499 @@
+"""
+Sample bus
+daemon ตัวเดียวเปิด serial port แล้ว publish sample ลง shared memory ring
+ให้ plotter, recorder หรือโปรแกรมแจ้งเตือนหลายตัวบนเครื่องเดียวกันอ่านพร้อมกันได้
+
+    python3 -m ldr_telemetry.bus --port /dev/ttyUSB0
+    python3 -m ldr_telemetry --bus ldr
+    python3 -m ldr_telemetry.recorder --bus ldr --out recordings/lab1
+    python3 -m ldr_telemetry.bus --info
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import serial
+
+from .config import SERIAL_PORT, BAUD_RATE, PROFILES, get_profile
+from .connection import BACKOFF_INITIAL, BACKOFF_MAX, ConnectionManager
+from .handoff import OVERFLOW_POLICIES
+from .metrics import prometheus_text
+from .protocol import PROTOCOLS
+from .reader import SerialReader
+
+BUS_NAME = 'ldr'
+BUS_MAGIC = 0x4C445242  # 'LDRB'
+BUS_VERSION = 1
+BUS_CAPACITY = 1 << 20  # samples in the ring (~9 minutes at 2000 samples/s, 19 MB)
+GAP_SLOTS = 64  # reconnect gap times kept for late readers
+BUS_TIMEOUT = 2.0  # seconds without a heartbeat before readers treat the daemon as gone
+PUBLISH_INTERVAL = 0.005  # daemon: seconds between moves from the reader thread to the ring
+POLL_INTERVAL = 0.005  # readers: seconds between looks at the ring when nothing is new
+STATUS_INTERVAL = 10.0  # daemon: seconds between status lines
+
+# Ring columns, same dtypes as a recording; `time` is host time.monotonic(), which every
+# process on the machine shares, so readers can measure lag against their own clock
+BUS_COLUMNS = {
+    'time': '<f8',
+    'adc': '<i2',
+    'voltage': '<f4',
+    'light': '<f4',
+    'status': '<i1',
+}
+
+# int64 slots at the start of the segment
+HEADER_FIELDS = ('magic', 'version', 'capacity', 'claimed', 'written', 'gaps', 'heartbeat_ns', 'started_ns',
+                 'pid', 'closed')
+HEADER_BYTES = 128
+ALIGN = 64
+
+_created = set()  # segments this process created (and its resource tracker owns)
+
+
+def _layout(capacity):
+    """Byte offsets of the gap ring and of each column, and the total segment size"""
+    offset = HEADER_BYTES
+    gaps = offset
+    offset += GAP_SLOTS * 8
+    columns = {}
+    for name, dtype in BUS_COLUMNS.items():
+        columns[name] = offset
+        offset += -(-capacity * np.dtype(dtype).itemsize // ALIGN) * ALIGN
+    return gaps, columns, offset
+
+
+def _read_header(shm):
+    """{field: value} of a segment's header, without keeping a view on it"""
+    if shm.size < HEADER_BYTES:
+        return dict.fromkeys(HEADER_FIELDS, 0)
+    header = np.frombuffer(shm.buf, dtype=np.int64, count=len(HEADER_FIELDS)).tolist()
+    return dict(zip(HEADER_FIELDS, header))
+
+
+def _attach(name):
+    """Open an existing segment without handing it to this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        # Before 3.13 every attach is tracked, and the tracker would unlink
+        # the daemon's segment as soon as this reader exits
+        if os.name == 'posix' and shm.name not in _created:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _unlink(name):
+    """Remove a segment left behind by a daemon that didn't exit cleanly"""
+    shm = shared_memory.SharedMemory(name)  # tracked, and unlink() untracks it again
+    shm.close()
+    shm.unlink()
+
+
+class _Segment:
+    """numpy views (header, gap ring, columns) over a shared memory segment"""
+
+    def __init__(self, shm, capacity):
+        self.shm = shm
+        self.name = shm.name
+        self.capacity = capacity
+        gaps, columns, _ = _layout(capacity)
+        self._header = np.ndarray(len(HEADER_FIELDS), dtype=np.int64, buffer=shm.buf)
+        self._gaps = np.ndarray(GAP_SLOTS, dtype=np.float64, buffer=shm.buf, offset=gaps)
+        self.columns = {name: np.ndarray(capacity, dtype=dtype, buffer=shm.buf, offset=columns[name])
+                        for name, dtype in BUS_COLUMNS.items()}
+
+    def _get(self, field):
+        return int(self._header[HEADER_FIELDS.index(field)])
+
+    def _set(self, field, value):
+        self._header[HEADER_FIELDS.index(field)] = value
+
+    @property
+    def written(self):
+        """Samples published since the bus was created"""
+        return self._get('written')
+
+    @property
+    def heartbeat_age(self):
+        return (time.monotonic_ns() - self._get('heartbeat_ns')) * 1e-9
+
+    @property
+    def alive(self):
+        """The daemon is still publishing (or at least still running)"""
+        return not self._get('closed') and self.heartbeat_age < BUS_TIMEOUT
+
+    def close(self):
+        """Unmap the segment (views handed out by `columns` must be gone by then)"""
+        self._header = self._gaps = None
+        self.columns = {}
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes away with the process
+
+
+class SampleBus(_Segment):
+    """Single-writer ring of samples in shared memory
+
+    The daemon calls `publish(times, block)` (same signature as
+    `Recorder.write`, so it can be a Plotter sink) and `mark_gap(time)`.
+    Each column is a ring of `capacity` rows; the `written` counter in
+    the header says how many samples were ever published, so sample `n`
+    lives in row `n % capacity`. A publish first raises `claimed`, then
+    writes the rows, then raises `written`: readers use the pair to tell
+    rows they may have copied while they were being overwritten.
+
+    Readers never write to the segment, so the publish cost is the same
+    for no readers or for fifty.
+    """
+
+    def __init__(self, shm, capacity):
+        super().__init__(shm, capacity)
+        self.samples = 0
+
+    @classmethod
+    def create(cls, name=BUS_NAME, capacity=BUS_CAPACITY):
+        """New segment called `name`; a stale one left by a crashed daemon is replaced"""
+        size = _layout(capacity)[2]
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            old = _attach(name)
+            header = _read_header(old)
+            alive = (header['magic'] == BUS_MAGIC and not header['closed']
+                     and (time.monotonic_ns() - header['heartbeat_ns']) * 1e-9 < BUS_TIMEOUT)
+            old.close()
+            if alive:
+                raise FileExistsError(f"Sample bus '{name}' is already published by another daemon")
+            _unlink(name)
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        _created.add(shm.name)
+        bus = cls(shm, capacity)
+        bus._header[:] = 0
+        bus._gaps[:] = np.nan
+        bus._set('magic', BUS_MAGIC)
+        bus._set('version', BUS_VERSION)
+        bus._set('capacity', capacity)
+        bus._set('started_ns', time.time_ns())
+        bus._set('pid', os.getpid())
+        bus.beat()
+        return bus
+
+    def beat(self):
+        """Tell readers the daemon is alive (also done by every publish)"""
+        self._set('heartbeat_ns', time.monotonic_ns())
+
+    def publish(self, times, block):
+        """Append a batch (host monotonic times, (n, 4+) parsed values)"""
+        count = len(block)
+        if count == 0:
+            return
+        start = self.written
+        skip = max(0, count - self.capacity)  # only the newest `capacity` rows survive anyway
+        self._set('claimed', start + count)
+        pos = (start + skip) % self.capacity
+        first = min(count - skip, self.capacity - pos)
+        values = (times, block[:, 0], block[:, 1], block[:, 2], block[:, 3])
+        for column, data in zip(self.columns.values(), values):
+            data = data[skip:]
+            column[pos:pos + first] = data[:first]
+            column[:len(data) - first] = data[first:]
+        self._set('written', start + count)
+        self.samples += count
+        self.beat()
+
+    def mark_gap(self, timestamp):
+        """Readers break their lines after the sample at `timestamp` (a reconnect)"""
+        gaps = self._get('gaps')
+        self._gaps[gaps % GAP_SLOTS] = timestamp
+        self._set('gaps', gaps + 1)
+
+    def close(self, unlink=True):
+        """Tell readers the daemon is gone and remove the segment"""
+        if self._header is not None:
+            self._set('closed', 1)
+        super().close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            _created.discard(self.shm.name)
+
+
+class BusSubscriber(_Segment):
+    """Read-only view of a SampleBus with its own cursor
+
+    `read()` returns the samples published since the previous call as
+    (times, (n, 5) block, gap times), in the Plotter's column order, with
+    the device time column left NaN (times are already on the host
+    clock). A reader that falls more than `capacity` samples behind loses
+    the oldest ones: they are counted in `lost` and reported as a gap.
+    `columns` are zero-copy views of the ring itself, e.g. for a check of
+    the newest value without reading everything.
+
+    `backfill` starts the cursor that many samples in the past, so a
+    viewer opens with the recent history already on screen.
+    """
+
+    def __init__(self, name=BUS_NAME, backfill=0):
+        shm = _attach(name)
+        header = _read_header(shm)
+        if header['magic'] != BUS_MAGIC or header['version'] != BUS_VERSION:
+            shm.close()
+            raise ValueError(f"'{name}' is not an ldr_telemetry sample bus (version {BUS_VERSION})")
+        super().__init__(shm, header['capacity'])
+        for column in self.columns.values():
+            column.flags.writeable = False
+        self.started_ns = self._get('started_ns')
+        self.pid = self._get('pid')
+        self.cursor = max(0, self.written - min(backfill, self.capacity))
+        self.gap_cursor = max(0, self._get('gaps') - GAP_SLOTS)
+        self.lost = 0
+        self.samples = 0
+        self._last_time = None
+
+    @property
+    def backlog(self):
+        """Samples published but not read yet"""
+        return self.written - self.cursor
+
+    def read(self, limit=None):
+        """(times, block, gaps) published since the last call (at most `limit` samples)"""
+        written = self.written
+        start = max(self.cursor, written - self.capacity)
+        end = written if limit is None else min(written, start + limit)
+        times, block = self._copy(start, end)
+        # Rows older than claimed - capacity may have been overwritten while we copied them
+        valid = self._get('claimed') - self.capacity
+        if start < valid:
+            cut = min(valid, end) - start
+            times, block = times[cut:], block[cut:]
+            start += cut
+        lost = start - self.cursor
+        gaps = []
+        if lost:
+            self.lost += lost
+            if self._last_time is not None:
+                gaps.append(self._last_time)
+        self.cursor = end
+        self.samples += len(times)
+        if len(times):
+            self._last_time = times[-1]
+        published = self._get('gaps')
+        for index in range(max(self.gap_cursor, published - GAP_SLOTS), published):
+            gaps.append(float(self._gaps[index % GAP_SLOTS]))
+        self.gap_cursor = published
+        return times, block, gaps
+
+    def _copy(self, start, end):
+        count = max(0, end - start)
+        pos = start % self.capacity
+        first = min(count, self.capacity - pos)
+        times = np.empty(count)
+        block = np.full((count, 5), np.nan)
+        outputs = (times, block[:, 0], block[:, 1], block[:, 2], block[:, 3])
+        for column, out in zip(self.columns.values(), outputs):
+            out[:first] = column[pos:pos + first]
+            out[first:] = column[:count - first]
+        return times, block
+
+
+class BusReader:
+    """Takes the place of a `SerialReader` for a Plotter fed from a SampleBus
+
+    `run()` hands `(times, block, gaps)` batches to the Plotter's
+    `_on_line` from the usual background thread. When the daemon stops
+    or restarts, the reader attaches to the new bus as soon as it
+    appears (with the same backoff as a serial reconnect) and reports
+    the break through `on_reconnect`.
+    """
+
+    mode = 'batch'
+    binary = False
+    decoder = None
+    connection = None
+
+    def __init__(self, name=BUS_NAME, backfill=0):
+        self.name = name
+        self.backfill = backfill
+        self.subscriber = BusSubscriber(name, backfill)
+        self.bytes_read = 0  # bytes copied out of the ring
+        self.read_errors = 0
+        self.reattached = 0
+        self.received_ns = 0
+        self.metrics = None
+
+    @property
+    def lost(self):
+        """Samples this reader fell too far behind to get"""
+        return self.subscriber.lost
+
+    def run(self, on_line, stop_event, poll_interval=POLL_INTERVAL, on_reconnect=None):
+        """Read batches until `stop_event` is set (for a background thread)"""
+        row_bytes = sum(np.dtype(dtype).itemsize for dtype in BUS_COLUMNS.values())
+        while not stop_event.is_set():
+            start = time.perf_counter()
+            times, block, gaps = self.subscriber.read()
+            if len(times) or gaps:
+                self.received_ns = time.monotonic_ns()
+                self.bytes_read += len(times) * row_bytes
+                if self.metrics is not None:
+                    self.metrics.observe('read', time.perf_counter() - start)
+                on_line((times, block, gaps), self.received_ns)
+                continue
+            if not self.subscriber.alive and self._reattach(stop_event):
+                if on_reconnect is not None:
+                    on_reconnect()
+                continue
+            stop_event.wait(poll_interval)
+
+    def _reattach(self, stop_event):
+        """Wait for a daemon to publish `name` again; True once attached to the new bus"""
+        print(f"🔌 Sample bus '{self.name}' stopped, waiting for the daemon...")
+        started = self.subscriber.started_ns
+        delay = BACKOFF_INITIAL
+        while not stop_event.wait(delay):
+            try:
+                subscriber = BusSubscriber(self.name)
+            except (FileNotFoundError, ValueError):
+                subscriber = None
+            if subscriber is not None:
+                if subscriber.started_ns != started and subscriber.alive:
+                    subscriber.cursor = max(0, subscriber.written - subscriber.capacity)
+                    subscriber.lost = self.subscriber.lost
+                    self.subscriber.close()
+                    self.subscriber = subscriber
+                    self.reattached += 1
+                    print(f"✅ Sample bus '{self.name}' is back (daemon pid {subscriber.pid})")
+                    return True
+                subscriber.close()
+            if self.subscriber.alive:
+                return False  # only a slow heartbeat
+            delay = min(delay * 2, BACKOFF_MAX)
+        return False
+
+    def close(self):
+        self.subscriber.close()
+
+
+def bus_info(name=BUS_NAME):
+    """One status line for the bus called `name` (None if there is none)"""
+    try:
+        bus = BusSubscriber(name)
+    except (FileNotFoundError, ValueError):
+        return None
+    written = bus.written
+    time.sleep(1.0)
+    rate = bus.written - written
+    state = 'alive' if bus.alive else 'stale'
+    text = (f"'{name}': {state} (pid {bus.pid}) | {bus.written} samples | {rate} samples/s | "
+            f"capacity {bus.capacity} | heartbeat {bus.heartbeat_age * 1e3:.0f} ms ago")
+    bus.close()
+    return text
+
+
+def serve(plotter, bus, duration=None, status_interval=STATUS_INTERVAL):
+    """Publish the reader thread's batches until Ctrl+C or `duration`
+
+    The batches go straight from the handoff queue to the ring: no
+    buffers, filters or extrema are kept in the daemon.
+    """
+    plotter.start()
+    start = last_status = time.monotonic()
+    last_samples = 0
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            time.sleep(PUBLISH_INTERVAL)
+            _publish(plotter, bus)
+            bus.beat()
+            now = time.monotonic()
+            if now - last_status >= status_interval:
+                rate = (bus.samples - last_samples) / (now - last_status)
+                print(f"📡 {bus.samples} samples | {rate:8.0f} samples/s | lag {plotter.stats.lag_seconds:.3f}s | "
+                      f"overflow {plotter.stats.overflow} | dropped {plotter.stats.dropped}")
+                last_status, last_samples = now, bus.samples
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping...")
+    finally:
+        plotter.stop()
+        _publish(plotter, bus)
+
+
+def _publish(plotter, bus):
+    gaps, times, block = plotter.take()
+    for gap in gaps:
+        bus.mark_gap(gap)
+    bus.publish(times, block)
+
+
+def main(argv=None, profile='full', port=SERIAL_PORT, baud_rate=BAUD_RATE):
+    parser = argparse.ArgumentParser(description='ESP32 LDR acquisition daemon (shared memory sample bus)')
+    parser.add_argument('--port', default=port, help='serial port or pyserial URL (e.g. loop://)')
+    parser.add_argument('--baud', type=int, default=baud_rate, help='baud rate')
+    parser.add_argument('--profile', default=profile, choices=sorted(PROFILES), help='parser settings to use')
+    parser.add_argument('--protocol', choices=PROTOCOLS, help='text, binary, block or auto (default: the profile\'s)')
+    parser.add_argument('--name', default=BUS_NAME, help='shared memory name the readers attach to')
+    parser.add_argument('--capacity', type=int, default=BUS_CAPACITY, help='samples kept in the ring')
+    parser.add_argument('--queue-size', dest='queue_capacity', type=int,
+                        help='max samples waiting between the serial reader and the ring')
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, default='drop-oldest',
+                        help='what to do when publishing falls behind the reader')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics of the acquisition')
+    parser.add_argument('--info', action='store_true', help='show the state of the bus and exit')
+    args = parser.parse_args(argv)
+
+    if args.info:
+        text = bus_info(args.name)
+        print(f"📡 {text}" if text else f"❌ No sample bus '{args.name}'")
+        return 0 if text else 1
+
+    # Same reader, parser and clock mapping as the plotter, without matplotlib
+    from .app import Plotter, start_metrics_server
+
+    config = get_profile(args.profile).with_overrides(threaded=True, reader_mode='batch', protocol=args.protocol,
+                                                      queue_capacity=args.queue_capacity, overflow=args.overflow,
+                                                      frame_budget=0, console='none')
+    connection = ConnectionManager(args.port, args.baud, timeout=config.serial_timeout)
+    try:
+        ser = connection.open()
+        print(f"✅ Connected to {args.port} at {args.baud} baud")
+    except (serial.SerialException, OSError, ValueError) as e:
+        print(f"❌ Error connecting to serial port: {e}")
+        return 1
+    try:
+        bus = SampleBus.create(args.name, args.capacity)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot create the sample bus: {e}")
+        ser.close()
+        return 1
+
+    reader = server = None
+    try:
+        reader = SerialReader(ser, config.reader_mode, config.protocol, connection=connection)
+        plotter = Plotter(config, reader)
+        server = start_metrics_server(args.metrics_port, lambda: prometheus_text({None: plotter}))
+        print(f"📡 Publishing to sample bus '{args.name}' ({args.capacity} samples) — "
+              f"attach with: python3 -m ldr_telemetry --bus {args.name} (Ctrl+C to stop)")
+        serve(plotter, bus, args.duration)
+    finally:
+        bus.close()
+        # The reader holds the current port (a reconnect may have replaced `ser`)
+        (reader or ser).close()
+        if server is not None:
+            server.close()
+    print(f"📈 Samples: {bus.samples} | Malformed lines: {plotter.parser.malformed} | "
+          f"Overflow: {plotter.data_queue.dropped} | Dropped: {plotter.stats.dropped} | "
+          f"Reconnects: {len(connection.outages)} ({connection.downtime:.1f}s down)")
+    print("👋 Goodbye!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Clock alignment
+แปลงเวลาของบอร์ด (esp_timer, µs) เป็นเวลาของเครื่อง host (time.monotonic)
+"""
+
+from collections import deque
+
+import numpy as np
+
+DEVICE_WRAP = 2 ** 32  # timestamp_us ถูกส่งเป็น uint32 (วนรอบทุก ~71 นาที)
+MIN_DRIFT_BUCKETS = 10  # bucket ที่ต้องมีก่อนเริ่มประมาณ drift
+
+
+class ClockSync:
+    """Device time → host time mapping with offset and drift
+
+    Every sample gives `host_receive - device_time = offset + latency`,
+    where the latency (USB, OS, reader thread) is always positive. The
+    smallest difference within each `bucket` seconds of device time is
+    the best estimate of the offset at that moment; a line fitted over
+    the last `window` buckets gives the offset and the crystal drift.
+    Bursts and stalls only add latency, so they don't move the mapping.
+    """
+
+    def __init__(self, bucket=1.0, window=120):
+        self.bucket = bucket
+        self._minima = deque(maxlen=window)  # (device_s, offset_s) per bucket
+        self._bucket_start = None
+        self._bucket_min = None
+        self._last_raw = None
+        self._wraps = 0
+        self.offset = None  # host - device at `origin`
+        self.drift = 0.0  # seconds per second (ppm * 1e-6)
+        self.origin = 0.0
+        self.restarts = 0
+
+    def unwrap(self, device_us):
+        """Device timestamps (µs, uint32) as continuous seconds
+
+        A backwards step that isn't a wrap-around means the board
+        restarted: the estimate starts over and the samples before the
+        restart get NaN (the caller falls back to the receive time).
+        """
+        raw = np.asarray(device_us, dtype=np.float64)
+        step = np.diff(raw, prepend=raw[0] if self._last_raw is None else self._last_raw)
+        wraps = step < -DEVICE_WRAP / 2
+        backwards = (step < 0) & ~wraps
+        if backwards.any():
+            restart = np.flatnonzero(backwards)[-1]
+            self.reset()
+            self.restarts += 1
+            return np.concatenate((np.full(restart, np.nan), self.unwrap(raw[restart:])))
+        count = self._wraps + np.cumsum(wraps)
+        self._wraps = int(count[-1])
+        self._last_raw = float(raw[-1])
+        return (raw + count * DEVICE_WRAP) * 1e-6
+
+    def update(self, device_s, host_s):
+        """Feed matching device (unwrapped seconds) and host receive times"""
+        valid = ~np.isnan(device_s)
+        device_s = device_s[valid]
+        offsets = host_s[valid] - device_s
+        if not len(device_s):
+            return
+        if self._bucket_start is None:
+            self._bucket_start = device_s[0]
+        while True:
+            end = self._bucket_start + self.bucket
+            inside = np.searchsorted(device_s, end)
+            self._add_to_bucket(device_s[:inside], offsets[:inside])
+            if inside == len(device_s):
+                break
+            self._close_bucket()
+            self._bucket_start = end + (device_s[inside] - end) // self.bucket * self.bucket
+            device_s = device_s[inside:]
+            offsets = offsets[inside:]
+        if not self._minima:
+            # Nothing closed yet: use the best sample so far
+            self.origin, self.offset = self._bucket_min
+
+    def _add_to_bucket(self, device_s, offsets):
+        if not len(offsets):
+            return
+        best = np.argmin(offsets)
+        if self._bucket_min is None or offsets[best] < self._bucket_min[1]:
+            self._bucket_min = (float(device_s[best]), float(offsets[best]))
+
+    def _close_bucket(self):
+        if self._bucket_min is None:
+            return
+        self._minima.append(self._bucket_min)
+        self._bucket_min = None
+        points = np.array(self._minima)
+        self.origin = float(points[-1, 0])
+        if len(points) >= MIN_DRIFT_BUCKETS:
+            drift, offset = np.polyfit(points[:, 0] - self.origin, points[:, 1], 1)
+            self.drift, self.offset = float(drift), float(offset)
+        else:
+            self.drift, self.offset = 0.0, float(points[:, 1].min())
+
+    def to_host(self, device_s):
+        """Host (monotonic) seconds for unwrapped device seconds"""
+        return device_s + self.offset + self.drift * (device_s - self.origin)
+
+    def reset(self):
+        self._minima.clear()
+        self._bucket_start = None
+        self._bucket_min = None
+        self._last_raw = None
+        self._wraps = 0
+        self.offset = None
+        self.drift = 0.0
+        self.origin = 0.0
@@ -0,0 +1,133 @@
+"""
+Plotter configuration
+ค่าตั้งต้นและโปรไฟล์ของ plotter แต่ละแบบ
+"""
+
+from dataclasses import dataclass, replace
+from typing import Optional
+
+# Configuration
+SERIAL_PORT = '/dev/cu.usbserial-0001'  # Change to your port
+BAUD_RATE = 115200
+
+# ช่วงค่าของแต่ละ channel (ตรงกับ firmware)
+ADC_RANGE = (0, 4095)
+VOLTAGE_RANGE = (0, 3.3)
+LIGHT_RANGE = (0, 100)
+
+
+@dataclass(frozen=True)
+class PlotterConfig:
+    """Settings for one plotter profile"""
+    title: str = 'ESP32 LDR Sensor - Real-Time Monitor'
+    max_points: int = 200  # Number of points to display
+    update_interval: int = 50  # Update interval in milliseconds
+    window_seconds: float = 30  # Visible time window
+    x_padding: float = 2  # Space to the right of the newest sample
+    y_margin: Optional[float] = 0.1  # Auto-scale margin (None = fixed Y axis)
+    smooth_factor: Optional[float] = None  # EMA factor (None = raw lines only)
+    smooth_filters: tuple = ('ema', 'ema', 'ema')  # Filter for adc, voltage, light
+    kalman_process_variance: float = 0.01
+    kalman_measurement_variance: float = 0.1
+    median_window: int = 5  # Window of the mean, median and savgol filters
+    biquad_cutoff: float = 1.0  # Hz
+    sample_rate: float = 10.0  # Hz, SerialPlotter.c sends every 100 ms
+    interpolation_points: int = 0  # Catmull-Rom points per sample interval (<= 1 = off: 1 point is just the samples)
+    threaded: bool = False  # Read serial in a background thread
+    reader_mode: str = 'batch'  # 'batch' (drain in_waiting) or 'line' (readline per line)
+    protocol: str = 'auto'  # 'text', 'binary', 'block' or 'auto' (detect SerialPlotter.c binary frames / blocks)
+    device_clock: bool = True  # Map firmware timestamps to host time (receive time if none are sent)
+    frame_budget: int = 2000  # Max samples ingested per frame (0 = no limit)
+    queue_capacity: int = 10000  # Samples held between the serial thread and the plot (~10 s of binary at 115200)
+    overflow: str = 'drop-oldest'  # 'drop-oldest', 'drop-newest' or 'block' when the queue is full
+    min_fields: int = 3  # Fields required for a valid CSV line
+    show_status: bool = False  # Status text box at the bottom
+    style: Optional[str] = None  # matplotlib style
+    figsize: tuple = (12, 8)
+    title_size: int = 16
+    title_weight: str = 'normal'
+    label_size: int = 12
+    subtitle_size: int = 14
+    subtitle_weight: str = 'normal'
+    legend_size: Optional[int] = None
+    raw_width: float = 2
+    raw_alpha: float = 0.8
+    smooth_width: float = 3
+    decimation: str = 'minmax'  # 'minmax', 'lttb' or 'none' before set_data
+    decimation_points: Optional[int] = None  # Target points per line (None = axis width in pixels)
+    blit: bool = False  # Cache the static background and redraw only lines/status
+    labels: bool = True  # Axis titles, bold labels and legends
+    console: str = 'summary'  # 'summary', 'sample', 'sample_time' or 'none'
+    console_interval: float = 1.0  # seconds between summary lines
+    hud: bool = False  # Per-stage latency, rates and losses drawn on the plot
+    metrics_port: Optional[int] = None  # Serve Prometheus metrics on localhost at this port
+    spectrum: Optional[str] = None  # 'psd' or 'spectrogram' panel of the ADC channel (None = off)
+    spectrum_segment: int = 256  # FFT length in samples
+    spectrum_overlap: float = 0.5  # Fraction of a segment shared with the next one
+    spectrum_averages: int = 8  # Segments averaged in the PSD (Welch)
+    spectrum_max_segments: int = 32  # FFTs per frame at most (older segments are skipped)
+    serial_timeout: float = 0.1
+
+    def with_overrides(self, **changes):
+        """Return a copy with the non-None values replaced"""
+        return replace(self, **{k: v for k, v in changes.items() if v is not None})
+
+
+PROFILES = {
+    # realtime_plot.py
+    'full': PlotterConfig(
+        max_points=200,
+        update_interval=50,
+        threaded=True,
+        min_fields=4,
+        show_status=True,
+        style='seaborn-v0_8',
+        figsize=(14, 10),
+        title_weight='bold',
+    ),
+    # easy_realtime.py
+    'easy': PlotterConfig(
+        title='ESP32 LDR Real-Time Monitor',
+        max_points=200,
+        update_interval=50,
+        smooth_factor=0.3,
+    ),
+    # smooth_realtime.py
+    'smooth': PlotterConfig(
+        title='ESP32 LDR Ultra-Smooth Real-Time Monitor',
+        max_points=150,
+        update_interval=30,
+        window_seconds=25,
+        y_margin=0.15,
+        smooth_factor=0.2,
+        style='seaborn-v0_8',
+        figsize=(14, 10),
+        title_size=18,
+        title_weight='bold',
+        label_size=14,
+        subtitle_size=16,
+        subtitle_weight='bold',
+        legend_size=12,
+        raw_alpha=0.6,
+        smooth_width=4,
+    ),
+    # working_plotter.py ที่สร้างจาก fix_serial.py
+    'working': PlotterConfig(
+        title='ESP32 LDR Real-Time Monitor (Fixed)',
+        max_points=100,
+        update_interval=100,
+        window_seconds=20,
+        x_padding=1,
+        y_margin=None,
+        labels=False,
+        serial_timeout=1,
+    ),
+}
+
+
+def get_profile(name):
+    """Look up a plotter profile by name"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown profile '{name}' (choose from {', '.join(PROFILES)})") from None
@@ -0,0 +1,136 @@
+"""
+Connection supervisor
+เปิด serial port ใหม่อัตโนมัติเมื่อสาย USB หลุดหรือบอร์ด brown-out (exponential backoff)
+และหาบอร์ดเดิมจาก USB identity ถ้าชื่อ port เปลี่ยน
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import serial
+
+from .config import BAUD_RATE
+from .probe import port_key
+from .reader import open_serial
+
+BACKOFF_INITIAL = 0.1  # seconds before the first reconnect attempt
+BACKOFF_MAX = 5.0  # the delay doubles per failed attempt up to this
+
+
+@dataclass
+class Outage:
+    """One disconnect, from the read error to the port being open again"""
+    port: str
+    started: float  # time.monotonic() of the read error
+    duration: float = 0.0  # until the port was open again
+    # From the device reappearing to the port being open (at most; measured
+    # from the last attempt that didn't find it, so it includes the backoff)
+    reconnect_latency: Optional[float] = None
+    attempts: int = 0
+
+
+def _comports():
+    import serial.tools.list_ports
+
+    return serial.tools.list_ports.comports()
+
+
+class ConnectionManager:
+    """Opens the serial port and reopens it after the device goes away
+
+    After `lost(error)` every `try_reconnect()` (or `wait()` in a reader
+    thread) looks for the board, either at the same path or, if the OS
+    gave it a new name, by its VID:PID:serial number, and opens it once
+    it is back. Attempts back off from `backoff` to `max_backoff`
+    seconds. Each disconnect is kept in `outages`.
+    """
+
+    def __init__(self, port, baud_rate=BAUD_RATE, timeout=0.1, backoff=BACKOFF_INITIAL, max_backoff=BACKOFF_MAX):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.key = None  # VID:PID:serial of the board, to find it under a new device name
+        self.outages = []
+        self.outage = None  # the current outage while disconnected
+        self._delay = backoff
+        self._next_attempt = 0.0
+        self._missed = 0.0  # last attempt that didn't find the device
+
+    @property
+    def connected(self):
+        return self.outage is None
+
+    @property
+    def downtime(self):
+        """Seconds spent disconnected so far"""
+        current = time.monotonic() - self.outage.started if self.outage is not None else 0.0
+        return sum(outage.duration for outage in self.outages) + current
+
+    def open(self):
+        """First connection (errors are raised to the caller)"""
+        ser = open_serial(self.port, self.baud_rate, timeout=self.timeout)
+        if self.key is None and '://' not in self.port:
+            self.key = next((port_key(info) for info in _comports() if info.device == self.port), None)
+        return ser
+
+    def lost(self, error):
+        """Start an outage (repeated errors during the same outage are ignored)"""
+        if self.outage is not None:
+            return
+        self.outage = Outage(self.port, time.monotonic())
+        self._delay = self.backoff
+        self._next_attempt = self.outage.started + self._delay
+        self._missed = self.outage.started
+        print(f"🔌 Connection to {self.port} lost ({error}), reconnecting...")
+
+    def try_reconnect(self):
+        """One attempt if the backoff delay has passed; the reopened serial or None"""
+        now = time.monotonic()
+        if self.outage is None or now < self._next_attempt:
+            return None
+        outage = self.outage
+        outage.attempts += 1
+        port = self._find()
+        if port is None:
+            self._missed = now
+        else:
+            try:
+                ser = open_serial(port, self.baud_rate, timeout=self.timeout)
+            except (serial.SerialException, OSError, ValueError):
+                ser = None
+            if ser is not None:
+                opened = time.monotonic()
+                outage.duration = opened - outage.started
+                outage.reconnect_latency = opened - self._missed
+                self.outages.append(outage)
+                self.outage = None
+                self.port = port
+                print(f"✅ Reconnected to {port} after {outage.duration:.1f}s ({outage.attempts} attempts)")
+                return ser
+        self._next_attempt = time.monotonic() + self._delay
+        self._delay = min(self._delay * 2, self.max_backoff)
+        return None
+
+    def wait(self, stop_event):
+        """Retry until connected (the reopened serial) or `stop_event` is set (None)"""
+        while not stop_event.is_set():
+            ser = self.try_reconnect()
+            if ser is not None:
+                return ser
+            stop_event.wait(max(self._next_attempt - time.monotonic(), 0.01))
+        return None
+
+    def _find(self):
+        """Device path of the board right now (None while it is unplugged)"""
+        if '://' in self.port:
+            return self.port  # pyserial URLs: just try again
+        if os.path.exists(self.port):
+            return self.port
+        for info in _comports():
+            if info.device == self.port or (self.key is not None and port_key(info) == self.key):
+                return info.device
+        return None
@@ -0,0 +1,162 @@
+"""
+Console logger
+พิมพ์สรุปข้อมูลลง console จาก thread แยก (ไม่ print ทุก sample ใน loop ของกราฟ)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .parser import Sample, get_status_text
+
+# summary: one aggregated line per interval, sample/sample_time: every sample (buffered)
+CONSOLE_MODES = ('summary', 'sample', 'sample_time', 'none')
+SUMMARY_INTERVAL = 1.0  # seconds between summary lines
+FLUSH_INTERVAL = 0.2  # seconds between writes of buffered per-sample lines
+MAX_PENDING = 100000  # per-sample lines held for a slow terminal before the oldest are skipped
+LOGGER_NICE = 10  # Linux: lower the logger thread's priority below the plot loop
+
+SUMMARY_CHANNELS = (('ADC', '{:.0f}'), ('Voltage', '{:.2f}V'), ('Light', '{:.1f}%'))
+
+
+def format_sample(sample, with_time=False, with_status=False, clock=None):
+    """One console line for a sample (`clock` = Unix time for the timestamp, default now)"""
+    text = (f"ADC: {sample.adc:4d} | Voltage: {sample.voltage:5.2f}V | "
+            f"Light: {sample.light:5.1f}%")
+    if with_status:
+        text += f" | Status: {get_status_text(sample.status)}"
+    if with_time:
+        text = f"🕐 [{time.strftime('%H:%M:%S', time.localtime(clock))}] " + text
+    return text
+
+
+class ConsoleLogger:
+    """Console output on its own low-priority thread
+
+    The plot loop only calls `log(values)`, which folds the batch into
+    running min/max/sum arrays (or, in the per-sample modes, queues it).
+    Every `interval` seconds the thread prints one summary line with the
+    last value, min/max/mean over the interval, samples/s and drops; in
+    'sample' / 'sample_time' mode it formats the queued samples and writes
+    them with a single `write()` every FLUSH_INTERVAL. A terminal that
+    can't keep up then only slows this thread; past MAX_PENDING lines the
+    oldest are skipped and counted in `skipped`.
+    """
+
+    def __init__(self, mode='summary', interval=SUMMARY_INTERVAL, stream=None):
+        if mode not in CONSOLE_MODES:
+            raise ValueError(f"Unknown console mode '{mode}' (choose from {', '.join(CONSOLE_MODES)})")
+        self.mode = mode
+        self.interval = interval
+        self.stream = stream
+        self.dropped = 0  # set by the plotter: samples lost so far (overflow + binary frames / blocks)
+        self.skipped = 0  # per-sample lines not printed because the terminal fell behind
+        self._lock = threading.Lock()
+        self._pending = deque()  # per-sample modes: (Unix time, values) batches
+        self._pending_rows = 0
+        self._reset_interval()
+        self._reported_drops = 0
+        self._reported_skips = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _reset_interval(self):
+        self._count = 0
+        self._low = np.full(3, np.inf)
+        self._high = np.full(3, -np.inf)
+        self._sum = np.zeros(3)
+        self._last = None
+        self._since = time.monotonic()
+
+    def start(self):
+        if self.mode != 'none' and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='console', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the thread after writing whatever is still pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def log(self, values):
+        """Record a batch of samples ((n, 4+) array: adc, voltage, light, status)"""
+        if self.mode == 'none' or len(values) == 0:
+            return
+        with self._lock:
+            if self.mode == 'summary':
+                lines = values[:, :3]
+                np.minimum(self._low, lines.min(axis=0), out=self._low)
+                np.maximum(self._high, lines.max(axis=0), out=self._high)
+                self._sum += lines.sum(axis=0)
+                self._count += len(values)
+                self._last = values[-1, :4].copy()
+            else:
+                self._pending.append((time.time(), values[:, :4].copy()))
+                self._pending_rows += len(values)
+                while self._pending_rows - len(self._pending[0][1]) >= MAX_PENDING:
+                    self._pending_rows -= len(self._pending[0][1])
+                    self.skipped += len(self._pending.popleft()[1])
+
+    def _run(self):
+        if sys.platform.startswith('linux'):
+            try:
+                # niceness of just this thread on Linux
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), LOGGER_NICE)
+            except (AttributeError, OSError):
+                pass
+        period = self.interval if self.mode == 'summary' else FLUSH_INTERVAL
+        while not self._stop.wait(period):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Write the summary (or the queued per-sample lines) now"""
+        if self.mode == 'summary':
+            text = self._summary()
+        else:
+            text = self._samples()
+        if text:
+            stream = self.stream or sys.stdout
+            try:
+                stream.write(text)
+                stream.flush()
+            except (OSError, ValueError):
+                pass  # closed or broken terminal: never take the plot down with it
+
+    def _summary(self):
+        with self._lock:
+            count, low, high, total, last, since = (self._count, self._low, self._high, self._sum,
+                                                    self._last, self._since)
+            self._reset_interval()
+        if not count:
+            return ''
+        elapsed = max(time.monotonic() - since, 1e-9)
+        mean = total / count
+        parts = [f"{name} {fmt.format(last[i])} ({fmt.format(low[i])}..{fmt.format(high[i])}, "
+                 f"avg {fmt.format(mean[i])})" for i, (name, fmt) in enumerate(SUMMARY_CHANNELS)]
+        drops = self.dropped - self._reported_drops
+        self._reported_drops = self.dropped
+        return (f"📊 [{time.strftime('%H:%M:%S')}] {' | '.join(parts)} | Status: {get_status_text(int(last[3]))} | "
+                f"{count / elapsed:.1f} samples/s | dropped {drops}\n")
+
+    def _samples(self):
+        with self._lock:
+            batches = list(self._pending)
+            self._pending.clear()
+            self._pending_rows = 0
+        with_time = self.mode == 'sample_time'
+        lines = []
+        if self.skipped != self._reported_skips:
+            lines.append(f"⏭️  {self.skipped - self._reported_skips} lines skipped (console too slow)")
+            self._reported_skips = self.skipped
+        for clock, values in batches:
+            for adc, voltage, light, status in values:
+                lines.append(format_sample(Sample(int(adc), voltage, light, int(status)), with_time, clock=clock))
+        return '\n'.join(lines) + '\n' if lines else ''
@@ -0,0 +1,74 @@
+"""
+Decimation
+ลดจำนวนจุดก่อนส่งให้ matplotlib ให้เหลือประมาณความกว้างของแกนเป็น pixel
+โดยยังเห็น spike อยู่
+"""
+
+import numpy as np
+
+DECIMATION_MODES = ('none', 'minmax', 'lttb')
+
+
+def minmax_decimate(x, y, buckets):
+    """Keep the min and max of each of `buckets` equal index ranges, in time order
+
+    Bucket edges come from linspace, so every sample falls in a bucket and
+    the result never has more than 2 * buckets + 2 points. Returns (x, y)
+    unchanged when there are no more than two points per bucket.
+    """
+    n = len(y)
+    if buckets < 1 or n <= 2 * buckets:
+        return x, y
+    y = np.asarray(y)
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    # (buckets, longest) index matrix; shorter buckets repeat their last sample
+    width = int(np.diff(edges).max())
+    index = np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)
+    rows = np.arange(buckets)
+    values = y[index]
+    pairs = np.stack([index[rows, values.argmin(axis=1)], index[rows, values.argmax(axis=1)]], axis=1)
+    pairs.sort(axis=1)  # draw min/max in the order they happened
+    index = np.concatenate([[0], pairs.ravel(), [n - 1]])
+    return x[index], y[index]
+
+
+def lttb_decimate(x, y, points):
+    """Largest-Triangle-Three-Buckets down to about `points` points
+
+    Vectorized variant: the left vertex of each triangle is the previous
+    bucket's mean rather than the previously selected point, so every
+    bucket is evaluated at once instead of in a Python loop.
+    """
+    n = len(y)
+    if points < 3 or n <= points:
+        return x, y
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inner = n - 2
+    size = -(-inner // (points - 2))  # ceil
+    rows = -(-inner // size)
+    pad = rows * size - inner
+    bx = np.concatenate([x[1:-1], np.full(pad, np.nan)]).reshape(rows, size)
+    by = np.concatenate([y[1:-1], np.full(pad, np.nan)]).reshape(rows, size)
+
+    mean_x = np.nanmean(bx, axis=1)
+    mean_y = np.nanmean(by, axis=1)
+    ax = np.concatenate([[x[0]], mean_x[:-1]])[:, None]
+    ay = np.concatenate([[y[0]], mean_y[:-1]])[:, None]
+    cx = np.concatenate([mean_x[1:], [x[-1]]])[:, None]
+    cy = np.concatenate([mean_y[1:], [y[-1]]])[:, None]
+
+    area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+    area[np.isnan(area)] = -1.0
+    index = area.argmax(axis=1) + np.arange(rows) * size + 1
+    index = np.concatenate([[0], index, [n - 1]])
+    return x[index], y[index]
+
+
+def decimate(x, y, mode, pixels):
+    """Reduce (x, y) for an axis `pixels` wide using `mode` from DECIMATION_MODES"""
+    if mode == 'minmax':
+        return minmax_decimate(x, y, int(pixels))
+    if mode == 'lttb':
+        return lttb_decimate(x, y, int(pixels))
+    return x, y
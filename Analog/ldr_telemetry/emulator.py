@@ -0,0 +1,352 @@
+"""
+ESP32 emulator
+จำลองบอร์ดผ่าน pseudo-terminal: ส่งข้อมูลแบบเดียวกับ SerialPlotter.c / LDR.c (หรือ binary frame / ADC block)
+พร้อมสัญญาณ LDR ที่สมจริง, noise, byte ขยะ และการถอดสาย เพื่อรัน plotter/benchmark โดยไม่ต้องมีบอร์ด
+
+    python3 -m ldr_telemetry.emulator --format csv+status --rate 1000 --link /tmp/ttyESP32
+    python3 -m ldr_telemetry --port /tmp/ttyESP32
+
+(Linux / macOS เท่านั้น เพราะใช้ pty)
+"""
+
+import argparse
+import multiprocessing
+import os
+import select
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+import numpy as np
+
+from .config import ADC_RANGE, BAUD_RATE
+from .parser import LIGHT_THRESHOLDS
+from .probe import FORMATS
+from .protocol import BLOCK_SAMPLES, encode_blocks, encode_frames
+
+SLICE = 0.01  # seconds of samples generated and written at a time
+MAX_CATCH_UP = 0.1  # seconds of samples sent at once after falling behind (e.g. the reader stalled)
+BITS_PER_BYTE = 10  # UART 8N1: start + 8 data + stop
+
+# What SerialPlotter.c prints after a reset (ROM bootloader + ESP_LOGI lines)
+BOOT_LOG = (b"ets Jun  8 2016 00:22:57\r\n\r\n"
+            b"rst:0x1 (POWERON_RESET),boot:0x13 (SPI_FAST_FLASH_BOOT)\r\n"
+            b"load:0x3fff0030,len:7104\r\nentry 0x400805f0\r\n"
+            b"I (312) LDR_PLOTTER: === LDR Serial Plotter Mode ===\n"
+            b"I (322) LDR_PLOTTER: LDR Serial Plotter Ready\n"
+            b"I (322) LDR_PLOTTER: Format: ADC,Voltage,LightLevel,Status\n"
+            b"I (332) LDR_PLOTTER: =========================================\n")
+
+# LDR signal model
+DAYLIGHT_LEVEL = 2400  # ADC counts around which the ambient light drifts
+DAYLIGHT_SWING = 1200
+DAYLIGHT_PERIOD = 120.0  # seconds (a compressed day)
+SHADOW_INTERVAL = 4.0  # mean seconds between shadows passing over the sensor
+SHADOW_DEPTH = (600, 1800)  # ADC counts a shadow takes away
+SHADOW_LENGTH = (0.3, 2.0)  # seconds
+LDR_RESPONSE = 0.05  # seconds for the LDR to follow a step (edges are ramped over this)
+FLICKER_HZ = 100.0  # mains light flicker
+FLICKER_DEPTH = 25.0  # ADC counts
+
+
+class LdrSignal:
+    """Realistic LDR readings: daylight drift, passing shadows, mains flicker and noise
+
+    `next(count)` continues where the previous call stopped, so a stream
+    built from many small calls is the same as one big call.
+    """
+
+    def __init__(self, rate, noise=8.0, seed=None):
+        self.rate = rate
+        self.noise = noise
+        # Separate streams, so how the samples are split into calls doesn't change the noise
+        shadow_seed, noise_seed = np.random.SeedSequence(seed).spawn(2)
+        self._shadow_rng = np.random.default_rng(shadow_seed)
+        self._noise_rng = np.random.default_rng(noise_seed)
+        self._index = 0
+        self._shadows = []  # (start, end, depth) in seconds
+        self._next_shadow = self._shadow_rng.exponential(SHADOW_INTERVAL)
+
+    def next(self, count):
+        t = (self._index + np.arange(count)) / self.rate
+        self._index += count
+        end = t[-1] if count else 0.0
+        while self._next_shadow <= end + LDR_RESPONSE:
+            length = self._shadow_rng.uniform(*SHADOW_LENGTH)
+            depth = self._shadow_rng.uniform(*SHADOW_DEPTH)
+            self._shadows.append((self._next_shadow, self._next_shadow + length, depth))
+            self._next_shadow += length + self._shadow_rng.exponential(SHADOW_INTERVAL)
+
+        level = DAYLIGHT_LEVEL + DAYLIGHT_SWING * np.sin(2 * np.pi * t / DAYLIGHT_PERIOD)
+        for start, stop, depth in self._shadows:
+            # 0 → 1 over LDR_RESPONSE at each edge (the cell's light-dependent time constant)
+            into = np.clip((t - start) / LDR_RESPONSE, 0, 1)
+            out = np.clip((t - stop) / LDR_RESPONSE, 0, 1)
+            level -= depth * (into - out)
+        self._shadows = [shadow for shadow in self._shadows if shadow[1] + LDR_RESPONSE > end]
+        level += FLICKER_DEPTH * np.sin(2 * np.pi * FLICKER_HZ * t)
+        if self.noise:
+            level += self._noise_rng.normal(0, self.noise, count)
+        return np.clip(np.rint(level), *ADC_RANGE).astype(np.int16)
+
+
+def encode(fmt, adc, timestamp_us, seq=0, sample_rate=1000):
+    """Bytes the firmware would send for these readings (`fmt` is one of FORMATS)
+
+    `seq` counts frames for 'binary' and blocks for 'block'.
+    """
+    if fmt == 'binary':
+        return encode_frames(adc, seq, timestamp_us)
+    if fmt == 'block':
+        return encode_blocks(adc, seq, int(timestamp_us[0]), sample_rate)
+    voltage = (adc.astype(np.int64) * 3300 // 4095) / 1000.0  # integer mV like the uncalibrated firmware
+    light = adc / 4095.0 * 100.0
+    if fmt == 'keyvalue':
+        lines = [f"ADC:{a},Voltage:{v:.2f},LightLevel:{l:.1f}\n" for a, v, l in zip(adc.tolist(), voltage, light)]
+    elif fmt == 'csv':
+        lines = [f"{a},{v:.2f},{l:.1f}\n" for a, v, l in zip(adc.tolist(), voltage, light)]
+    else:
+        status = np.searchsorted(LIGHT_THRESHOLDS, light, side='right').tolist()
+        if fmt == 'csv+timestamp':
+            lines = [f"{a},{v:.2f},{l:.1f},{s},{ts}\n"
+                     for a, v, l, s, ts in zip(adc.tolist(), voltage, light, status, timestamp_us.tolist())]
+        else:
+            lines = [f"{a},{v:.2f},{l:.1f},{s}\n" for a, v, l, s in zip(adc.tolist(), voltage, light, status)]
+    return ''.join(lines).encode()
+
+
+class Emulator:
+    """A fake ESP32 on a pseudo-terminal
+
+    Clients open `port` like a real board. Samples are sent at `rate`
+    per second, or as fast as the UART at `baud` allows when `rate` is
+    None (line saturation); with neither, as fast as the reader takes
+    them. `garbage` is the chance per sample of a burst of random bytes
+    (resync and malformed-line paths). With `disconnect_every` the board
+    is "unplugged" for `disconnect_for` seconds: the pty goes away and a
+    new one appears under the same `port` (a symlink), then the board
+    boots again with its counters reset.
+
+    `start()` runs the writer in a thread, or in a forked process with
+    `process=True` so it doesn't compete with the client for the GIL
+    (the counters then stay in the child).
+    """
+
+    def __init__(self, fmt='csv+status', rate=10.0, baud=None, noise=8.0, garbage=0.0, disconnect_every=None,
+                 disconnect_for=1.0, link=None, boot_log=True, seed=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}' (choose from {', '.join(FORMATS)})")
+        if rate is None and baud is None:
+            rate = float('inf')
+        elif rate is None:
+            sample_size = len(encode(fmt, np.array([2048], dtype=np.int16), np.array([4294967295])))
+            rate = baud / BITS_PER_BYTE / sample_size
+        self.format = fmt
+        self.rate = rate
+        self.baud = baud
+        self.garbage = garbage
+        self.disconnect_every = disconnect_every
+        self.disconnect_for = disconnect_for
+        self.boot_log = boot_log
+        self.signal = LdrSignal(rate if np.isfinite(rate) else 1000.0, noise, seed)
+        self._rng = np.random.default_rng(None if seed is None else seed + 1)
+        if link is None and disconnect_every is not None:
+            link = os.path.join(tempfile.mkdtemp(prefix='ldr-emulator-'), 'ttyESP32')
+        self.link = link
+        self.samples = 0
+        self.bytes_sent = 0
+        self.garbage_bytes = 0
+        self.disconnects = 0
+        self._master = self._slave = None
+        self._stop = None
+        self._worker = None
+        self._open_pty()
+
+    @property
+    def port(self):
+        return self.link or self._path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_pty(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # keep the slave open so bytes wait for the client instead of being lost
+        self._path = os.ttyname(self._slave)
+        if self.link is not None:
+            if os.path.lexists(self.link):
+                os.unlink(self.link)
+            os.symlink(self._path, self.link)
+        self._booted = time.monotonic()
+        self._seq = 0
+        self._pending_boot = self.boot_log
+
+    def _close_pty(self):
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def start(self, process=False):
+        if process:
+            context = multiprocessing.get_context('fork')
+            self._stop = context.Event()
+            self._worker = context.Process(target=self.run, args=(self._stop,), daemon=True)
+            self._worker.start()
+            self._close_pty()  # the child owns the pty now; the client must see it close with the child
+        else:
+            self._stop = threading.Event()
+            self._worker = threading.Thread(target=self.run, args=(self._stop,), name='emulator', daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        if self._worker is not None:
+            self._stop.set()
+            self._worker.join(timeout=2)
+            self._worker = None
+
+    def close(self):
+        self.stop()
+        self._close_pty()
+        if self.link is not None and os.path.lexists(self.link):
+            os.unlink(self.link)
+
+    def run(self, stop_event):
+        """Stream until `stop_event` is set"""
+        unlimited = not np.isfinite(self.rate)
+        burst = 1000 if unlimited else max(1, int(self.rate * SLICE))
+        if self.format == 'block':
+            burst = max(burst, BLOCK_SAMPLES)
+        start = time.monotonic()
+        next_disconnect = start + self.disconnect_every if self.disconnect_every else None
+        sent = 0  # samples sent since `start`, for pacing
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if next_disconnect is not None and now >= next_disconnect:
+                self._unplug(stop_event)
+                start, sent = time.monotonic(), 0
+                next_disconnect = start + self.disconnect_every
+                continue
+            if self._pending_boot:
+                self._write(BOOT_LOG, stop_event)
+                self._pending_boot = False
+            if unlimited:
+                count = burst
+            else:
+                due = int((now - start) * self.rate) - sent
+                if due <= 0:
+                    stop_event.wait(SLICE)
+                    continue
+                count = min(due, max(burst, int(self.rate * MAX_CATCH_UP)))
+                if due > count:
+                    sent += due - count  # too far behind: skip ahead like a blocked printf would
+            if self.format == 'block':
+                count -= count % BLOCK_SAMPLES  # the firmware only sends whole blocks
+                if not count:
+                    stop_event.wait(SLICE)
+                    continue
+            if not self._write(self._payload(count), stop_event):
+                continue
+            sent += count
+            self.samples += count
+
+    def _payload(self, count):
+        adc = self.signal.next(count)
+        # The newest sample was taken just now, the others one sample period apart before it
+        timestamp_us = ((time.monotonic_ns() // 1000 - int(self._booted * 1e6)
+                         - (count - 1 - np.arange(count)) * (1e6 / self.signal.rate)).astype(np.int64)) & 0xFFFFFFFF
+        rate = round(self.signal.rate)
+        payload = encode(self.format, adc, timestamp_us, self._seq, rate)
+        self._seq = (self._seq + (-(-count // BLOCK_SAMPLES) if self.format == 'block' else count)) & 0xFFFF
+        if self.garbage:
+            bursts = self._rng.binomial(count, min(self.garbage, 1.0))
+            if bursts:
+                chunks = [payload]
+                for _ in range(bursts):
+                    junk = self._rng.integers(0, 256, self._rng.integers(1, 33), dtype=np.uint8).tobytes()
+                    chunks.append(junk + (b'\n' if self.format not in ('binary', 'block') else b''))
+                    self.garbage_bytes += len(chunks[-1])
+                payload = b''.join(chunks)
+        return payload
+
+    def _write(self, payload, stop_event):
+        """Write everything (paced to `baud` if set); False if the pty went away"""
+        view = memoryview(payload)
+        offset = 0
+        started = time.monotonic()
+        while offset < len(view) and not stop_event.is_set():
+            try:
+                _, writable, _ = select.select([], [self._master], [], 0.05)
+                if writable:
+                    offset += os.write(self._master, view[offset:offset + 4096])
+            except OSError:
+                return False
+            if self.baud:
+                delay = started + offset * BITS_PER_BYTE / self.baud - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        self.bytes_sent += offset
+        return offset == len(view)
+
+    def _unplug(self, stop_event):
+        self.disconnects += 1
+        self._close_pty()
+        if self.link is not None and os.path.lexists(self.link):
+            os.unlink(self.link)
+        stop_event.wait(self.disconnect_for)
+        if not stop_event.is_set():
+            self._open_pty()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ESP32 LDR board emulator on a pseudo-terminal')
+    parser.add_argument('--format', default='csv+status', choices=FORMATS,
+                        help='what the firmware sends (SerialPlotter.c / LDR.c / binary frames / continuous ADC blocks)')
+    parser.add_argument('--rate', type=float, default=10.0,
+                        help="samples/s (SerialPlotter.c: 10); 0 = as fast as --baud allows")
+    parser.add_argument('--baud', type=int, help=f'pace bytes like a UART at this baud rate (e.g. {BAUD_RATE})')
+    parser.add_argument('--noise', type=float, default=8.0, help='ADC noise (standard deviation in counts)')
+    parser.add_argument('--garbage', type=float, default=0.0, help='chance per sample of a burst of random bytes')
+    parser.add_argument('--disconnect-every', type=float, help='unplug the board every this many seconds')
+    parser.add_argument('--disconnect-for', type=float, default=1.0, help='seconds the board stays unplugged')
+    parser.add_argument('--link', help='stable path for the port (symlink to the pty, survives disconnects)')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--seed', type=int, help='random seed for a reproducible signal')
+    args = parser.parse_args(argv)
+
+    rate = args.rate or None
+    if rate is None and args.baud is None:
+        args.baud = BAUD_RATE
+    try:
+        emulator = Emulator(args.format, rate, args.baud, args.noise, args.garbage, args.disconnect_every,
+                            args.disconnect_for, args.link, seed=args.seed)
+    except OSError as e:
+        print(f"❌ Cannot create the pseudo-terminal: {e}")
+        return 1
+    speed = 'unlimited' if not np.isfinite(emulator.rate) else f"{emulator.rate:.0f} samples/s"
+    print(f"🔌 Emulating an ESP32 ({args.format}, {speed}) on {emulator.port}")
+    print(f"   python3 -m ldr_telemetry --port {emulator.port}")
+    start = time.monotonic()
+    with emulator:
+        emulator.start()
+        try:
+            while args.duration is None or time.monotonic() - start < args.duration:
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("\n⏹️  Stopping...")
+    print(f"📈 Samples: {emulator.samples} | Bytes: {emulator.bytes_sent} | Garbage bytes: {emulator.garbage_bytes} | "
+          f"Disconnects: {emulator.disconnects}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
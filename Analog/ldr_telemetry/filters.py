@@ -0,0 +1,498 @@
+"""
+Smoothing filters
+ฟังก์ชันกรองสัญญาณสำหรับเส้น Smooth
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+try:
+    from scipy import signal
+    from scipy.interpolate import interp1d
+except ImportError:  # scipy is optional; filters fall back to pure NumPy/Python
+    signal = None
+    interp1d = None
+
+from .buffer import RingBuffer
+
+
+def smooth_data(raw_data, smooth_data, factor):
+    """Apply exponential smoothing to data"""
+    if len(smooth_data) == 0:
+        smooth_data.append(raw_data)
+    else:
+        # Exponential smoothing: new_value = factor * raw + (1-factor) * previous
+        smoothed = factor * raw_data + (1 - factor) * smooth_data[-1]
+        smooth_data.append(smoothed)
+    return smooth_data
+
+
+def apply_kalman_filter(data, smooth_data, process_variance=0.01, measurement_variance=0.1):
+    """Legacy per-sample "Kalman" step, kept as the baseline for `bench smoothing`
+
+    The error variance is not carried between calls, so the gain is fixed
+    at process / (process + measurement) and this is really an EMA. Use
+    `KalmanFilter` (or `--filter kalman`) for the actual filter.
+    """
+    if len(smooth_data) == 0:
+        smooth_data.append(data)
+        return smooth_data
+
+    predicted = smooth_data[-1]
+    kalman_gain = process_variance / (process_variance + measurement_variance)
+    smooth_data.append(predicted + kalman_gain * (data - predicted))
+    return smooth_data
+
+
+WINDOW_KINDS = ('mean', 'median', 'savgol')
+SMOOTH_CHANNELS = ('adc', 'voltage', 'light')
+
+
+def moving_average(values, window=5):
+    """Trailing moving average in O(n) via a cumulative sum
+
+    The first `window - 1` outputs average over the samples seen so far.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return (csum[end] - csum[start]) / (end - start)
+
+
+def moving_median(values, window=5):
+    """Trailing moving median (first `window - 1` outputs use the samples seen so far)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    head = min(window - 1, len(values))
+    for i in range(head):
+        out[i] = np.median(values[:i + 1])
+    if len(values) >= window:
+        out[head:] = np.median(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+    return out
+
+
+def savgol_coefficients(window, polyorder=2):
+    """Weights that evaluate a least-squares polynomial fit at the newest point of a window"""
+    if polyorder >= window:
+        raise ValueError("polyorder must be less than window")
+    positions = np.arange(-window + 1, 1, dtype=np.float64)
+    vandermonde = np.vander(positions, polyorder + 1, increasing=True)
+    return np.linalg.pinv(vandermonde)[0]
+
+
+def savgol_trailing(values, window=7, polyorder=2):
+    """Causal Savitzky-Golay smoothing (first `window - 1` samples pass through)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = values.copy()
+    if len(values) >= window:
+        # np.convolve flips the kernel, so pass the weights newest-first
+        out[window - 1:] = np.convolve(values, savgol_coefficients(window, polyorder)[::-1], mode='valid')
+    return out
+
+
+def window_filter(values, window=5, kind='mean', polyorder=2):
+    """Batch trailing-window filter: 'mean', 'median' or 'savgol'"""
+    if kind == 'mean':
+        return moving_average(values, window)
+    if kind == 'median':
+        return moving_median(values, window)
+    if kind == 'savgol':
+        return savgol_trailing(values, window, polyorder)
+    raise ValueError(f"Unknown window filter '{kind}' (choose from {', '.join(WINDOW_KINDS)})")
+
+
+def apply_moving_average(data, window_size=5):
+    """Apply moving average smoothing (O(n), returns a NumPy array)"""
+    return moving_average(data, window_size)
+
+
+class WindowFilter:
+    """Streaming trailing-window filter that carries its history between calls
+
+    `update()` takes one sample (O(1) for 'mean' thanks to a running sum);
+    `process()` takes a whole batch and runs the vectorized batch path over
+    the previous `window - 1` samples plus the new ones, so the output is
+    the same whichever way the samples arrive.
+    """
+
+    RESUM_INTERVAL = 1 << 16  # recompute the running sum now and then to cancel rounding drift
+
+    def __init__(self, window=5, kind='mean', polyorder=2):
+        if kind not in WINDOW_KINDS:
+            raise ValueError(f"Unknown window filter '{kind}' (choose from {', '.join(WINDOW_KINDS)})")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.kind = kind
+        self.polyorder = polyorder
+        self._history = deque(maxlen=window)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, value):
+        """Filter one sample"""
+        value = float(value)
+        if self.kind != 'mean':
+            return float(self.process([value])[0])
+        if len(self._history) == self.window:
+            self._sum -= self._history[0]
+        self._history.append(value)
+        self._sum += value
+        self._updates += 1
+        if self._updates % self.RESUM_INTERVAL == 0:
+            self._sum = math.fsum(self._history)
+        return self._sum / len(self._history)
+
+    def process(self, values):
+        """Filter a batch of samples"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return values
+        # only the newest window - 1 samples can share a window with new ones
+        history = list(self._history)
+        history = np.array(history[len(history) - self.window + 1:] if len(history) == self.window else history,
+                           dtype=np.float64)
+        joined = np.concatenate([history, values])
+        if self.kind == 'median' and len(history) == self.window - 1:
+            # warmed up: every new sample has a full window, skip the partial-window head
+            out = np.median(np.lib.stride_tricks.sliding_window_view(joined, self.window), axis=1)
+        else:
+            out = window_filter(joined, self.window, self.kind, self.polyorder)[len(history):]
+        self._history.extend(values[-self.window:].tolist())
+        if self.kind == 'mean':
+            self._sum = math.fsum(self._history)
+        return out
+
+    def reset(self):
+        self._history.clear()
+        self._sum = 0.0
+
+
+def interpolate_data(x_data, y_data, num_points=5):
+    """Interpolate data for smoother curves (rebuilds the whole curve; see CatmullRomUpsampler)"""
+    if len(x_data) < 2:
+        return x_data, y_data
+
+    # Convert to numpy arrays
+    x = np.array(x_data)
+    y = np.array(y_data)
+
+    # Create more points for smoother curve
+    x_new = np.linspace(x[0], x[-1], len(x) * num_points)
+    if interp1d is None:
+        return x_new, np.interp(x_new, x, y)
+
+    try:
+        # Use cubic interpolation for smooth curves
+        f = interp1d(x, y, kind='cubic', bounds_error=False, fill_value='extrapolate')
+        return x_new, f(x_new)
+    except ValueError:
+        # Fallback to linear interpolation
+        return x_data, y_data
+
+
+def catmull_rom_basis(points):
+    """(points, 4) weights of P0..P3 for t = 0, 1/points, ... on a uniform Catmull-Rom segment"""
+    t = np.arange(points, dtype=np.float64)[:, None] / points
+    powers = np.hstack([np.ones_like(t), t, t ** 2, t ** 3])
+    matrix = 0.5 * np.array([[0, 2, 0, 0],
+                             [-1, 0, 1, 0],
+                             [2, -5, 4, -1],
+                             [-1, 3, -3, 1]], dtype=np.float64)
+    return powers @ matrix
+
+
+class CatmullRomUpsampler:
+    """Incremental Catmull-Rom upsampling into a ring buffer
+
+    A segment between two samples needs one sample on either side, so each
+    new sample completes exactly one segment. Only those segments are
+    evaluated (one matrix product per batch) and appended; earlier points
+    are never recomputed, so the cost follows the number of new samples,
+    not the window size. The curve trails the newest sample by one
+    segment.
+    """
+
+    def __init__(self, points_per_segment, max_points, channels=SMOOTH_CHANNELS):
+        self.points_per_segment = points_per_segment
+        self.channels = tuple(channels)
+        self._basis = catmull_rom_basis(points_per_segment)
+        columns = {'time': np.float64}
+        columns.update((name, np.float64) for name in self.channels)
+        self.ring = RingBuffer(max_points * points_per_segment, columns)
+        self._tail = None  # last three control points
+
+    def __len__(self):
+        return len(self.ring)
+
+    def extend(self, times, values):
+        """Add samples: `times` (n,) and `values` (n, channels)"""
+        points = np.column_stack([np.asarray(times, dtype=np.float64), np.asarray(values, dtype=np.float64)])
+        if len(points) == 0:
+            return
+        if self._tail is None:
+            self._tail = points[:1]  # repeat the first sample as the phantom P0
+        control = np.vstack([self._tail, points])
+        if len(control) >= 4:
+            windows = np.lib.stride_tricks.sliding_window_view(control, 4, axis=0)  # (segments, columns, 4)
+            curve = np.einsum('pk,sck->spc', self._basis, windows).reshape(-1, control.shape[1])
+            self.ring.extend(time=curve[:, 0], **{name: curve[:, i + 1] for i, name in enumerate(self.channels)})
+        self._tail = control[-3:]
+
+    def times(self):
+        return self.ring.column('time')
+
+    def series(self):
+        """Upsampled channels as views, in plotting order"""
+        return tuple(self.ring.column(name) for name in self.channels)
+
+
+FILTER_KINDS = ('ema', 'kalman', 'mean', 'median', 'savgol', 'biquad', 'none')
+
+
+def _lfilter_zi(b, a):
+    """Initial state for a unit step in steady state (same as scipy.signal.lfilter_zi)"""
+    order = len(a) - 1
+    if order == 0:
+        return np.zeros(0)
+    companion = np.zeros((order, order))
+    companion[0] = -a[1:]
+    companion[1:, :-1] = np.eye(order - 1)
+    return np.linalg.solve(np.eye(order) - companion.T, b[1:] - a[1:] * b[0])
+
+
+def _lfilter(b, a, x, zi):
+    """lfilter along axis 0 with state; scipy when available, Python fallback otherwise"""
+    if signal is not None:
+        return signal.lfilter(b, a, x, axis=0, zi=zi)
+    # Direct form II transposed, one sample at a time
+    order = len(a) - 1
+    y = np.empty_like(x)
+    z = np.array(zi, dtype=np.float64)
+    for i in range(len(x)):
+        xi = x[i]
+        yi = b[0] * xi + z[0]
+        for j in range(order - 1):
+            z[j] = b[j + 1] * xi + z[j + 1] - a[j + 1] * yi
+        z[order - 1] = b[order] * xi - a[order] * yi
+        y[i] = yi
+    return y, z
+
+
+class LinearFilter:
+    """IIR filter `lfilter(b, a)` that keeps its `zi` state between batches
+
+    Accepts 1-D batches or 2-D (samples, channels) blocks. The state starts
+    in steady state at the first sample, the same way `smooth_data` seeds
+    itself with the first value, so there is no start-up transient.
+    """
+
+    def __init__(self, b, a):
+        size = max(len(a), len(b), 2)
+        b = np.pad(np.asarray(b, dtype=np.float64), (0, size - len(b)))
+        a = np.pad(np.asarray(a, dtype=np.float64), (0, size - len(a)))
+        self.b = b / a[0]
+        self.a = a / a[0]
+        self._zi = None
+
+    def process(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return values
+        if self._zi is None:
+            self._zi = np.multiply.outer(_lfilter_zi(self.b, self.a), values[0])
+        out, self._zi = _lfilter(self.b, self.a, values, self._zi)
+        return out
+
+    def reset(self):
+        self._zi = None
+
+
+class ExponentialFilter(LinearFilter):
+    """Exponential smoothing: y = factor * x + (1 - factor) * y_prev"""
+
+    def __init__(self, factor):
+        super().__init__([factor], [1.0, factor - 1.0])
+        self.factor = factor
+
+
+class BiquadFilter(LinearFilter):
+    """Second-order low-pass (RBJ cookbook) at `cutoff` Hz for a `sample_rate` Hz stream"""
+
+    def __init__(self, cutoff, sample_rate, q=math.sqrt(0.5)):
+        if not 0 < cutoff < sample_rate / 2:
+            raise ValueError("cutoff must be between 0 and half the sample rate")
+        w0 = 2 * math.pi * cutoff / sample_rate
+        alpha = math.sin(w0) / (2 * q)
+        cos_w0 = math.cos(w0)
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        super().__init__(b, a)
+
+
+class KalmanFilter:
+    """1-D random-walk Kalman filter that keeps its estimate and variance between batches
+
+    With fixed variances the gain sequence does not depend on the data and
+    converges quickly. Until it settles, samples are stepped one at a time.
+    After that the filter is exactly an EMA with the steady-state gain, and
+    the rest of each batch goes through the vectorized `lfilter` path.
+    """
+
+    def __init__(self, process_variance=0.01, measurement_variance=0.1):
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self.variance = measurement_variance
+        self.gain = None
+        self.converged = False
+        self._estimate = None
+
+    def process(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        out = np.empty_like(values)
+        i = 0
+        if len(values) and self._estimate is None:
+            self._estimate = values[0].copy()
+            out[0] = self._estimate
+            i = 1
+        while i < len(values) and not self.converged:
+            predicted_variance = self.variance + self.process_variance
+            gain = predicted_variance / (predicted_variance + self.measurement_variance)
+            self.variance = (1 - gain) * predicted_variance
+            self._estimate = self._estimate + gain * (values[i] - self._estimate)
+            out[i] = self._estimate
+            self.converged = self.gain is not None and abs(gain - self.gain) < 1e-12
+            self.gain = gain
+            i += 1
+        if i < len(values):
+            # steady state: EMA with the converged gain, continuing from the current estimate
+            b = [self.gain, 0.0]
+            a = [1.0, self.gain - 1.0]
+            zi = ((1 - self.gain) * np.asarray(self._estimate))[None, ...]
+            out[i:], _ = _lfilter(b, a, values[i:], zi)
+            self._estimate = out[-1].copy()
+        return out
+
+
+class ChannelWindowFilter:
+    """Trailing mean, median or Savitzky-Golay per channel, built on `WindowFilter`"""
+
+    def __init__(self, window=5, kind='median', polyorder=2):
+        if kind not in WINDOW_KINDS:
+            raise ValueError(f"Unknown window filter '{kind}' (choose from {', '.join(WINDOW_KINDS)})")
+        self.window = window
+        self.kind = kind
+        self.polyorder = polyorder
+        self._filters = None
+
+    def process(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+            squeeze = True
+        else:
+            squeeze = False
+        if self._filters is None:
+            self._filters = [WindowFilter(self.window, self.kind, self.polyorder) for _ in range(values.shape[1])]
+        out = np.column_stack([f.process(values[:, i]) for i, f in enumerate(self._filters)])
+        return out[:, 0] if squeeze else out
+
+
+class PassThrough:
+    """No filtering"""
+
+    def process(self, values):
+        return np.asarray(values, dtype=np.float64)
+
+
+def make_filter(kind, factor=0.3, process_variance=0.01, measurement_variance=0.1,
+                window=5, polyorder=2, cutoff=1.0, sample_rate=10.0):
+    """Build one filter from FILTER_KINDS"""
+    if kind == 'ema':
+        return ExponentialFilter(factor)
+    if kind == 'kalman':
+        return KalmanFilter(process_variance, measurement_variance)
+    if kind in WINDOW_KINDS:
+        return ChannelWindowFilter(window, kind, polyorder)
+    if kind == 'biquad':
+        return BiquadFilter(cutoff, sample_rate)
+    if kind == 'none':
+        return PassThrough()
+    raise ValueError(f"Unknown filter '{kind}' (choose from {', '.join(FILTER_KINDS)})")
+
+
+def parse_filter_spec(spec, channels=SMOOTH_CHANNELS, default='ema'):
+    """'kalman' or 'adc=median,light=biquad' -> one filter kind per channel"""
+    kinds = dict.fromkeys(channels, default)
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, sep, kind = part.partition('=')
+        if not sep:
+            kinds = dict.fromkeys(channels, name)
+            continue
+        if name not in kinds:
+            raise ValueError(f"Unknown channel '{name}' (choose from {', '.join(channels)})")
+        kinds[name] = kind
+    for kind in kinds.values():
+        if kind not in FILTER_KINDS:
+            raise ValueError(f"Unknown filter '{kind}' (choose from {', '.join(FILTER_KINDS)})")
+    return tuple(kinds[name] for name in channels)
+
+
+class FilterBank:
+    """Stateful filters for several channels, one filter kind per channel
+
+    Channels that use the same kind share one filter instance and are
+    processed together as a 2-D block, so a batch costs one vectorized call
+    per distinct kind instead of one Python call per sample per channel.
+    """
+
+    def __init__(self, kinds, **params):
+        self.kinds = tuple(kinds)
+        self._groups = {}
+        for column, kind in enumerate(self.kinds):
+            self._groups.setdefault(kind, []).append(column)
+        self._filters = {kind: make_filter(kind, **params) for kind in self._groups}
+
+    def process(self, block):
+        """Filter a (samples, channels) block; returns an array of the same shape"""
+        block = np.asarray(block, dtype=np.float64)
+        out = np.empty_like(block)
+        if len(block) == 0:
+            return out
+        for kind, columns in self._groups.items():
+            out[:, columns] = self._filters[kind].process(block[:, columns])
+        return out
+
+
+class Smoother:
+    """Filtered copy of the ADC, voltage and light series"""
+
+    CHANNELS = SMOOTH_CHANNELS
+
+    def __init__(self, max_points, factor, kinds=('ema', 'ema', 'ema'), **params):
+        self.factor = factor
+        self.bank = FilterBank(kinds, factor=factor, **params)
+        self.ring = RingBuffer(max_points, {name: np.float64 for name in self.CHANNELS})
+
+    def __len__(self):
+        return len(self.ring)
+
+    def update(self, sample):
+        """Feed one parsed sample"""
+        self.extend([(sample.adc, sample.voltage, sample.light)])
+
+    def extend(self, values):
+        """Feed a (samples, 3) block of adc, voltage, light; returns the filtered block"""
+        out = self.bank.process(values)
+        if len(out):
+            self.ring.extend(**{name: out[:, i] for i, name in enumerate(self.CHANNELS)})
+        return out
+
+    def series(self):
+        """(adc, voltage, light) as views, in plotting order"""
+        return tuple(self.ring.column(name) for name in self.CHANNELS)
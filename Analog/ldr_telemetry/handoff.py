@@ -0,0 +1,135 @@
+"""
+Reader → plot handoff
+ส่ง sample เป็น batch จาก serial thread ไปยัง animate() ผ่าน buffer ขนาดคงที่
+"""
+
+import threading
+
+import numpy as np
+
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+
+class BatchQueue:
+    """Bounded single-producer/single-consumer queue of sample batches
+
+    Samples are copied into preallocated time and value arrays used as a
+    ring, so `put` and `take` move a whole batch under one lock and the
+    memory never grows past `capacity` samples. When a batch doesn't fit:
+
+    - 'drop-oldest' discards the oldest queued samples (the plot stays live)
+    - 'drop-newest' discards the part of the batch that doesn't fit
+    - 'block' waits for the consumer (up to `timeout`, then drops the rest)
+
+    Discarded samples are counted in `dropped`.
+    """
+
+    def __init__(self, capacity, columns=5, policy='drop-oldest'):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}' (choose from {', '.join(OVERFLOW_POLICIES)})")
+        self.capacity = capacity
+        self.policy = policy
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty((capacity, columns), dtype=np.float64)
+        self._start = 0  # index of the oldest queued sample
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self.dropped = 0  # samples discarded by the overflow policy
+        self.batches = 0  # batches put
+        self.samples = 0  # samples put (including dropped ones)
+        self.last_batch = 0
+        self.max_batch = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def depth(self):
+        """Samples waiting for the consumer"""
+        return self._size
+
+    def put(self, times, values, timeout=None):
+        """Queue a batch (producer side); returns how many samples were dropped
+
+        `timeout` only matters for the 'block' policy: None waits as long
+        as needed, 0 never waits.
+        """
+        count = len(values)
+        if count == 0:
+            return 0
+        with self._lock:
+            self.batches += 1
+            self.samples += count
+            self.last_batch = count
+            self.max_batch = max(self.max_batch, count)
+            dropped = 0
+            if self.policy == 'block':
+                offset = 0
+                while offset < count and not self._closed:
+                    free = self.capacity - self._size
+                    if free == 0:
+                        if timeout == 0 or not self._not_full.wait(timeout):
+                            break
+                        continue
+                    chunk = min(free, count - offset)
+                    self._write(times[offset:offset + chunk], values[offset:offset + chunk])
+                    offset += chunk
+                dropped = count - offset
+            elif self.policy == 'drop-newest':
+                keep = min(count, self.capacity - self._size)
+                self._write(times[:keep], values[:keep])
+                dropped = count - keep
+            else:
+                skip = max(0, count - self.capacity)  # only the newest `capacity` samples fit at all
+                overflow = self._size + count - skip - self.capacity
+                if overflow > 0:
+                    self._start = (self._start + overflow) % self.capacity
+                    self._size -= overflow
+                self._write(times[skip:], values[skip:])
+                dropped = skip + max(0, overflow)
+            self.dropped += dropped
+            self.max_depth = max(self.max_depth, self._size)
+            return dropped
+
+    def take(self, limit=None):
+        """Remove up to `limit` of the oldest samples (consumer side) as (times, values) copies"""
+        with self._lock:
+            count = self._size if limit is None else min(self._size, limit)
+            first = min(count, self.capacity - self._start)
+            rest = count - first
+            end = self._start + first
+            if rest:
+                times = np.concatenate((self._times[self._start:end], self._times[:rest]))
+                values = np.concatenate((self._values[self._start:end], self._values[:rest]))
+            else:
+                times = self._times[self._start:end].copy()
+                values = self._values[self._start:end].copy()
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            if count:
+                self._not_full.notify()
+            return times, values
+
+    def close(self):
+        """Wake a blocked producer; with 'block' the rest of its batch is dropped"""
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+
+    def _write(self, times, values):
+        count = len(times)
+        if count == 0:
+            return
+        pos = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - pos)
+        self._times[pos:pos + first] = times[:first]
+        self._values[pos:pos + first] = values[:first]
+        if count > first:
+            self._times[:count - first] = times[first:]
+            self._values[:count - first] = values[first:]
+        self._size += count
@@ -0,0 +1,191 @@
+"""
+Pipeline metrics
+วัดเวลาของแต่ละขั้น (read → decode → parse → filter → buffer → spectrum → render) และ lag จาก sample ถึงจอ
+ส่งออกเป็น Prometheus text ผ่าน HTTP บน localhost และแสดงเป็น HUD บนกราฟ
+
+    python3 -m ldr_telemetry --metrics-port 9108 --hud
+    curl -s localhost:9108/metrics
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGES = ('read', 'decode', 'parse', 'filter', 'buffer', 'spectrum', 'render')
+# Upper bounds in seconds (10 µs .. 5 s); a sample lands in the first bucket >= it
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0)
+RATE_WINDOW = 1.0  # seconds over which samples/s and bytes/s are measured
+HUD_INTERVAL = 0.5  # seconds between HUD text updates
+METRICS_HOST = '127.0.0.1'
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style), O(log buckets) per value
+
+    Written by one thread; a scrape from another thread may see a value
+    counted in `count` but not yet in `sum`, which is fine for monitoring.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot: above every bound (+Inf)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None before the first value)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class Metrics:
+    """Per-stage latency histograms, end-to-end lag and throughput rates of one plotter"""
+
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.lag = Histogram()  # newest sample's age when its frame was drawn
+        self._mark = (time.monotonic(), 0, 0)
+        self._rates = (0.0, 0.0)
+
+    def observe(self, stage, seconds):
+        self.stages[stage].observe(seconds)
+
+    def rates(self, samples, bytes_read):
+        """(samples/s, bytes/s) over the last RATE_WINDOW, given the running totals"""
+        now = time.monotonic()
+        since, last_samples, last_bytes = self._mark
+        if now - since >= RATE_WINDOW:
+            self._rates = ((samples - last_samples) / (now - since), (bytes_read - last_bytes) / (now - since))
+            self._mark = (now, samples, bytes_read)
+        return self._rates
+
+
+def _labels(**labels):
+    pairs = [f'{name}="{value}"' for name, value in labels.items() if value is not None]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=repr(bound))} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def prometheus_text(plotters):
+    """Prometheus text exposition of {device label (or None): Plotter}"""
+    families = {
+        'ldr_stage_seconds': ('histogram', 'Time spent per pipeline stage and call', []),
+        'ldr_sample_to_pixel_seconds': ('histogram', 'Age of the newest sample when its frame was drawn', []),
+        'ldr_samples_total': ('counter', 'Samples moved into the buffers', []),
+        'ldr_bytes_total': ('counter', 'Bytes read from the serial port', []),
+        'ldr_malformed_total': ('counter', 'Lines that did not parse', []),
+        'ldr_dropped_frames_total': ('counter', 'Binary frames lost according to the sequence numbers', []),
+        'ldr_overflow_total': ('counter', 'Samples discarded because the handoff queue was full', []),
+        'ldr_read_errors_total': ('counter', 'Serial read errors', []),
+        'ldr_reconnects_total': ('counter', 'Serial reconnects after a lost port', []),
+        'ldr_samples_per_second': ('gauge', 'Samples ingested per second', []),
+        'ldr_bytes_per_second': ('gauge', 'Serial bytes read per second', []),
+        'ldr_backlog_samples': ('gauge', 'Samples received but not yet ingested', []),
+        'ldr_lag_seconds': ('gauge', 'Age of the newest ingested sample', []),
+    }
+    for device, plotter in plotters.items():
+        metrics, stats, reader = plotter.metrics, plotter.stats, plotter.reader
+        connection = reader.connection
+        samples_per_sec, bytes_per_sec = metrics.rates(stats.samples, reader.bytes_read)
+        for stage, histogram in metrics.stages.items():
+            families['ldr_stage_seconds'][2].extend(_histogram_lines('ldr_stage_seconds', histogram,
+                                                                     device=device, stage=stage))
+        families['ldr_sample_to_pixel_seconds'][2].extend(_histogram_lines('ldr_sample_to_pixel_seconds',
+                                                                           metrics.lag, device=device))
+        for name, value in (('ldr_samples_total', stats.samples),
+                            ('ldr_bytes_total', reader.bytes_read),
+                            ('ldr_malformed_total', stats.malformed),
+                            ('ldr_dropped_frames_total', stats.dropped),
+                            ('ldr_overflow_total', stats.overflow),
+                            ('ldr_read_errors_total', reader.read_errors),
+                            ('ldr_reconnects_total', len(connection.outages) if connection is not None else 0),
+                            ('ldr_samples_per_second', samples_per_sec),
+                            ('ldr_bytes_per_second', bytes_per_sec),
+                            ('ldr_backlog_samples', stats.backlog),
+                            ('ldr_lag_seconds', stats.lag_seconds)):
+            families[name][2].append(f"{name}{_labels(device=device)} {value!r}")
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def format_hud(plotter):
+    """Short multi-line HUD text: p50/p99 per stage, rates, lag and losses"""
+    metrics, stats, reader = plotter.metrics, plotter.stats, plotter.reader
+    samples_per_sec, bytes_per_sec = metrics.rates(stats.samples, reader.bytes_read)
+    lines = []
+    for stage, histogram in metrics.stages.items():
+        if histogram.count:
+            lines.append(f"{stage:6s} p50 {histogram.quantile(0.5) * 1e3:7.3f} ms  p99 {histogram.quantile(0.99) * 1e3:7.3f} ms")
+    lag = metrics.lag.quantile(0.5)
+    if lag is not None:
+        lines.append(f"sample→pixel p50 {lag * 1e3:.0f} ms  p99 {metrics.lag.quantile(0.99) * 1e3:.0f} ms")
+    lines.append(f"{samples_per_sec:.0f} samples/s  {bytes_per_sec / 1e3:.1f} kB/s  backlog {stats.backlog}")
+    lines.append(f"malformed {stats.malformed}  dropped {stats.dropped}  overflow {stats.overflow}  "
+                 f"read errors {reader.read_errors}")
+    return '\n'.join(lines)
+
+
+class MetricsServer:
+    """GET /metrics on localhost in a daemon thread; `source()` returns the exposition text"""
+
+    def __init__(self, source, port, host=METRICS_HOST):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = source().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # one line per scrape would flood the console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,232 @@
+"""
+Multi-device acquisition
+อ่านจาก ESP32 หลายตัวพร้อมกัน: แต่ละ port มี reader thread, queue, buffer และ clock ของตัวเอง
+แล้วแสดงรวมในกราฟเดียวหรือบันทึกแยกโฟลเดอร์ต่อบอร์ด
+
+    python3 -m ldr_telemetry.multi /dev/ttyUSB0 /dev/ttyUSB1
+    python3 -m ldr_telemetry.multi 'lab=/dev/ttyUSB*' --record recordings/bench --headless
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import serial
+
+from .app import Plotter, start_metrics_server
+from .config import BAUD_RATE, PROFILES, get_profile
+from .connection import ConnectionManager
+from .metrics import prometheus_text
+from .reader import SerialReader
+
+STATUS_INTERVAL = 10.0  # seconds between metric lines in headless mode
+RATE_INTERVAL = 1.0  # seconds over which samples/s is measured
+FLUSH_INTERVAL = 0.25  # headless: seconds between ingest passes
+
+
+def parse_ports(specs):
+    """[(label, port)] from 'port', 'label=port' or glob patterns like '/dev/ttyUSB*'
+
+    A glob with a label gets a numbered label per match ('lab=/dev/ttyUSB*'
+    → lab0, lab1, ...). pyserial URLs such as loop:// are kept as they are.
+    """
+    ports = []
+    for spec in specs:
+        label, sep, port = spec.partition('=')
+        if not sep or '/' in label or ':' in label:
+            label, port = '', spec  # an '=' inside a URL
+        if '://' in port or not glob.has_magic(port):
+            ports.append((label or os.path.basename(port) or port, port))
+            continue
+        for i, match in enumerate(sorted(glob.glob(port))):
+            ports.append((f"{label}{i}" if label else os.path.basename(match), match))
+    labels = [label for label, _ in ports]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"Duplicate device labels: {', '.join(labels)}")
+    return ports
+
+
+class DevicePool:
+    """One `Plotter` (reader thread, handoff queue, buffers, clock) per serial port
+
+    Every device reads in its own thread, so a slow or silent board never
+    holds up the others; the UI (or the headless loop) then ingests all
+    of them once per frame. `metrics()` reports per-device throughput and
+    lag.
+    """
+
+    def __init__(self, config):
+        self.config = config.with_overrides(threaded=True, reader_mode='batch')
+        self.devices = {}  # label → Plotter
+        self.origin = time.monotonic()  # shared time zero for every device
+        self._rates = {}
+        self._rate_mark = (self.origin, {})
+
+    def add(self, label, ser, connection=None):
+        reader = SerialReader(ser, self.config.reader_mode, self.config.protocol, connection=connection)
+        plotter = Plotter(self.config, reader)
+        self.devices[label] = plotter
+        self._rates[label] = 0.0
+        return plotter
+
+    def start(self):
+        for plotter in self.devices.values():
+            plotter.start()
+
+    def stop(self):
+        for plotter in self.devices.values():
+            plotter.stop()
+
+    def close(self):
+        self.stop()
+        for plotter in self.devices.values():
+            plotter.reader.close()
+
+    def ingest(self):
+        """Move every device's pending samples into its buffers; returns the total"""
+        total = sum(plotter.ingest() for plotter in self.devices.values())
+        now = time.monotonic()
+        since, counts = self._rate_mark
+        if now - since >= RATE_INTERVAL:
+            for label, plotter in self.devices.items():
+                self._rates[label] = (plotter.stats.samples - counts.get(label, 0)) / (now - since)
+            self._rate_mark = (now, {label: plotter.stats.samples for label, plotter in self.devices.items()})
+        return total
+
+    def metrics(self):
+        """Per-device counters: samples, samples/s, lag, backlog, losses and reconnects"""
+        rows = []
+        for label, plotter in self.devices.items():
+            stats = plotter.stats
+            connection = plotter.reader.connection
+            rows.append({
+                'label': label,
+                'samples': stats.samples,
+                'rate': self._rates[label],
+                'lag_seconds': stats.lag_seconds,
+                'max_lag_seconds': stats.max_lag_seconds,
+                'backlog': stats.backlog,
+                'overflow': stats.overflow,
+                'malformed': stats.malformed,
+                'dropped': stats.dropped,
+                'reconnects': len(connection.outages) if connection is not None else 0,
+                'downtime': connection.downtime if connection is not None else 0.0,
+            })
+        return rows
+
+
+def format_metrics(row):
+    return (f"{row['label']:>12s}: {row['samples']:9d} samples | {row['rate']:8.0f}/s | "
+            f"lag {row['lag_seconds']:5.2f}s (max {row['max_lag_seconds']:5.2f}s) | backlog {row['backlog']} | "
+            f"overflow {row['overflow']} | malformed {row['malformed']} | dropped {row['dropped']} | "
+            f"reconnects {row['reconnects']} ({row['downtime']:.1f}s down)")
+
+
+def run_headless(pool, duration=None, status_interval=STATUS_INTERVAL):
+    """Ingest (and record, if the devices have sinks) until Ctrl+C or `duration`"""
+    pool.start()
+    start = last_status = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            time.sleep(FLUSH_INTERVAL)
+            pool.ingest()
+            if time.monotonic() - last_status >= status_interval:
+                last_status = time.monotonic()
+                for row in pool.metrics():
+                    print(f"📊 {format_metrics(row)}")
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping...")
+    finally:
+        pool.stop()
+        pool.ingest()
+
+
+def main(argv=None, profile='full', baud_rate=BAUD_RATE):
+    parser = argparse.ArgumentParser(description='ESP32 LDR multi-device plotter / recorder')
+    parser.add_argument('ports', nargs='+', help="ports, 'label=port' or globs such as '/dev/ttyUSB*'")
+    parser.add_argument('--baud', type=int, default=baud_rate, help='baud rate (all ports)')
+    parser.add_argument('--profile', default=profile, choices=sorted(PROFILES), help='plotter profile')
+    parser.add_argument('--max-points', type=int, help='number of points to display per device')
+    parser.add_argument('--record', metavar='DIR', help='record every device to DIR/<label>')
+    parser.add_argument('--headless', action='store_true', help='no plot window (print metrics instead)')
+    parser.add_argument('--duration', type=float, help='headless: stop after this many seconds')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics (one series per device)')
+    args = parser.parse_args(argv)
+
+    try:
+        ports = parse_ports(args.ports)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if not ports:
+        print(f"❌ No ports match {' '.join(args.ports)}")
+        return 1
+
+    config = get_profile(args.profile).with_overrides(max_points=args.max_points, console='none', blit=False,
+                                                      frame_budget=0 if args.headless else None)
+    pool = DevicePool(config)
+    recorders = []
+    for label, port in ports:
+        connection = ConnectionManager(port, args.baud, timeout=config.serial_timeout)
+        try:
+            ser = connection.open()
+        except (serial.SerialException, OSError, ValueError) as e:
+            print(f"❌ {label}: error connecting to {port}: {e}")
+            continue
+        print(f"✅ {label}: connected to {port} at {args.baud} baud")
+        plotter = pool.add(label, ser, connection)
+        if args.record:
+            from .recorder import Recorder
+
+            try:
+                recorder = Recorder(os.path.join(args.record, label),
+                                    metadata={'port': port, 'baud': args.baud, 'protocol': config.protocol})
+            except OSError as e:
+                print(f"❌ {label}: cannot record: {e}")
+                pool.close()
+                for recorder in recorders:
+                    recorder.close()
+                return 1
+            plotter.sinks.append(recorder.write)
+            plotter.gap_sinks.append(recorder.mark_gap)
+            recorders.append(recorder)
+    if not pool.devices:
+        return 1
+
+    server = start_metrics_server(args.metrics_port, lambda: prometheus_text(pool.devices))
+    try:
+        if args.headless:
+            print(f"🚀 Reading {len(pool.devices)} devices (Ctrl+C to stop)")
+            run_headless(pool, args.duration)
+        else:
+            from .renderer import MultiDashboard
+
+            dashboard = MultiDashboard(config, list(pool.devices))
+
+            def animate(frame):
+                pool.ingest()
+                return dashboard.update(pool)
+
+            pool.start()
+            print(f"🚀 Plotting {len(pool.devices)} devices... close the plot window to stop")
+            try:
+                dashboard.show(animate)
+            except KeyboardInterrupt:
+                print("\n⏹️  Stopping...")
+    finally:
+        pool.close()
+        for recorder in recorders:
+            recorder.close()
+        if server is not None:
+            server.close()
+
+    for row in pool.metrics():
+        print(f"📈 {format_metrics(row)}")
+    print("👋 Goodbye!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
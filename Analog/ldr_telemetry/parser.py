@@ -0,0 +1,127 @@
+"""
+Frame parser
+แปลงบรรทัดข้อความจาก ESP32 เป็นค่าตัวเลข
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+Sample = namedtuple('Sample', ['adc', 'voltage', 'light', 'status'])
+
+STATUS_NAMES = {0: "มืด", 1: "แสงน้อย", 2: "แสงปานกลาง", 3: "แสงจ้า"}
+LIGHT_THRESHOLDS = np.array([20.0, 50.0, 80.0])
+DEVICE_TIME = 4  # column of the device timestamp (µs, NaN if the firmware doesn't send it)
+
+# One pattern for both firmware formats:
+#   SerialPlotter.c  `2048,1.65,50.0,2[,timestamp_us]`
+#   LDR.c            `ADC:2048,Voltage:1.65,LightLevel:50.0`
+_KEY = rb'(?:[A-Za-z]+:)?[ \t]*'
+_INT = rb'([-+]?\d+)'
+_FLOAT = rb'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+_SEP = rb'[ \t]*,[ \t]*'
+FRAME_PATTERN = re.compile(rb'^[ \t]*' + _KEY + _INT + _SEP + _KEY + _FLOAT + _SEP + _KEY + _FLOAT
+                           + rb'(?:' + _SEP + _KEY + _INT + rb'(?:' + _SEP + _KEY + rb'(\d+))?(?:,[^\n]*)?)?[ \t\r]*$',
+                           re.MULTILINE)
+_LINE_PATTERN = re.compile(FRAME_PATTERN.pattern.decode('ascii'))
+
+# Fast path: a whole chunk of clean CSV rows (after dropping the `Key:` prefixes)
+_KEY_PREFIX = re.compile(rb'(?:^|(?<=,))[A-Za-z]+:', re.MULTILINE)
+_CSV_INT = rb'[-+]?\d+'
+_CSV_FLOAT = rb'[-+]?(?:\d+\.?\d*|\.\d+)'
+_CSV_ROW = {3: b','.join([_CSV_INT, _CSV_FLOAT, _CSV_FLOAT]),
+            4: b','.join([_CSV_INT, _CSV_FLOAT, _CSV_FLOAT, _CSV_INT]),
+            5: b','.join([_CSV_INT, _CSV_FLOAT, _CSV_FLOAT, _CSV_INT, rb'\d+'])}
+CSV_CHUNK = {fields: re.compile(rb'(?:' + row + rb'\n)*' + row) for fields, row in _CSV_ROW.items()}
+
+
+def light_status(light):
+    """Status code for a light level, same thresholds as the firmware"""
+    if light < 20:
+        return 0  # มืด
+    elif light < 50:
+        return 1  # แสงน้อย
+    elif light < 80:
+        return 2  # แสงปานกลาง
+    return 3  # แสงจ้า
+
+
+def get_status_text(status):
+    """Convert status number to text"""
+    return STATUS_NAMES.get(status, "ไม่ทราบ")
+
+
+def parse_data(line, min_fields=3):
+    """Parse one `ADC,Voltage,LightLevel[,Status]` or `ADC:..,Voltage:..,LightLevel:..` line"""
+    match = _LINE_PATTERN.match(line.strip())
+    if match is None:
+        return None
+    adc, voltage, light, status, _ = match.groups()
+    if status is None and min_fields >= 4:
+        return None
+    light = float(light)
+    return Sample(int(adc), float(voltage), light, light_status(light) if status is None else int(status))
+
+
+class FrameParser:
+    """Parse whole batches of byte frames into an (n, 5) array
+
+    Columns are adc, voltage, light, status and the device timestamp
+    (`DEVICE_TIME`, NaN for lines without one).
+
+    The frames are joined and parsed as one chunk: a clean CSV chunk
+    goes through a single `np.fromstring`, anything else through one
+    precompiled regex, so there is no per-line decode and no exception
+    handling. Frames that don't match (boot log, partial lines, missing
+    status when `min_fields=4`) are counted in `malformed`.
+    """
+
+    def __init__(self, min_fields=3):
+        self.min_fields = min_fields
+        self.parsed = 0
+        self.malformed = 0
+
+    def parse(self, frames):
+        """Return adc, voltage, light, status, device time columns for the valid frames"""
+        if not frames:
+            return np.empty((0, 5))
+        chunk = b'\n'.join(frames)
+        values = self._parse_csv(_KEY_PREFIX.sub(b'', chunk) if b':' in chunk else chunk)
+        if values is None:
+            values = self._parse_rows(chunk)
+        self.parsed += len(values)
+        self.malformed += len(frames) - len(values)
+        return values
+
+    def _parse_csv(self, chunk):
+        """Whole chunk in one `np.fromstring` call; None unless every row is valid"""
+        for fields in (4, 5, 3):
+            if fields < self.min_fields or not CSV_CHUNK[fields].fullmatch(chunk):
+                continue
+            columns = np.fromstring(chunk.replace(b'\n', b','), sep=',').reshape(-1, fields)
+            if fields == 5:
+                return columns
+            values = np.full((len(columns), 5), np.nan)
+            values[:, :fields] = columns
+            if fields == 3:
+                values[:, 3] = np.searchsorted(LIGHT_THRESHOLDS, columns[:, 2], side='right')
+            return values
+        return None
+
+    def _parse_rows(self, chunk):
+        """Mixed or partly malformed chunk: keep the rows that match"""
+        rows = FRAME_PATTERN.findall(chunk)
+        if not rows:
+            return np.empty((0, 5))
+        fields = np.array(rows)
+        if self.min_fields >= 4:
+            fields = fields[fields[:, 3] != b'']
+        values = np.full((len(fields), 5), np.nan)
+        values[:, :3] = fields[:, :3].astype(np.float64)
+        missing = fields[:, 3] == b''
+        values[missing, 3] = np.searchsorted(LIGHT_THRESHOLDS, values[missing, 2], side='right')
+        values[~missing, 3] = fields[~missing, 3].astype(np.float64)
+        stamped = fields[:, 4] != b''
+        values[stamped, 4] = fields[stamped, 4].astype(np.float64)
+        return values
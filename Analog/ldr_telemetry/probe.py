@@ -0,0 +1,223 @@
+"""
+Port discovery
+ตรวจทุก serial port พร้อมกัน หยุดทันทีที่เจอ frame ที่ถูกต้อง บอกรูปแบบข้อมูลของ firmware
+และ sample rate แล้วจำ port ไว้ตาม VID/PID/serial number สำหรับครั้งถัดไป
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
+
+import serial
+
+from .config import BAUD_RATE
+from .parser import DEVICE_TIME, FRAME_PATTERN, FrameParser, Sample
+from .protocol import BlockDecoder, frames_to_samples
+from .reader import SerialReader
+
+PROBE_TIMEOUT = 3.0  # seconds to wait for the first valid frame
+RATE_WINDOW = 2.0  # seconds after the first frame spent measuring the sample rate
+RATE_SAMPLES = 5  # stop measuring once this many more samples arrived
+PORT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'ldr_telemetry', 'ports.json')
+
+# binary: SerialPlotter.c BINARY_PROTOCOL, block: SerialPlotter.c CONTINUOUS_ADC,
+# csv+status: SerialPlotter.c, csv+timestamp: SerialPlotter.c SEND_TIMESTAMP, keyvalue: LDR.c
+FORMATS = ('binary', 'block', 'csv', 'csv+status', 'csv+timestamp', 'keyvalue')
+
+
+@dataclass
+class ProbeResult:
+    """What a probe found on one port"""
+    port: str
+    format: Optional[str] = None  # one of FORMATS (None = nothing valid received)
+    rate: Optional[float] = None  # samples/s
+    sample: Optional[Sample] = None  # first valid sample
+    seconds: float = 0.0  # time until the first valid frame (or until giving up)
+    error: Optional[str] = None  # why the port couldn't be opened
+    key: Optional[str] = None  # cache key (VID:PID:serial number)
+    cached: bool = False  # found through the cache without probing the other ports
+
+    @property
+    def ok(self):
+        return self.format is not None
+
+
+def frame_format(line):
+    """FORMATS name of a text line that parsed"""
+    if b':' in line:
+        return 'keyvalue'
+    fields = line.count(b',') + 1
+    return 'csv' if fields == 3 else 'csv+status' if fields == 4 else 'csv+timestamp'
+
+
+def port_key(info):
+    """Cache key of a `serial.tools.list_ports` entry (None for ports without USB ids)"""
+    if info.vid is None:
+        return None
+    return f"{info.vid:04X}:{info.pid:04X}:{info.serial_number or ''}"
+
+
+def probe_port(port, baud_rate=BAUD_RATE, timeout=PROBE_TIMEOUT, measure_rate=True, stop=None):
+    """Open `port` and wait for the first valid frame (then measure the rate unless told not to)
+
+    The port is opened with DTR and RTS released so the ESP32 auto-reset
+    circuit doesn't reboot the board. `stop` (an Event) ends the probe
+    early, e.g. once another port has been found.
+    """
+    start = time.monotonic()
+    result = ProbeResult(port)
+    try:
+        ser = serial.serial_for_url(port, baud_rate, timeout=0.05, do_not_open=True)
+        ser.dtr = False
+        ser.rts = False
+        ser.open()
+    except (serial.SerialException, OSError, ValueError) as e:
+        result.error = str(e)
+        result.seconds = time.monotonic() - start
+        return result
+
+    reader = SerialReader(ser, 'batch', 'auto')
+    parser = FrameParser()
+    first = None  # (receive time, device time) of the first valid sample
+    last = None
+    count = 0  # samples after the first one
+    received_after = 0  # samples in the batches after the first one (receive-time rate)
+    deadline = start + timeout
+    try:
+        while time.monotonic() < deadline and not (stop is not None and stop.is_set()):
+            frames = reader.read_frames(block=True)
+            if not len(frames):
+                continue
+            received = reader.received_ns * 1e-9
+            if reader.binary:
+                block = frames_to_samples(frames)
+                found = 'block' if isinstance(reader.decoder, BlockDecoder) else 'binary'
+            else:
+                block = parser.parse(frames)
+                if not len(block):
+                    continue
+                found = None
+                if first is None:
+                    # Format of the first valid line (the parser doesn't say which lines matched)
+                    found = frame_format(next(line for line in frames if FRAME_PATTERN.match(line)))
+            if first is None:
+                result.format = found
+                result.sample = Sample(int(block[0, 0]), block[0, 1], block[0, 2], int(block[0, 3]))
+                result.seconds = received - start
+                first = (received, block[0, DEVICE_TIME])
+                count = len(block) - 1
+                if not measure_rate:
+                    break
+                deadline = time.monotonic() + RATE_WINDOW
+            else:
+                count += len(block)
+                received_after += len(block)
+            last = (received, block[-1, DEVICE_TIME])
+            if count >= RATE_SAMPLES:
+                break
+    except (serial.SerialException, OSError) as e:
+        result.error = str(e)
+    finally:
+        ser.close()
+
+    if first is None:
+        result.seconds = time.monotonic() - start
+    elif count:
+        # Device timestamps when the firmware sends them, receive times otherwise
+        device_span = (last[1] - first[1]) * 1e-6
+        if device_span > 0:
+            result.rate = count / device_span
+        elif received_after and last[0] > first[0]:
+            result.rate = received_after / (last[0] - first[0])
+    return result
+
+
+def probe_ports(ports, baud_rate=BAUD_RATE, timeout=PROBE_TIMEOUT, measure_rate=True, first_only=False):
+    """Probe every port at once (one thread each); results in the order they finish
+
+    With `first_only` the remaining probes are stopped as soon as one port
+    has delivered a valid frame.
+    """
+    if not ports:
+        return []
+    stop = threading.Event()
+    results = []
+    with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+        futures = [pool.submit(probe_port, port, baud_rate, timeout, measure_rate, stop) for port in ports]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if first_only and result.ok:
+                stop.set()
+    return results
+
+
+def load_cache(path=PORT_CACHE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(results, path=PORT_CACHE):
+    """Remember the working ports that have USB ids (a failed write only costs a rescan next time)"""
+    cache = load_cache(path)
+    for result in results:
+        if result.ok and result.key:
+            cache[result.key] = {'port': result.port, 'format': result.format, 'rate': result.rate,
+                                 'last_seen': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
+
+
+def discover(baud_rate=BAUD_RATE, timeout=PROBE_TIMEOUT, measure_rate=True, cache_path=PORT_CACHE, use_cache=True):
+    """Find the ports with an ESP32 sending data; working ports first
+
+    A board remembered in the cache that is still plugged in (matched by
+    VID/PID/serial number, so a new device name is fine) is checked on
+    its own first and returned right away. Otherwise every port is
+    probed in parallel.
+    """
+    import serial.tools.list_ports
+
+    infos = serial.tools.list_ports.comports()
+    keys = {info.device: port_key(info) for info in infos}
+    if use_cache:
+        cache = load_cache(cache_path)
+        for device, key in keys.items():
+            if key in cache:
+                result = probe_port(device, baud_rate, timeout, measure_rate=False)
+                if result.ok:
+                    result.key = key
+                    result.rate = cache[key].get('rate')
+                    result.cached = True
+                    save_cache([result], cache_path)
+                    return [result]
+
+    results = probe_ports(list(keys), baud_rate, timeout, measure_rate)
+    for result in results:
+        result.key = keys.get(result.port)
+    save_cache(results, cache_path)
+    results.sort(key=lambda r: (not r.ok, r.seconds))
+    return results
+
+
+def format_result(result):
+    """One console line for a probe result"""
+    if result.error:
+        return f"❌ {result.port}: {result.error}"
+    if not result.ok:
+        return f"⚠️  {result.port}: no valid data in {result.seconds:.1f}s"
+    rate = f"{result.rate:.1f} samples/s" if result.rate else "rate unknown"
+    source = " (cached)" if result.cached else ""
+    return (f"✅ {result.port}{source}: {result.format} | {rate} | first frame after {result.seconds:.2f}s | "
+            f"ADC {result.sample.adc}")
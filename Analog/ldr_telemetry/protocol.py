@@ -0,0 +1,325 @@
+"""
+Binary frame protocol
+ถอดรหัส frame แบบ binary จาก SerialPlotter.c (BINARY_PROTOCOL = 1)
+
+    offset  size  field
+         0     2  sync          0xA55A (little-endian: 5A A5)
+         2     2  seq           uint16, +1 ต่อ frame
+         4     4  timestamp_us  uint32, esp_timer_get_time()
+         8     2  adc           int16
+        10     2  crc           CRC-16/CCITT-FALSE ของ byte 0..9
+
+Continuous ADC block จาก SerialPlotter.c (CONTINUOUS_ADC = 1): header 16 bytes ตามด้วย ADC
+`count` ค่า (uint16) และ CRC ของทั้งหมด
+
+    offset  size  field
+         0     2  sync          0xA55B (little-endian: 5B A5)
+         2     2  seq           uint16, +1 ต่อ block
+         4     4  timestamp_us  uint32, เวลาของ sample แรกใน block
+         8     4  sample_rate   uint32, samples/s
+        12     2  count         จำนวน sample ใน block
+        14     2  flags         bit 0: DMA buffer ของ ADC ล้นก่อน block นี้ (sample หาย)
+        16  2*count adc         uint16
+         -     2  crc           CRC-16/CCITT-FALSE ของ byte ก่อนหน้าทั้งหมด
+
+Voltage, light level และ status คำนวณจาก ADC ฝั่ง host
+"""
+
+import binascii
+
+import numpy as np
+
+from .config import ADC_RANGE, VOLTAGE_RANGE, LIGHT_RANGE
+from .parser import DEVICE_TIME, LIGHT_THRESHOLDS
+
+PROTOCOLS = ('text', 'binary', 'block', 'auto')
+
+SYNC = 0xA55A
+SYNC_BYTES = SYNC.to_bytes(2, 'little')
+FRAME_DTYPE = np.dtype([('sync', '<u2'), ('seq', '<u2'), ('timestamp_us', '<u4'),
+                        ('adc', '<i2'), ('crc', '<u2')])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+CRC_BYTES = FRAME_SIZE - 2
+MAX_UNSYNCED = 1024  # byte ที่ไม่มี frame ถูกต้องเกินนี้ = firmware กลับไปส่ง text แล้ว
+
+BLOCK_SYNC = 0xA55B
+BLOCK_SYNC_BYTES = BLOCK_SYNC.to_bytes(2, 'little')
+BLOCK_HEADER_DTYPE = np.dtype([('sync', '<u2'), ('seq', '<u2'), ('timestamp_us', '<u4'),
+                               ('sample_rate', '<u4'), ('count', '<u2'), ('flags', '<u2')])
+BLOCK_HEADER_SIZE = BLOCK_HEADER_DTYPE.itemsize
+BLOCK_SAMPLES = 256  # SerialPlotter.c BLOCK_SAMPLES
+MAX_BLOCK_SAMPLES = 4096  # a larger count in a header means it isn't one
+BLOCK_OVERRUN = 0x0001  # flags: the ADC driver dropped samples before this block
+# One decoded block sample; frames_to_samples() takes it like FRAME_DTYPE
+BLOCK_SAMPLE_DTYPE = np.dtype([('timestamp_us', '<u4'), ('adc', '<i2')])
+
+
+def _crc16_table(poly=0x1021):
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly if crc & 0x8000 else crc << 1) & 0xFFFF
+        table[byte] = crc
+    return table
+
+
+CRC16_TABLE = _crc16_table()
+
+
+def crc16(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE of a bytes-like object"""
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ int(CRC16_TABLE[(crc >> 8) ^ byte])
+    return crc
+
+
+def crc16_rows(rows):
+    """CRC-16/CCITT-FALSE of every row of a (frames, bytes) uint8 array at once"""
+    crc = np.full(len(rows), 0xFFFF, dtype=np.uint16)
+    for column in rows.T:
+        crc = (crc << 8) ^ CRC16_TABLE[(crc >> 8) ^ column]
+    return crc
+
+
+def encode_frames(adc, seq=0, timestamp_us=None):
+    """Pack ADC readings into frames the same way as SerialPlotter.c (for tests and benchmarks)"""
+    adc = np.asarray(adc)
+    frames = np.zeros(len(adc), dtype=FRAME_DTYPE)
+    frames['sync'] = SYNC
+    frames['seq'] = (seq + np.arange(len(adc))) & 0xFFFF
+    if timestamp_us is not None:
+        frames['timestamp_us'] = timestamp_us
+    frames['adc'] = adc
+    rows = frames.view(np.uint8).reshape(len(adc), FRAME_SIZE)
+    frames['crc'] = crc16_rows(rows[:, :CRC_BYTES])
+    return frames.tobytes()
+
+
+def encode_blocks(adc, seq=0, timestamp_us=0, sample_rate=2000, block_samples=BLOCK_SAMPLES, flags=0):
+    """Pack ADC readings into blocks the same way as SerialPlotter.c with CONTINUOUS_ADC = 1
+
+    `timestamp_us` is the time of the first reading; the last block may be
+    shorter than `block_samples`.
+    """
+    adc = np.asarray(adc)
+    chunks = []
+    for index, offset in enumerate(range(0, len(adc), block_samples)):
+        values = adc[offset:offset + block_samples]
+        header = np.zeros(1, dtype=BLOCK_HEADER_DTYPE)
+        header['sync'] = BLOCK_SYNC
+        header['seq'] = (seq + index) & 0xFFFF
+        header['timestamp_us'] = int(timestamp_us + offset * 1e6 / sample_rate) & 0xFFFFFFFF
+        header['sample_rate'] = sample_rate
+        header['count'] = len(values)
+        header['flags'] = flags if index == 0 else 0
+        block = header.tobytes() + values.astype('<u2').tobytes()
+        chunks.append(block + binascii.crc_hqx(block, 0xFFFF).to_bytes(2, 'little'))
+    return b''.join(chunks)
+
+
+def frames_to_samples(frames):
+    """(n, 5) adc, voltage, light, status, device time block (same columns as FrameParser)
+
+    Takes FRAME_DTYPE frames or BLOCK_SAMPLE_DTYPE block samples.
+    """
+    adc = frames['adc'].astype(np.float64)
+    values = np.empty((len(frames), 5))
+    values[:, 0] = adc
+    values[:, 1] = adc * (VOLTAGE_RANGE[1] / ADC_RANGE[1])
+    values[:, 2] = adc * (LIGHT_RANGE[1] / ADC_RANGE[1])
+    values[:, 3] = np.searchsorted(LIGHT_THRESHOLDS, values[:, 2], side='right')
+    values[:, DEVICE_TIME] = frames['timestamp_us']
+    return values
+
+
+class BinaryDecoder:
+    """Stream decoder for binary frames
+
+    `feed(chunk)` returns the complete, CRC-checked frames as a
+    FRAME_DTYPE array. When the stream is aligned the array is a view on
+    the received bytes (no copy); otherwise every sync word candidate is
+    checked at once and the garbage between frames is skipped. Gaps in
+    the sequence numbers are counted in `dropped`.
+    """
+
+    def __init__(self):
+        self._pending = b''
+        self._last_seq = None
+        self.frames = 0
+        self.dropped = 0  # frames missing according to the sequence numbers
+        self.crc_errors = 0  # sync word found but the CRC didn't match
+        self.skipped_bytes = 0  # bytes that weren't part of a valid frame
+        self.unsynced_bytes = 0  # skipped bytes since the last valid frame
+
+    def feed(self, chunk):
+        """Decode as many frames as possible from the pending bytes plus `chunk`"""
+        data = self._pending + chunk if self._pending else bytes(chunk)
+        count = len(data) // FRAME_SIZE
+        frames = np.frombuffer(data, dtype=FRAME_DTYPE, count=count)
+        if count and (frames['sync'] == SYNC).all() and self._crc_ok(data, frames).all():
+            # Aligned stream: every frame is valid
+            self._pending = data[count * FRAME_SIZE:]
+            end = count * FRAME_SIZE
+        else:
+            frames, end = self._resync(data)
+            self._pending = data[end:]
+        if len(frames):
+            self._count(frames)
+            self.unsynced_bytes = 0
+        return frames
+
+    def _crc_ok(self, data, frames):
+        rows = np.frombuffer(data, dtype=np.uint8, count=frames.nbytes).reshape(len(frames), FRAME_SIZE)
+        return crc16_rows(rows[:, :CRC_BYTES]) == frames['crc']
+
+    def _resync(self, data):
+        """Find valid frames at any offset; returns (frames, bytes consumed)"""
+        raw = np.frombuffer(data, dtype=np.uint8)
+        starts = np.flatnonzero((raw[:-1] == SYNC_BYTES[0]) & (raw[1:] == SYNC_BYTES[1]))
+        starts = starts[starts + FRAME_SIZE <= len(raw)]
+        valid = np.empty(0, dtype=np.intp)
+        if len(starts):
+            rows = raw[starts[:, None] + np.arange(FRAME_SIZE)]
+            crc_ok = crc16_rows(rows[:, :CRC_BYTES]) == rows.view(FRAME_DTYPE).ravel()['crc']
+            self.crc_errors += len(starts) - np.count_nonzero(crc_ok)
+            valid = starts[crc_ok]
+            if len(valid) > 1 and (np.diff(valid) < FRAME_SIZE).any():
+                # An accidental sync word inside a frame: keep the first of overlapping frames
+                keep = [valid[0]]
+                for start in valid[1:]:
+                    if start >= keep[-1] + FRAME_SIZE:
+                        keep.append(start)
+                valid = np.array(keep)
+
+        # Keep a possibly incomplete frame at the end for the next chunk
+        end = max(len(data) - (FRAME_SIZE - 1), 0)
+        if len(valid):
+            end = max(end, valid[-1] + FRAME_SIZE)
+        skipped = end - len(valid) * FRAME_SIZE
+        self.skipped_bytes += skipped
+        self.unsynced_bytes += skipped
+        frames = raw[valid[:, None] + np.arange(FRAME_SIZE)].view(FRAME_DTYPE).ravel()
+        return frames, end
+
+    def _count(self, frames):
+        seq = frames['seq'].astype(np.int64)
+        if self._last_seq is not None:
+            seq = np.concatenate(([self._last_seq], seq))
+        gaps = (np.diff(seq) - 1) & 0xFFFF
+        gaps[gaps >= 0x8000] = 0  # going backwards = the board restarted, not a drop
+        self.dropped += int(gaps.sum())
+        self._last_seq = int(seq[-1])
+        self.frames += len(frames)
+
+    def reset(self):
+        """Forget the pending bytes and sequence number (e.g. after a reconnect)"""
+        self._pending = b''
+        self._last_seq = None
+        self.unsynced_bytes = 0
+
+
+class BlockDecoder:
+    """Stream decoder for continuous-ADC blocks
+
+    `feed(chunk)` returns the samples of every complete, CRC-checked
+    block as one BLOCK_SAMPLE_DTYPE array, each with its own device time
+    (the block's start time plus its index over the sample rate), so a
+    block goes into the buffers with a few array operations. A block is
+    ~500 bytes, so they are found one at a time with `bytes.find` and
+    checked with `binascii.crc_hqx`; bytes between blocks are skipped.
+    Samples of lost blocks (gaps in `seq`) are counted in `dropped`,
+    blocks the firmware flagged after a DMA overflow in `overruns`.
+
+    Same counters and `reset()` as `BinaryDecoder`, so the reader treats
+    both alike (`frames` counts blocks).
+    """
+
+    def __init__(self):
+        self._pending = b''
+        self._last_seq = None
+        self.frames = 0
+        self.samples = 0
+        self.dropped = 0  # samples in blocks missing according to the sequence numbers
+        self.overruns = 0  # blocks sent after the ADC driver had to drop samples
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.unsynced_bytes = 0
+        self.sample_rate = None  # from the newest block header
+
+    def feed(self, chunk):
+        """Decode as many blocks as possible from the pending bytes plus `chunk`"""
+        data = self._pending + chunk if self._pending else bytes(chunk)
+        blocks = []  # (header, offset of the ADC values)
+        consumed = 0  # end of the last valid block
+        search = 0
+        keep = len(data)  # start of what stays pending
+        while True:
+            start = data.find(BLOCK_SYNC_BYTES, search)
+            if start < 0:
+                # A trailing first sync byte may be the start of the next block
+                keep = len(data) - 1 if data[-1:] == BLOCK_SYNC_BYTES[:1] else len(data)
+                break
+            if start + BLOCK_HEADER_SIZE > len(data):
+                keep = start
+                break
+            header = np.frombuffer(data, dtype=BLOCK_HEADER_DTYPE, count=1, offset=start)[0]
+            count = int(header['count'])
+            if not 0 < count <= MAX_BLOCK_SAMPLES:
+                search = start + 1
+                continue
+            end = start + BLOCK_HEADER_SIZE + 2 * count + 2
+            if end > len(data):
+                keep = start
+                break
+            if binascii.crc_hqx(data[start:end - 2], 0xFFFF) != int.from_bytes(data[end - 2:end], 'little'):
+                self.crc_errors += 1
+                search = start + 1
+                continue
+            self._skip(start - consumed)
+            blocks.append((header, start + BLOCK_HEADER_SIZE))
+            consumed = search = end
+        self._skip(max(keep - consumed, 0))
+        self._pending = data[max(keep, consumed):]
+        return self._samples(data, blocks)
+
+    def _skip(self, count):
+        self.skipped_bytes += count
+        self.unsynced_bytes += count
+
+    def _samples(self, data, blocks):
+        total = sum(int(header['count']) for header, _ in blocks)
+        samples = np.empty(total, dtype=BLOCK_SAMPLE_DTYPE)
+        offset = 0
+        for header, start in blocks:
+            count = int(header['count'])
+            rate = int(header['sample_rate']) or 1
+            self._count(header)
+            end = offset + count
+            samples['adc'][offset:end] = np.frombuffer(data, dtype='<u2', count=count, offset=start)
+            steps = (np.arange(count) * (1e6 / rate)).astype(np.int64)
+            samples['timestamp_us'][offset:end] = (int(header['timestamp_us']) + steps) & 0xFFFFFFFF
+            offset = end
+            self.sample_rate = rate
+        if blocks:
+            self.unsynced_bytes = 0
+        return samples
+
+    def _count(self, header):
+        seq = int(header['seq'])
+        count = int(header['count'])
+        if self._last_seq is not None:
+            gap = (seq - self._last_seq - 1) & 0xFFFF
+            if gap < 0x8000:  # going backwards = the board restarted, not a drop
+                self.dropped += gap * count
+        if header['flags'] & BLOCK_OVERRUN:
+            self.overruns += 1
+        self._last_seq = seq
+        self.frames += 1
+        self.samples += count
+
+    def reset(self):
+        """Forget the pending bytes and sequence number (e.g. after a reconnect)"""
+        self._pending = b''
+        self._last_seq = None
+        self.unsynced_bytes = 0
@@ -0,0 +1,213 @@
+"""
+Serial reader
+เปิด serial port และอ่านข้อมูลจาก ESP32
+"""
+
+import time
+
+import serial
+
+from .config import BAUD_RATE
+from .protocol import MAX_UNSYNCED, PROTOCOLS, BinaryDecoder, BlockDecoder
+
+READER_MODES = ('line', 'batch')
+MAX_PENDING = 64 * 1024  # ทิ้งข้อมูลค้างที่ไม่มี '\n' เกินขนาดนี้ (เช่น garbage จาก boot log)
+
+
+def open_serial(port, baud_rate=BAUD_RATE, timeout=0.1):
+    """Open a serial port or a pyserial URL such as `loop://`"""
+    return serial.serial_for_url(port, baud_rate, timeout=timeout)
+
+
+class SerialReader:
+    """Line reader on top of an open serial port
+
+    `line` mode calls `readline()` once per line. `batch` mode drains
+    everything in `in_waiting` with a single `read()` and splits the
+    frames itself, keeping an incomplete trailing line for the next call.
+
+    In `batch` mode the `protocol` can also be `binary` (frames from
+    SerialPlotter.c with BINARY_PROTOCOL = 1), `block` (sample blocks
+    with CONTINUOUS_ADC = 1) or `auto`, which starts as text, switches to
+    frames or blocks once a valid one arrives and falls back to text when
+    nothing valid has been seen for MAX_UNSYNCED bytes. `line` mode
+    always reads text.
+
+    With a `connection` (ConnectionManager) a read error reopens the port
+    instead of failing forever.
+    """
+
+    def __init__(self, ser, mode='line', protocol='text', connection=None):
+        if mode not in READER_MODES:
+            raise ValueError(f"Unknown reader mode '{mode}'")
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol '{protocol}'")
+        if protocol in ('binary', 'block') and mode != 'batch':
+            raise ValueError(f"{protocol.capitalize()} protocol needs the batch reader")
+        if mode != 'batch':
+            protocol = 'text'  # `line` mode reads text only
+        self.ser = ser
+        self.connection = connection
+        self.mode = mode
+        self.protocol = protocol
+        # auto: both decoders look at the text until one of them finds something
+        self._detectors = (BinaryDecoder(), BlockDecoder()) if protocol == 'auto' else ()
+        if protocol == 'auto':
+            self.decoder = self._detectors[0]
+        else:
+            self.decoder = {'binary': BinaryDecoder, 'block': BlockDecoder}.get(protocol, lambda: None)()
+        self.binary = protocol in ('binary', 'block')  # decoding frames or blocks right now
+        self._pending = bytearray()
+        self.bytes_read = 0
+        self.discarded_bytes = 0
+        self.read_errors = 0
+        self.received_ns = 0  # time.monotonic_ns() of the last read that returned data
+        self.metrics = None  # Metrics that get the read/decode stage times (set by the Plotter)
+
+    def readline(self):
+        """Return the next decoded line, or None if nothing is waiting"""
+        if not self.ser.in_waiting:
+            return None
+        start = time.perf_counter()
+        raw = self.ser.readline()
+        self.received_ns = time.monotonic_ns()
+        self.bytes_read += len(raw)
+        if self.metrics is not None:
+            self.metrics.observe('read', time.perf_counter() - start)
+        line = raw.decode('utf-8', errors='replace').strip()
+        return line or None
+
+    def read_frames(self, block=False):
+        """Return every complete frame received so far
+
+        Text frames come back as a list of bytes lines, binary ones as a
+        FRAME_DTYPE array and block samples as a BLOCK_SAMPLE_DTYPE array. With `block=True` the read waits up to the port
+        timeout for the first byte, so a reader thread needs no sleep
+        between polls.
+        """
+        waiting = self.ser.in_waiting
+        if not waiting and not block:
+            return []
+        start = time.perf_counter()
+        chunk = self.ser.read(waiting or 1)
+        if not chunk:
+            return []
+        self.received_ns = time.monotonic_ns()
+        self.bytes_read += len(chunk)
+        if self.metrics is None:
+            return self._frames(chunk)
+        # A blocking read mostly measures the wait for data, so only reads of buffered bytes count
+        read = time.perf_counter()
+        if waiting:
+            self.metrics.observe('read', read - start)
+        frames = self._frames(chunk)
+        self.metrics.observe('decode', time.perf_counter() - read)
+        return frames
+
+    def _frames(self, chunk):
+        """Binary frames, block samples or complete text lines in `chunk` (plus what was pending)"""
+        if self.decoder is not None:
+            frames = self.decoder.feed(chunk) if self.binary else self._detect(chunk)
+            if len(frames):
+                return frames
+            if self.binary:
+                if self.protocol != 'auto' or self.decoder.unsynced_bytes <= MAX_UNSYNCED:
+                    return []
+                # auto: nothing valid for a while, back to text
+                self.binary = False
+                for decoder in self._detectors:
+                    decoder.reset()
+        return self._split_lines(chunk)
+
+    def _detect(self, chunk):
+        """auto while reading text: frames or block samples once a decoder recognises the stream"""
+        for decoder in self._detectors:
+            frames = decoder.feed(chunk)
+            if len(frames):
+                self.decoder = decoder
+                self.binary = True
+                self.discarded_bytes += len(self._pending)
+                self._pending.clear()
+                for other in self._detectors:
+                    if other is not decoder:
+                        other.reset()
+                return frames
+        return []
+
+    def _split_lines(self, chunk):
+        pending = self._pending
+        pending += chunk
+
+        end = pending.rfind(b'\n')
+        if end < 0:
+            if len(pending) > MAX_PENDING:
+                self.discarded_bytes += len(pending)
+                pending.clear()
+            return []
+        frames = bytes(pending[:end]).replace(b'\r', b'').split(b'\n')
+        del pending[:end + 1]
+        return [frame for frame in frames if frame]
+
+    def run(self, on_line, stop_event, poll_interval=0.01, on_reconnect=None):
+        """Read lines in a loop until `stop_event` is set (for a background thread)
+
+        `on_line(data, received_ns)` gets the receive time from
+        `time.monotonic_ns()`. In `batch` mode it is called once per batch
+        with a list of byte frames (or an array of binary frames or block
+        samples) instead
+        of once per decoded line. `on_reconnect()` is called after the
+        port has been reopened.
+        """
+        while not stop_event.is_set():
+            try:
+                if self.mode == 'batch':
+                    frames = self.read_frames(block=True)
+                    if len(frames):
+                        on_line(frames, self.received_ns)
+                    continue
+                line = self.readline()
+                if line:
+                    on_line(line, self.received_ns)
+            except (serial.SerialException, OSError) as e:
+                self.read_errors += 1
+                if self.connection is None:
+                    print(f"Serial read error: {e}")
+                elif self.reconnect(e, stop_event):
+                    if on_reconnect is not None:
+                        on_reconnect()
+                    continue
+            time.sleep(poll_interval)  # Small delay to prevent CPU overload
+
+    def reconnect(self, error=None, stop_event=None):
+        """Swap a failed port for a reopened one (needs a `connection`)
+
+        `error` starts the outage. With `stop_event` this retries with
+        backoff until it succeeds or the event is set; without, it makes at
+        most one attempt, for callers that poll once per frame. Returns
+        True once connected again.
+        """
+        if error is not None:
+            self.connection.lost(error)
+            try:
+                self.ser.close()
+            except (serial.SerialException, OSError):
+                pass
+        if stop_event is not None:
+            ser = self.connection.wait(stop_event)
+        else:
+            ser = self.connection.try_reconnect()
+        if ser is None:
+            return False
+        self.ser = ser
+        self.reset()
+        return True
+
+    def reset(self):
+        """Forget partial lines and frames from the previous connection"""
+        self._pending.clear()
+        for decoder in self._detectors or (self.decoder,):
+            if decoder is not None:
+                decoder.reset()
+
+    def close(self):
+        self.ser.close()
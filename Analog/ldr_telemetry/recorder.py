@@ -0,0 +1,280 @@
+"""
+Headless recorder
+บันทึก sample ลงไฟล์แบบ columnar (ไม่ต้องใช้ matplotlib) สำหรับเก็บข้อมูลหลายวัน
+
+    python3 -m ldr_telemetry.recorder --port /dev/ttyUSB0 --out recordings/lab1
+    python3 -m ldr_telemetry.recorder --bus ldr --out recordings/lab1   # ร่วมกับ plotter ผ่าน sample bus
+
+แต่ละ chunk เป็นไฟล์ดิบของแต่ละ column (`00000-adc.bin`, ...) ที่เปิดด้วย
+np.memmap ได้ทันที ส่วน `recording.json` เก็บ dtype ของแต่ละ column
+และ `gaps.bin` เก็บเวลาที่การเชื่อมต่อขาด (replay จะตัดเส้นกราฟตรงนั้น)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import serial
+
+from .config import SERIAL_PORT, BAUD_RATE, PROFILES, get_profile
+from .connection import ConnectionManager
+from .handoff import OVERFLOW_POLICIES
+from .reader import SerialReader
+
+FORMAT_VERSION = 1
+META_FILE = 'recording.json'
+GAPS_FILE = 'gaps.bin'  # '<f8' Unix time of the last sample before each reconnect
+
+# Column layout on disk (little-endian); `time` is Unix time in seconds
+RECORD_COLUMNS = {
+    'time': '<f8',
+    'adc': '<i2',
+    'voltage': '<f4',
+    'light': '<f4',
+    'status': '<i1',
+}
+
+CHUNK_SECONDS = 3600  # เริ่มไฟล์ชุดใหม่ทุกชั่วโมง
+FSYNC_INTERVAL = 5.0  # seconds between fsyncs (ข้อมูลที่เสียได้ถ้าไฟดับ)
+WRITE_BUFFER = 1 << 20  # bytes buffered per column file
+FLUSH_INTERVAL = 0.25  # seconds between batches taken from the reader thread
+
+
+def chunk_path(path, index, column):
+    return os.path.join(path, f"{index:05d}-{column}.bin")
+
+
+class Recorder:
+    """Appends sample batches to a directory of chunked column files
+
+    `write(times, block)` takes host monotonic times and an (n, 4+) block
+    in the parser's column order. Every column is appended to its own
+    buffered file; the files are fsynced every `fsync_interval` seconds
+    and a new chunk is started every `chunk_seconds`. A crash loses at
+    most the unsynced tail, and a partially written row is ignored by
+    `load_recording`. `mark_gap(time)` records a reconnect so a replay
+    doesn't draw a line across the outage.
+    """
+
+    def __init__(self, path, chunk_seconds=CHUNK_SECONDS, fsync_interval=FSYNC_INTERVAL, metadata=None):
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+        self.fsync_interval = fsync_interval
+        os.makedirs(path, exist_ok=True)
+        existing = [name for name in os.listdir(path) if name.endswith('.bin')]
+        if existing:
+            raise FileExistsError(f"{path} already contains a recording")
+        # monotonic → Unix time, fixed for the whole recording so the time column never jumps
+        self.time_offset = time.time() - time.monotonic()
+        meta = {
+            'format': FORMAT_VERSION,
+            'columns': RECORD_COLUMNS,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'chunk_seconds': chunk_seconds,
+            'gaps': GAPS_FILE,
+            **(metadata or {}),
+        }
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+        self.chunk = -1
+        self.samples = 0
+        self.bytes_written = 0
+        self.gaps = 0
+        self._files = {}
+        self._gaps_file = open(os.path.join(path, GAPS_FILE), 'ab', buffering=0)  # rare, so unbuffered
+        self._chunk_started = 0.0
+        self._last_sync = time.monotonic()
+        self.rotate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, times, block):
+        """Append a batch (host monotonic times, (n, 4+) parsed values)"""
+        count = len(block)
+        if count == 0:
+            return
+        now = time.monotonic()
+        if now - self._chunk_started >= self.chunk_seconds:
+            self.rotate()
+        columns = {
+            'time': np.asarray(times, dtype=np.float64) + self.time_offset,
+            'adc': block[:, 0],
+            'voltage': block[:, 1],
+            'light': block[:, 2],
+            'status': block[:, 3],
+        }
+        for name, dtype in RECORD_COLUMNS.items():
+            data = np.ascontiguousarray(columns[name], dtype=dtype)
+            self._files[name].write(data)
+            self.bytes_written += data.nbytes
+        self.samples += count
+        if now - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def mark_gap(self, timestamp):
+        """Record a connection gap after the sample at `timestamp` (host monotonic time)"""
+        self._gaps_file.write(np.float64(timestamp + self.time_offset).astype('<f8').tobytes())
+        self.gaps += 1
+
+    def sync(self):
+        """Flush and fsync every open column file"""
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self._last_sync = time.monotonic()
+
+    def rotate(self):
+        """Close the current chunk and start the next one"""
+        self._close_files()
+        self.chunk += 1
+        self._files = {name: open(chunk_path(self.path, self.chunk, name), 'ab', buffering=WRITE_BUFFER)
+                       for name in RECORD_COLUMNS}
+        self._chunk_started = time.monotonic()
+
+    def close(self):
+        self._close_files()
+        if not self._gaps_file.closed:
+            os.fsync(self._gaps_file.fileno())
+            self._gaps_file.close()
+
+    def _close_files(self):
+        if self._files:
+            self.sync()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+
+def load_recording(path):
+    """(metadata, chunks) of a recording; each chunk is a dict of read-only memmaps
+
+    Columns are cut to the shortest one, so a row that was only partly
+    written before a crash is left out.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    columns = {name: np.dtype(dtype) for name, dtype in meta['columns'].items()}
+    chunks = []
+    index = 0
+    while os.path.exists(chunk_path(path, index, 'time')):
+        rows = min(os.path.getsize(chunk_path(path, index, name)) // dtype.itemsize
+                   for name, dtype in columns.items())
+        if rows:
+            chunks.append({name: np.memmap(chunk_path(path, index, name), dtype=dtype, mode='r', shape=(rows,))
+                           for name, dtype in columns.items()})
+        index += 1
+    return meta, chunks
+
+
+def load_gaps(path):
+    """Unix times of the connection gaps in a recording (empty for recordings without gaps.bin)"""
+    gaps_path = os.path.join(path, GAPS_FILE)
+    if not os.path.exists(gaps_path):
+        return np.empty(0)
+    return np.fromfile(gaps_path, dtype='<f8', count=os.path.getsize(gaps_path) // 8)
+
+
+def _flush(plotter, recorder):
+    gaps, times, block = plotter.take()
+    for gap in gaps:
+        recorder.mark_gap(gap)
+    recorder.write(times, block)
+
+
+def record(plotter, recorder, duration=None, status_interval=10.0):
+    """Move batches from the plotter's reader thread to the recorder until Ctrl+C or `duration`"""
+    plotter.start()
+    start = last_status = time.monotonic()
+    last_samples = 0
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            time.sleep(FLUSH_INTERVAL)
+            _flush(plotter, recorder)
+            now = time.monotonic()
+            if now - last_status >= status_interval:
+                rate = (recorder.samples - last_samples) / (now - last_status)
+                print(f"💾 {recorder.samples} samples | {rate:8.0f} samples/s | "
+                      f"{recorder.bytes_written / 1e6:8.1f} MB | chunk {recorder.chunk}")
+                last_status, last_samples = now, recorder.samples
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping...")
+    finally:
+        plotter.stop()
+        _flush(plotter, recorder)
+        recorder.close()
+
+
+def main(argv=None, profile='full', port=SERIAL_PORT, baud_rate=BAUD_RATE):
+    parser = argparse.ArgumentParser(description='ESP32 LDR headless recorder')
+    parser.add_argument('--port', default=port, help='serial port or pyserial URL (e.g. loop://)')
+    parser.add_argument('--baud', type=int, default=baud_rate, help='baud rate')
+    parser.add_argument('--bus', metavar='NAME',
+                        help='record from the sample bus of `python3 -m ldr_telemetry.bus` instead of the port')
+    parser.add_argument('--profile', default=profile, choices=sorted(PROFILES), help='parser settings to use')
+    parser.add_argument('--out', required=True, help='directory for the recording (must not contain one yet)')
+    parser.add_argument('--chunk-seconds', type=float, default=CHUNK_SECONDS, help='start a new chunk this often')
+    parser.add_argument('--fsync', type=float, default=FSYNC_INTERVAL, help='seconds between fsyncs')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, default='block',
+                        help='what to do when the disk falls behind the reader')
+    args = parser.parse_args(argv)
+
+    # Same reader, parser and clock mapping as the plotter, without matplotlib
+    from .app import Plotter
+
+    config = get_profile(args.profile).with_overrides(threaded=True, reader_mode='batch', overflow=args.overflow,
+                                                      console='none')
+    connection = None
+    if args.bus is not None:
+        from .bus import BusReader
+
+        try:
+            reader = BusReader(args.bus)
+            print(f"✅ Attached to sample bus '{args.bus}'")
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ Cannot attach to sample bus '{args.bus}': {e}")
+            return 1
+        metadata = {'bus': args.bus}
+    else:
+        connection = ConnectionManager(args.port, args.baud, timeout=config.serial_timeout)
+        try:
+            ser = connection.open()
+            print(f"✅ Connected to {args.port} at {args.baud} baud")
+        except (serial.SerialException, OSError, ValueError) as e:
+            print(f"❌ Error connecting to serial port: {e}")
+            return 1
+        reader = SerialReader(ser, config.reader_mode, config.protocol, connection=connection)
+        metadata = {'port': args.port, 'baud': args.baud, 'protocol': config.protocol}
+    try:
+        recorder = Recorder(args.out, args.chunk_seconds, args.fsync, metadata=metadata)
+    except OSError as e:
+        print(f"❌ Cannot record to {args.out}: {e}")
+        reader.close()
+        return 1
+
+    print(f"💾 Recording to {args.out} (Ctrl+C to stop)")
+    plotter = Plotter(config, reader)
+    try:
+        record(plotter, recorder, args.duration)
+    except OSError as e:
+        print(f"❌ Write error: {e}")
+        return 1
+    finally:
+        reader.close()
+    print(f"📈 Samples: {recorder.samples} | Chunks: {recorder.chunk + 1} | Gaps: {recorder.gaps} | "
+          f"Malformed lines: {plotter.parser.malformed} | Dropped: {plotter.data_queue.dropped} | "
+          + (f"Lost on the bus: {reader.lost}" if connection is None else
+             f"Reconnects: {len(connection.outages)} ({connection.downtime:.1f}s down)"))
+    print("👋 Goodbye!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Dashboard renderer
+กราฟ 3 ช่อง (ADC, Voltage, Light Level) ด้วย matplotlib และช่องสเปกตรัมของ ADC (ถ้าเปิด)
+"""
+
+import itertools
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+
+from .config import ADC_RANGE, VOLTAGE_RANGE, LIGHT_RANGE
+from .decimate import decimate
+from .parser import get_status_text
+
+# (buffer column, ylabel, title, color, y range, raw label, raw label when a smooth line is shown, smooth label)
+CHANNELS = (
+    ('adc', 'ADC Value', 'ADC Reading (0-4095)', 'b', ADC_RANGE, 'ADC Raw', 'ADC Raw', 'ADC Smooth'),
+    ('voltage', 'Voltage (V)', 'Voltage Reading (0-3.3V)', 'g', VOLTAGE_RANGE, 'Voltage', 'Voltage Raw', 'Voltage Smooth'),
+    ('light', 'Light Level (%)', 'Light Level (0-100%)', 'r', LIGHT_RANGE, 'Light Level', 'Light Raw', 'Light Smooth'),
+)
+
+
+# Blit mode: the X window jumps ahead by this fraction of `window_seconds`,
+# and a Y range is only tightened once the data span shrinks below this ratio
+X_SCROLL_STEP = 0.25
+Y_SHRINK_RATIO = 0.5
+
+SPECTRUM_MARGIN_DB = 5  # space above/below the PSD line
+SPECTROGRAM_RANGE_DB = 60  # colour scale: from the strongest bin down this far
+
+
+def scaled_limits(low, high, margin, value_range):
+    """Y limits around [low, high] with a relative margin, clamped to the channel range"""
+    pad = (high - low) * margin
+    return max(value_range[0], low - pad), min(value_range[1], high + pad)
+
+
+def break_lines(x, y, gaps):
+    """Put a NaN after each of the `gaps` x positions so the line breaks there"""
+    if len(gaps):
+        at = np.searchsorted(x, gaps, side='right')
+        x = np.insert(x, at, gaps)
+        y = np.insert(np.asarray(y, dtype=np.float64), at, np.nan)
+    return x, y
+
+
+class Dashboard:
+    """Three stacked subplots with raw (and optionally smoothed) lines, plus an optional spectrum panel"""
+
+    def __init__(self, config):
+        self.config = config
+        if config.style:
+            plt.style.use(config.style)
+        self.fig, axes = plt.subplots(3 if config.spectrum is None else 4, 1, figsize=config.figsize)
+        self.axes = axes[:3]
+        self.spectrum_ax = axes[3] if config.spectrum is not None else None
+        self.fig.suptitle(config.title, fontsize=config.title_size, fontweight=config.title_weight)
+
+        smoothed = config.smooth_factor is not None
+        self.raw_lines = []
+        self.smooth_lines = []
+        for ax, (_, ylabel, title, color, value_range, raw_label, raw_smooth_label, smooth_label) in zip(self.axes, CHANNELS):
+            ax.set_ylim(*value_range)
+            if config.labels:
+                ax.set_ylabel(ylabel, fontsize=config.label_size, fontweight='bold')
+                ax.grid(True, alpha=0.3)
+                ax.set_title(title, fontsize=config.subtitle_size, fontweight=config.subtitle_weight)
+            else:
+                ax.set_ylabel(ylabel)
+                ax.grid(True)
+            style = {'linewidth': config.raw_width}
+            if smoothed:
+                style.update(alpha=config.raw_alpha, label=raw_smooth_label)
+            elif config.labels:
+                style.update(label=raw_label)
+            line, = ax.plot([], [], f'{color}-', **style)
+            self.raw_lines.append(line)
+            if smoothed:
+                line_smooth, = ax.plot([], [], f'{color}-', linewidth=config.smooth_width, alpha=1.0, label=smooth_label)
+                self.smooth_lines.append(line_smooth)
+            if config.labels:
+                ax.legend(fontsize=config.legend_size)
+
+        xlabel_size = {'fontsize': config.label_size, 'fontweight': 'bold'} if config.labels else {}
+        self.axes[-1].set_xlabel('Time (seconds)', **xlabel_size)
+
+        self.status_text = None
+        if config.show_status:
+            self.status_text = self.fig.text(0.02, 0.02, '', fontsize=10,
+                                             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue"))
+        self.hud_text = self._make_hud()
+        self.spectrum_artists = self._make_spectrum()
+        self.on_drawn = []  # callables() run once a frame has been drawn (render time, sample → pixel lag)
+
+        # Blit mode: static parts are cached as one background image and only
+        # the lines and status text are redrawn each frame
+        self.full_redraws = 0
+        self._background = None
+        self._needs_redraw = True
+        if config.blit:
+            for artist in self.artists():
+                artist.set_animated(True)
+            self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        else:
+            self.fig.canvas.mpl_connect('draw_event', self._notify_drawn)
+
+    def _make_hud(self):
+        if not self.config.hud:
+            return None
+        return self.fig.text(0.99, 0.99, '', ha='right', va='top', fontsize=8, family='monospace',
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
+
+    def _make_spectrum(self):
+        """PSD line or spectrogram image, and the peak text (empty tuple without a spectrum panel)"""
+        ax = self.spectrum_ax
+        if ax is None:
+            return ()
+        config = self.config
+        if config.spectrum == 'psd':
+            xlabel, ylabel, title = 'Frequency (Hz)', 'Power (dB)', 'ADC Power Spectrum (Welch)'
+            plot, = ax.plot([], [], 'm-', linewidth=1)
+        else:
+            xlabel, ylabel, title = 'Seconds ago', 'Frequency (Hz)', 'ADC Spectrogram'
+            plot = ax.imshow(np.full((2, 2), np.nan), aspect='auto', origin='lower', cmap='viridis',
+                             extent=(-1, 0, 0, 1), interpolation='nearest')
+        if config.labels:
+            ax.set_title(title, fontsize=config.subtitle_size, fontweight=config.subtitle_weight)
+            ax.set_xlabel(xlabel, fontsize=config.label_size, fontweight='bold')
+            ax.set_ylabel(ylabel, fontsize=config.label_size, fontweight='bold')
+            ax.grid(True, alpha=0.3)
+        else:
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+        peak = ax.text(0.99, 0.95, '', transform=ax.transAxes, ha='right', va='top', fontsize=9,
+                       bbox=dict(boxstyle="round,pad=0.2", facecolor="white", alpha=0.7))
+        return plot, peak
+
+    def _notify_drawn(self, event=None):
+        for callback in self.on_drawn:
+            callback()
+
+    def artists(self):
+        """Every artist that changes between frames"""
+        artists = []
+        for i, line in enumerate(self.raw_lines):
+            artists.append(line)
+            if self.smooth_lines:
+                artists.append(self.smooth_lines[i])
+        if self.status_text is not None:
+            artists.append(self.status_text)
+        if self.hud_text is not None:
+            artists.append(self.hud_text)
+        artists.extend(self.spectrum_artists)
+        return tuple(artists)
+
+    def update(self, buffer, smoother=None, interpolator=None, spectrum=None):
+        """Redraw lines, scrolling window, Y limits and status from the buffers"""
+        if spectrum is not None and self.spectrum_artists:
+            self._update_spectrum(spectrum)
+        if len(buffer) > 1:
+            # Convert time to relative seconds
+            time_rel = buffer.time_relative()
+            series = buffer.series()
+            # Reconnects: no line is drawn across the time the board was gone
+            gaps = buffer.gaps() - buffer.time[0]
+
+            # Limits first: the lines are cut to the visible window
+            if self.config.blit:
+                self._update_limits_blit(buffer, time_rel[-1])
+            else:
+                # Update axis limits for real-time scrolling
+                x_min = max(0, time_rel[-1] - self.config.window_seconds)
+                x_max = time_rel[-1] + self.config.x_padding
+                for ax in self.axes:
+                    ax.set_xlim(x_min, x_max)
+
+                # Auto-scale Y axis for better visualization (rolling min/max, no scan)
+                if self.config.y_margin is not None and len(buffer) > 5:
+                    for ax, channel in zip(self.axes, CHANNELS):
+                        low, high = buffer.value_range(channel[0])
+                        ax.set_ylim(*scaled_limits(low, high, self.config.y_margin, channel[4]))
+
+            # Update raw data lines
+            for ax, line, values in zip(self.axes, self.raw_lines, series):
+                line.set_data(*self._reduce(ax, time_rel, values, gaps))
+
+            # Update smoothed data lines
+            if smoother is not None:
+                for ax, line, values in zip(self.axes, self.smooth_lines, smoother.series()):
+                    if len(values) > 0:
+                        line.set_data(*self._reduce(ax, time_rel, values, gaps))
+
+            # Interpolated curve replaces the smoothed lines (or the raw ones without smoothing)
+            if interpolator is not None and len(interpolator) > 1:
+                x = interpolator.times() - buffer.time[0]
+                lines = self.smooth_lines if smoother is not None else self.raw_lines
+                for ax, line, values in zip(self.axes, lines, interpolator.series()):
+                    line.set_data(*self._reduce(ax, x, values, gaps))
+
+            # Update status text
+            if self.status_text is not None:
+                latest = buffer.latest()
+                self.status_text.set_text(f'Current Status: {get_status_text(latest.status)} | '
+                                          f'ADC: {latest.adc} | '
+                                          f'Voltage: {latest.voltage:.2f}V | '
+                                          f'Light: {latest.light:.1f}%')
+
+        return self.artists()
+
+    def _update_spectrum(self, spectrum):
+        """Latest PSD (or spectrogram) of a SpectrumEstimator; its size is fixed, whatever the sample rate"""
+        if spectrum.sample_rate is None or not spectrum.segments:
+            return
+        plot, peak = self.spectrum_artists
+        nyquist = spectrum.sample_rate / 2
+        if self.config.spectrum == 'psd':
+            power = spectrum.psd_db()
+            plot.set_data(spectrum.frequencies, power)
+            xlim = (0, nyquist)
+            ylim = (power.min() - SPECTRUM_MARGIN_DB, power.max() + SPECTRUM_MARGIN_DB)
+        else:
+            image = spectrum.spectrogram()
+            plot.set_data(image)
+            top = np.nanmax(image)
+            plot.set_clim(top - SPECTROGRAM_RANGE_DB, top)
+            seconds = image.shape[1] * spectrum.hop / spectrum.sample_rate
+            plot.set_extent((-seconds, 0, 0, nyquist))
+            xlim, ylim = (-seconds, 0), (0, nyquist)
+        self._set_spectrum_limits(xlim, ylim)
+        found = spectrum.peak()
+        if found is not None:
+            peak.set_text(f"peak {found[0]:.1f} Hz ({found[1]:.0f} dB) | {spectrum.sample_rate:.0f} samples/s")
+
+    def _set_spectrum_limits(self, xlim, ylim):
+        """Every frame normally; in blit mode only on a real change (a full redraw)"""
+        ax = self.spectrum_ax
+        if not self.config.blit:
+            ax.set_xlim(*xlim)
+            ax.set_ylim(*ylim)
+            return
+        x_min, x_max = ax.get_xlim()
+        if not np.allclose((x_min, x_max), xlim, rtol=0.01):
+            ax.set_xlim(*xlim)
+            self._needs_redraw = True
+        y_min, y_max = ax.get_ylim()
+        if (ylim[0] < y_min or ylim[1] > y_max
+                or ylim[1] - ylim[0] < (y_max - y_min) * Y_SHRINK_RATIO):
+            ax.set_ylim(*ylim)
+            self._needs_redraw = True
+
+    def _reduce(self, ax, x, y, gaps=()):
+        """Cut a series to the visible x range, then decimate it to about one point per pixel
+
+        Render cost then depends on the window size on screen, not on how
+        much history the buffer holds. A NaN is put after each of the `gaps`
+        x positions so the line breaks there.
+        """
+        x_min, x_max = ax.get_xlim()
+        # One point past each edge so the line runs up to the border
+        first = max(0, np.searchsorted(x, x_min, side='left') - 1)
+        last = np.searchsorted(x, x_max, side='right') + 1
+        x, y = x[first:last], y[first:last]
+        if self.config.decimation != 'none':
+            pixels = self.config.decimation_points or ax.bbox.width
+            x, y = decimate(x, y, self.config.decimation, pixels)
+        return break_lines(x, y, gaps)
+
+    def _update_limits_blit(self, buffer, latest):
+        """Move the axes only when the data crosses a threshold; flags a full redraw"""
+        window = self.config.window_seconds
+        step = window * X_SCROLL_STEP
+        x_min, x_max = self.axes[0].get_xlim()
+        edge = latest + self.config.x_padding
+        if self._needs_redraw or edge > x_max or edge < x_max - 2 * step:
+            x_max = edge + step
+            for ax in self.axes:
+                ax.set_xlim(max(0, x_max - step - window), x_max)
+            self._needs_redraw = True
+
+        if self.config.y_margin is not None and len(buffer) > 5:
+            for ax, channel in zip(self.axes, CHANNELS):
+                low, high = buffer.value_range(channel[0])
+                y_min, y_max = ax.get_ylim()
+                target = scaled_limits(low, high, self.config.y_margin, channel[4])
+                if (low < y_min or high > y_max
+                        or target[1] - target[0] < (y_max - y_min) * Y_SHRINK_RATIO):
+                    ax.set_ylim(*target)
+                    self._needs_redraw = True
+
+    def _on_draw(self, event):
+        """Re-snapshot the background after every full draw (limits change, resize)"""
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+        self.full_redraws += 1
+
+    def _draw_animated(self):
+        for artist in self.artists():
+            self.fig.draw_artist(artist)
+
+    def blit(self):
+        """Blit-mode frame: restore the cached background and draw only the animated artists"""
+        canvas = self.fig.canvas
+        if self._needs_redraw or self._background is None:
+            self._needs_redraw = False
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        self._notify_drawn()
+
+    def show(self, animate):
+        """Run `animate` every update interval until the window is closed"""
+        plt.tight_layout()
+        if self.config.blit:
+            frames = itertools.count()
+
+            def tick():
+                animate(next(frames))
+                self.blit()
+
+            self.timer = self.fig.canvas.new_timer(interval=self.config.update_interval)
+            self.timer.add_callback(tick)
+            self.timer.start()
+        else:
+            self.animation = animation.FuncAnimation(self.fig, animate, interval=self.config.update_interval,
+                                                     blit=False, cache_frame_data=False)
+        plt.show()
+
+
+class MultiDashboard(Dashboard):
+    """The same three subplots with one raw line per device
+
+    `update(pool)` draws every device of a `DevicePool` against a shared
+    time origin, so boards that sample at the same moment line up.
+    """
+
+    def __init__(self, config, labels):
+        self.config = config
+        if config.style:
+            plt.style.use(config.style)
+        self.fig, self.axes = plt.subplots(3, 1, figsize=config.figsize, sharex=True)
+        self.fig.suptitle(config.title, fontsize=config.title_size, fontweight=config.title_weight)
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        self.device_lines = []  # [axis][device]
+        for ax, (_, ylabel, title, _, value_range, *_) in zip(self.axes, CHANNELS):
+            ax.set_ylim(*value_range)
+            ax.set_ylabel(ylabel, fontsize=config.label_size, fontweight='bold')
+            ax.set_title(title, fontsize=config.subtitle_size, fontweight=config.subtitle_weight)
+            ax.grid(True, alpha=0.3)
+            self.device_lines.append([ax.plot([], [], '-', color=colors[i % len(colors)],
+                                              linewidth=config.raw_width, label=label)[0]
+                                      for i, label in enumerate(labels)])
+        self.axes[0].legend(fontsize=config.legend_size, loc='upper left')
+        self.axes[-1].set_xlabel('Time (seconds)', fontsize=config.label_size, fontweight='bold')
+        self.raw_lines = [line for lines in self.device_lines for line in lines]
+        self.smooth_lines = []
+        self.status_text = self.fig.text(0.02, 0.02, '', fontsize=10,
+                                         bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue"))
+        self.hud_text = None
+        self.spectrum_artists = ()
+        self.on_drawn = []
+
+    def update(self, pool):
+        """Redraw every device's lines, the shared window, Y limits and the per-device rates"""
+        buffers = [plotter.buffer for plotter in pool.devices.values()]
+        newest = [buffer.time[-1] - pool.origin for buffer in buffers if len(buffer) > 1]
+        if not newest:
+            return self.artists()
+        latest = max(newest)
+        # Limits first: the lines are cut to the visible window
+        self.axes[0].set_xlim(max(0, latest - self.config.window_seconds), latest + self.config.x_padding)
+        for i, buffer in enumerate(buffers):
+            if len(buffer) > 1:
+                time_rel = buffer.time - pool.origin
+                gaps = buffer.gaps() - pool.origin
+                for ax, lines, values in zip(self.axes, self.device_lines, buffer.series()):
+                    lines[i].set_data(*self._reduce(ax, time_rel, values, gaps))
+        if self.config.y_margin is not None:
+            for ax, channel in zip(self.axes, CHANNELS):
+                ranges = [buffer.value_range(channel[0]) for buffer in buffers if len(buffer) > 5]
+                if ranges:
+                    low = min(r[0] for r in ranges)
+                    high = max(r[1] for r in ranges)
+                    ax.set_ylim(*scaled_limits(low, high, self.config.y_margin, channel[4]))
+
+        self.status_text.set_text(' | '.join(f"{m['label']}: {m['rate']:.0f}/s lag {m['lag_seconds']:.2f}s"
+                                             for m in pool.metrics()))
+        return self.artists()
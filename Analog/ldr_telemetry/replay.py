@@ -0,0 +1,356 @@
+"""
+Replay viewer
+เปิดไฟล์ที่บันทึกจาก recorder ด้วย memmap แล้วแสดงในกราฟ 3 ช่องเดิม (seek, zoom, เล่นซ้ำ N เท่า)
+
+    python3 -m ldr_telemetry.replay recordings/lab1 --speed 10
+
+ปุ่ม: space เล่น/หยุด, ←/→ เลื่อนครึ่งหน้าต่าง, +/- ซูม, ↑/↓ ความเร็ว x2 / ÷2, home/end ต้น/ท้าย
+ซูมด้วยเครื่องมือ zoom ของ matplotlib ได้เช่นกัน
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from .config import PROFILES, get_profile
+from .recorder import load_gaps, load_recording
+
+PYRAMID_DIR = 'pyramid'
+PYRAMID_FACTOR = 16  # samples per bucket grow by this much per level
+PYRAMID_MIN_BUCKETS = 1024  # stop adding levels once a level is this small
+PYRAMID_CHANNELS = ('adc', 'voltage', 'light')
+BUILD_BLOCK = PYRAMID_FACTOR * 65536  # entries reduced per step while building
+BUCKETS_PER_PIXEL = 4  # a query reads at most this many buckets per pixel of axis width
+
+
+class Recording:
+    """A recorded capture as one sequence of samples across its chunks (memory-mapped)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta, self.chunks = load_recording(path)
+        if not self.chunks:
+            raise ValueError(f"{path} has no samples")
+        self.columns = tuple(self.meta['columns'])
+        self.gaps = load_gaps(path)  # Unix times of the last sample before each reconnect
+        self._offsets = np.cumsum([0] + [len(chunk['time']) for chunk in self.chunks])
+        self._first_times = np.array([chunk['time'][0] for chunk in self.chunks])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def start_time(self):
+        return float(self.chunks[0]['time'][0])
+
+    @property
+    def end_time(self):
+        return float(self.chunks[-1]['time'][-1])
+
+    def dtype(self, name):
+        return self.chunks[0][name].dtype
+
+    def slice(self, name, start, stop):
+        """Samples [start, stop) of a column; a view when they lie in one chunk"""
+        parts = []
+        for chunk, offset, end in zip(self.chunks, self._offsets[:-1], self._offsets[1:]):
+            if start < end and stop > offset:
+                parts.append(chunk[name][max(start - offset, 0):min(stop, end) - offset])
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=self.dtype(name))
+
+    def search(self, timestamp, side='left'):
+        """Index of a Unix time, like np.searchsorted over the whole time column"""
+        chunk = max(int(np.searchsorted(self._first_times, timestamp, side='right')) - 1, 0)
+        return int(self._offsets[chunk] + np.searchsorted(self.chunks[chunk]['time'], timestamp, side=side))
+
+
+def reduce_buckets(times, lows, highs, size):
+    """Merge every `size` consecutive buckets: first time, min of mins and max of maxes"""
+    starts = np.arange(0, len(times), size)
+    return (times[starts],
+            {name: np.minimum.reduceat(values, starts) for name, values in lows.items()},
+            {name: np.maximum.reduceat(values, starts) for name, values in highs.items()})
+
+
+class MinMaxPyramid:
+    """Min/max envelopes of a recording at PYRAMID_FACTOR^1, ^2, ... samples per bucket
+
+    Level files live in `<recording>/pyramid/` and are memory-mapped, so
+    only the buckets a query touches are read from disk. They are rebuilt
+    when the recording has grown since they were written. A query reads
+    the finest level with at most BUCKETS_PER_PIXEL buckets per pixel,
+    so the cost depends on the axis width, not the time range.
+    """
+
+    def __init__(self, recording, rebuild=False):
+        self.recording = recording
+        self.path = os.path.join(recording.path, PYRAMID_DIR)
+        fields = [('time', '<f8')]
+        for name in PYRAMID_CHANNELS:
+            fields += [(f'{name}_min', recording.dtype(name)), (f'{name}_max', recording.dtype(name))]
+        self.dtype = np.dtype(fields)
+        self.levels = []
+        if rebuild or not self._load():
+            self.build()
+
+    def _level_path(self, level):
+        return os.path.join(self.path, f'level{level}.bin')
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, 'pyramid.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get('samples') != len(self.recording) or meta.get('factor') != PYRAMID_FACTOR:
+            return False
+        self.levels = [np.memmap(self._level_path(level), dtype=self.dtype, mode='r')
+                       for level in range(1, meta['levels'] + 1)]
+        return True
+
+    def build(self):
+        """(Re)compute every level, streaming through the recording in blocks"""
+        os.makedirs(self.path, exist_ok=True)
+        recording = self.recording
+        source_len = len(recording)
+
+        def source_block(start, stop):
+            values = {name: recording.slice(name, start, stop) for name in PYRAMID_CHANNELS}
+            return recording.slice('time', start, stop), values, values
+
+        level = 0
+        self.levels = []
+        while level == 0 or source_len > PYRAMID_MIN_BUCKETS:
+            level += 1
+            with open(self._level_path(level), 'wb') as f:
+                for start in range(0, source_len, BUILD_BLOCK):
+                    times, lows, highs = reduce_buckets(*source_block(start, min(start + BUILD_BLOCK, source_len)),
+                                                        PYRAMID_FACTOR)
+                    out = np.empty(len(times), dtype=self.dtype)
+                    out['time'] = times
+                    for name in PYRAMID_CHANNELS:
+                        out[f'{name}_min'] = lows[name]
+                        out[f'{name}_max'] = highs[name]
+                    out.tofile(f)
+            current = np.memmap(self._level_path(level), dtype=self.dtype, mode='r')
+            self.levels.append(current)
+            source_len = len(current)
+
+            def source_block(start, stop, current=current):
+                data = current[start:stop]
+                return (data['time'], {name: data[f'{name}_min'] for name in PYRAMID_CHANNELS},
+                        {name: data[f'{name}_max'] for name in PYRAMID_CHANNELS})
+
+        with open(os.path.join(self.path, 'pyramid.json'), 'w') as f:
+            json.dump({'samples': len(recording), 'factor': PYRAMID_FACTOR, 'levels': len(self.levels)}, f)
+
+    def query(self, start, end, pixels):
+        """Envelope of [start, end] (Unix times) for an axis `pixels` wide
+
+        Returns (x, {channel: y}, level). With few enough samples the raw
+        points come back as-is; otherwise each of at most `pixels` groups
+        becomes a vertical min → max segment.
+        """
+        recording = self.recording
+        pixels = max(int(pixels), 1)
+        # One sample either side so the line runs to the axis edges
+        first = max(recording.search(start) - 1, 0)
+        last = min(recording.search(end, side='right') + 1, len(recording))
+        count = last - first
+        if count <= 0:
+            empty = np.empty(0)
+            return empty, {name: empty for name in PYRAMID_CHANNELS}, 0
+        level = 0
+        size = 1
+        while level < len(self.levels) and count / size > BUCKETS_PER_PIXEL * pixels:
+            level += 1
+            size *= PYRAMID_FACTOR
+
+        if level == 0:
+            times = recording.slice('time', first, last)
+            lows = highs = {name: recording.slice(name, first, last) for name in PYRAMID_CHANNELS}
+            if count <= 2 * pixels:
+                return times, lows, 0
+        else:
+            data = self.levels[level - 1][first // size:-(-last // size)]
+            times = data['time']
+            lows = {name: data[f'{name}_min'] for name in PYRAMID_CHANNELS}
+            highs = {name: data[f'{name}_max'] for name in PYRAMID_CHANNELS}
+
+        times, lows, highs = reduce_buckets(times, lows, highs, -(-len(times) // pixels))
+        x = np.repeat(times, 2)
+        series = {name: np.column_stack((lows[name], highs[name])).ravel() for name in PYRAMID_CHANNELS}
+        return x, series, level
+
+
+class ReplayViewer:
+    """Drives a `Dashboard` from a recording: seek, zoom and N× playback"""
+
+    def __init__(self, recording, pyramid, dashboard, window=30.0, speed=1.0, start=0.0):
+        import matplotlib.pyplot as plt
+
+        self.recording = recording
+        self.pyramid = pyramid
+        self.dashboard = dashboard
+        self.origin = recording.start_time
+        self.duration = recording.end_time - self.origin
+        self.window = min(window, self.duration) if self.duration > 0 else window
+        self.speed = speed
+        self.end = min(start + self.window, self.duration)
+        self.playing = False
+        self.level = 0
+        self._updating = False
+        self._last_tick = None
+
+        # The arrow and home keys are ours, not the toolbar's back/forward/home
+        for key in ('keymap.back', 'keymap.forward', 'keymap.home'):
+            plt.rcParams[key] = [k for k in plt.rcParams[key] if k not in ('left', 'right', 'home')]
+        canvas = dashboard.fig.canvas
+        canvas.mpl_connect('key_press_event', self._on_key)
+        for ax in dashboard.axes:
+            ax.callbacks.connect('xlim_changed', self._on_xlim)
+        self.timer = canvas.new_timer(interval=dashboard.config.update_interval)
+        self.timer.add_callback(self._tick)
+
+    def show_range(self, x_min, x_max):
+        """Draw [x_min, x_max] seconds since the start of the recording"""
+        from .renderer import CHANNELS, break_lines, scaled_limits
+
+        dashboard = self.dashboard
+        pixels = dashboard.axes[0].bbox.width
+        x, series, self.level = self.pyramid.query(self.origin + x_min, self.origin + x_max, pixels)
+        x = x - self.origin
+        gaps = self.recording.gaps - self.origin
+        gaps = gaps[(gaps >= x_min) & (gaps <= x_max)]
+        margin = dashboard.config.y_margin
+        self._updating = True
+        try:
+            for ax, line, channel in zip(dashboard.axes, dashboard.raw_lines, CHANNELS):
+                values = series[channel[0]]
+                line.set_data(*break_lines(x, values, gaps))
+                ax.set_xlim(x_min, x_max)
+                if margin is not None and len(values):
+                    low, high = float(values.min()), float(values.max())
+                    if high > low:
+                        ax.set_ylim(*scaled_limits(low, high, margin, channel[4]))
+        finally:
+            self._updating = False
+        if dashboard.status_text is not None:
+            wall = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.origin + x_max))
+            state = 'playing' if self.playing else 'paused'
+            dashboard.status_text.set_text(f'{wall} | {x_max:.1f}/{self.duration:.1f}s | '
+                                           f'window {x_max - x_min:.3g}s | x{self.speed:g} {state} | '
+                                           f'level {self.level}')
+        dashboard.fig.canvas.draw_idle()
+
+    def seek(self, end):
+        self.end = min(max(end, min(self.window, self.duration)), self.duration)
+        self.show_range(self.end - self.window, self.end)
+
+    def zoom(self, factor):
+        """Scale the window around its center"""
+        center = self.end - self.window / 2
+        self.window = max(self.window * factor, 1e-3)
+        self.seek(center + self.window / 2)
+
+    def toggle(self):
+        self.playing = not self.playing
+        if self.playing:
+            if self.end >= self.duration:
+                self.end = min(self.window, self.duration)
+            self._last_tick = time.monotonic()
+            self.timer.start()
+        else:
+            self.timer.stop()
+        self.seek(self.end)
+
+    def _tick(self):
+        now = time.monotonic()
+        self.end += (now - self._last_tick) * self.speed
+        self._last_tick = now
+        if self.end >= self.duration:
+            self.playing = False
+            self.timer.stop()
+        self.seek(self.end)
+
+    def _on_key(self, event):
+        actions = {
+            ' ': self.toggle,
+            'left': lambda: self.seek(self.end - self.window / 2),
+            'right': lambda: self.seek(self.end + self.window / 2),
+            '+': lambda: self.zoom(0.5),
+            '=': lambda: self.zoom(0.5),
+            '-': lambda: self.zoom(2),
+            'up': lambda: self._set_speed(self.speed * 2),
+            'down': lambda: self._set_speed(self.speed / 2),
+            'home': lambda: self.seek(0),
+            'end': lambda: self.seek(self.duration),
+        }
+        if event.key in actions:
+            actions[event.key]()
+
+    def _set_speed(self, speed):
+        self.speed = speed
+        self.seek(self.end)
+
+    def _on_xlim(self, ax):
+        """Zoom/pan with the toolbar: re-query the pyramid for the new range"""
+        if self._updating:
+            return
+        x_min, x_max = ax.get_xlim()
+        self.window = x_max - x_min
+        self.end = x_max
+        self.show_range(x_min, x_max)
+
+    def show(self):
+        import matplotlib.pyplot as plt
+
+        plt.tight_layout()
+        self.seek(self.end)
+        plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recording from ldr_telemetry.recorder')
+    parser.add_argument('path', help='recording directory')
+    parser.add_argument('--profile', default='full', choices=sorted(PROFILES), help='plot style')
+    parser.add_argument('--start', type=float, default=0.0, help='seconds from the start of the recording')
+    parser.add_argument('--window', type=float, default=30.0, help='visible seconds')
+    parser.add_argument('--speed', type=float, default=1.0, help='playback speed (× real time)')
+    parser.add_argument('--play', action='store_true', help='start playing immediately')
+    parser.add_argument('--rebuild', action='store_true', help='recompute the min/max pyramid')
+    args = parser.parse_args(argv)
+
+    try:
+        recording = Recording(args.path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Cannot open recording {args.path}: {e}")
+        return 1
+    print(f"📂 {args.path}: {len(recording)} samples, {recording.end_time - recording.start_time:.1f}s "
+          f"in {len(recording.chunks)} chunks (started {recording.meta.get('started', '?')})")
+
+    start = time.perf_counter()
+    pyramid = MinMaxPyramid(recording, rebuild=args.rebuild)
+    print(f"🔺 Min/max pyramid: {len(pyramid.levels)} levels ({time.perf_counter() - start:.2f}s)")
+
+    from .renderer import Dashboard
+
+    config = replace(get_profile(args.profile), smooth_factor=None, blit=False, show_status=True,
+                     title=f"ESP32 LDR Replay - {os.path.basename(os.path.normpath(args.path))}")
+    viewer = ReplayViewer(recording, pyramid, Dashboard(config), args.window, args.speed, args.start)
+    print("⌨️  space: play/pause | ←/→: seek | +/-: zoom | ↑/↓: speed | home/end")
+    if args.play:
+        viewer.toggle()
+    viewer.show()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Spectrum estimator
+สเปกตรัมของสัญญาณ ADC แบบ Welch / spectrogram คำนวณเฉพาะ segment ใหม่ในแต่ละเฟรม
+เพื่อดูการกระพริบของไฟ 50/100 Hz หรือ PWM dimming (ต้องใช้ sample rate สูง เช่น CONTINUOUS_ADC)
+"""
+
+import numpy as np
+
+SPECTRUM_MODES = ('psd', 'spectrogram')
+SPECTRUM_WINDOWS = {
+    'hann': np.hanning,
+    'hamming': np.hamming,
+    'blackman': np.blackman,
+    'rect': np.ones,
+}
+DB_FLOOR = 1e-12  # power below this is shown as -120 dB instead of -inf
+
+
+class SpectrumEstimator:
+    """Incremental Welch PSD (and spectrogram columns) of one buffer channel
+
+    `update(buffer)` takes only the samples added to the `SampleBuffer`
+    since the previous call, cuts them into `segment`-long windows that
+    overlap by `overlap`, and runs one batched real FFT over the new
+    segments. The window, its power and the scratch matrix are built
+    once, and the FFT length never changes, so NumPy's FFT plan cache is
+    hit every time. The PSD is the mean of the last `averages` segments
+    (Welch); the spectrogram keeps the last `history` segments in dB.
+
+    At most `max_segments` segments are transformed per call: when more
+    have piled up (high sample rate, slow frame) the oldest are skipped
+    and counted in `skipped`, so the per-frame cost stays bounded. A
+    reconnect gap, or more new samples than the buffer holds, restarts
+    the segmentation instead of windowing across the discontinuity.
+    """
+
+    def __init__(self, segment=256, overlap=0.5, window='hann', averages=8, history=200, max_segments=32,
+                 channel='adc'):
+        if segment < 8:
+            raise ValueError("segment must be at least 8 samples")
+        if not 0 <= overlap < 1:
+            raise ValueError("overlap must be in [0, 1)")
+        if window not in SPECTRUM_WINDOWS:
+            raise ValueError(f"Unknown window '{window}' (choose from {', '.join(SPECTRUM_WINDOWS)})")
+        self.segment = segment
+        self.hop = max(1, int(round(segment * (1 - overlap))))
+        self.channel = channel
+        self.max_segments = max_segments
+        self.window = SPECTRUM_WINDOWS[window](segment + 1)[:-1]  # periodic form, as for spectral analysis
+        self._window_power = float(np.sum(self.window ** 2))
+        self.bins = segment // 2 + 1
+        self._frames = np.empty((max_segments, segment))  # windowed segments, reused every call
+        # Working signal: leftover samples that don't fill a segment yet + the new ones
+        self._pending = np.empty(segment + (max_segments - 1) * self.hop)
+        self._pending_times = np.empty_like(self._pending)
+        self._count = 0
+        self._psd = np.zeros((averages, self.bins))  # ring of one-sided PSDs
+        self._psd_rows = 0
+        self._history = np.full((history, self.bins), np.nan)  # ring of dB rows (spectrogram)
+        self._head = 0  # next row of `_history`
+        self._seen = 0  # buffer.appended at the previous call
+        self._last_time = -np.inf
+        self.sample_rate = None  # Hz, from the timestamps of the newest segments
+        self.segments = 0
+        self.skipped = 0
+
+    @property
+    def frequencies(self):
+        """Bin frequencies in Hz (None before the first segment)"""
+        if self.sample_rate is None:
+            return None
+        return np.fft.rfftfreq(self.segment, 1.0 / self.sample_rate)
+
+    def reset(self):
+        """Drop the partial segment (the next one starts with the next sample)"""
+        self._count = 0
+
+    def update(self, buffer):
+        """Transform the complete segments among the samples added since the last call
+
+        Returns how many segments were added.
+        """
+        new = buffer.appended - self._seen
+        self._seen = buffer.appended
+        if new <= 0 or not len(buffer):
+            return 0
+        if new > len(buffer):
+            # Samples were overwritten before we saw them: the signal has a hole
+            new = len(buffer)
+            self.reset()
+        values = buffer.ring.column(self.channel)[-new:]
+        times = buffer.time[-new:]
+        gaps = buffer.gaps()
+        gaps = gaps[gaps >= self._last_time]
+        if len(gaps):
+            cut = np.searchsorted(times, gaps[-1], side='right')
+            values, times = values[cut:], times[cut:]
+            self.reset()
+        if len(times):
+            self._last_time = times[-1]
+        return self._add(values, times)
+
+    def _add(self, values, times):
+        capacity = len(self._pending)
+        if self._count + len(values) > capacity:
+            # Keep only what the newest `max_segments` segments need
+            drop = self._count + len(values) - capacity
+            self.skipped += -(-drop // self.hop)
+            if drop >= self._count:
+                values, times = values[drop - self._count:], times[drop - self._count:]
+                self._count = 0
+            else:
+                self._shift(drop)
+        end = self._count + len(values)
+        self._pending[self._count:end] = values
+        self._pending_times[self._count:end] = times
+        self._count = end
+        if self._count < self.segment:
+            return 0
+
+        count = (self._count - self.segment) // self.hop + 1
+        starts = np.arange(count) * self.hop
+        segments = np.lib.stride_tricks.sliding_window_view(self._pending[:self._count], self.segment)[starts]
+        frames = self._frames[:count]
+        # detrend='constant': remove each segment's mean so DC doesn't swamp the low bins
+        np.subtract(segments, segments.mean(axis=1, keepdims=True), out=frames)
+        frames *= self.window
+        spectrum = np.fft.rfft(frames, axis=1)
+        span = self._pending_times[starts[-1] + self.segment - 1] - self._pending_times[starts[0]]
+        if span > 0:
+            self.sample_rate = (starts[-1] + self.segment - 1) / span
+        if self.sample_rate is not None:
+            self._store(self._power(spectrum))
+        self.segments += count
+        self._shift(count * self.hop)
+        return count
+
+    def _power(self, spectrum):
+        """One-sided power spectral density (units²/Hz) of each row"""
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        power /= self.sample_rate * self._window_power
+        power[:, 1:(self.segment + 1) // 2] *= 2  # negative frequencies folded in (not DC / Nyquist)
+        return power
+
+    def _store(self, power):
+        rows = power[-len(self._psd):]
+        self._psd[(self._psd_rows + np.arange(len(rows))) % len(self._psd)] = rows
+        self._psd_rows += len(rows)
+        rows = power[-len(self._history):]
+        positions = (self._head + np.arange(len(rows))) % len(self._history)
+        self._history[positions] = 10 * np.log10(np.maximum(rows, DB_FLOOR))
+        self._head = (self._head + len(rows)) % len(self._history)
+
+    def _shift(self, count):
+        """Drop the first `count` working samples"""
+        remaining = self._count - count
+        self._pending[:remaining] = self._pending[count:self._count]
+        self._pending_times[:remaining] = self._pending_times[count:self._count]
+        self._count = remaining
+
+    def psd(self):
+        """Welch estimate: mean PSD of the last `averages` segments (None before the first)"""
+        if not self._psd_rows:
+            return None
+        return self._psd[:min(self._psd_rows, len(self._psd))].mean(axis=0)
+
+    def psd_db(self):
+        psd = self.psd()
+        return None if psd is None else 10 * np.log10(np.maximum(psd, DB_FLOOR))
+
+    def spectrogram(self):
+        """(bins, history) dB image, oldest segment in the first column"""
+        return np.roll(self._history, -self._head, axis=0).T
+
+    def peak(self, low=1.0):
+        """(frequency, dB) of the strongest bin above `low` Hz, e.g. mains flicker"""
+        psd = self.psd()
+        if psd is None:
+            return None
+        freqs = self.frequencies
+        above = np.flatnonzero(freqs >= low)
+        if not len(above):
+            return None
+        best = above[np.argmax(psd[above])]
+        return float(freqs[best]), float(10 * np.log10(max(psd[best], DB_FLOOR)))
@@ -4,17 +4,77 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <stddef.h>
 #include "freertos/FreeRTOS.h"
 #include "freertos/task.h"
 #include "esp_adc/adc_oneshot.h"
+#include "esp_adc/adc_continuous.h"
 #include "esp_adc/adc_cali.h"
 #include "esp_adc/adc_cali_scheme.h"
+#include "esp_attr.h"
 #include "esp_log.h"
+#include "esp_timer.h"
+#include "driver/uart_vfs.h"
 
 // กำหนด pin ที่ใช้
 #define LDR_CHANNEL ADC_CHANNEL_7  // GPIO35 (ADC1_CH7)
 #define NO_OF_SAMPLES   10          // ลดจำนวนตัวอย่างเพื่อความเร็ว
 
+// 0 = ส่งข้อความ "ADC,Voltage,LightLevel,Status" / 1 = ส่ง frame แบบ binary (12 bytes ต่อ sample)
+// ฝั่ง Python (ldr_telemetry) ตรวจจับให้อัตโนมัติ
+#define BINARY_PROTOCOL 0
+#define FRAME_SYNC      0xA55A
+// 1 = ต่อท้ายบรรทัดข้อความด้วยเวลาของบอร์ด (esp_timer, µs) ให้ host จัดแกนเวลาได้แม่นขึ้น
+// (binary frame มี timestamp อยู่แล้ว)
+#define SEND_TIMESTAMP  0
+
+// อัตราส่งของโหมด oneshot (ข้อความ, BINARY_PROTOCOL, SEND_TIMESTAMP) ใช้ tick ของ FreeRTOS เป็นจังหวะ
+// จึงสูงสุดเท่ากับ CONFIG_FREERTOS_HZ (100 ใน sdkconfig นี้) และควรหาร CONFIG_FREERTOS_HZ ลงตัว
+// binary 100 samples/s ใช้ ~1.2 kB/s; ถ้าต้องการ 1000 ให้ตั้ง CONFIG_FREERTOS_HZ=1000 และ baud ≥ 230400
+// (12 kB/s เกิน 11.5 kB/s ของ 115200) หรือใช้ CONTINUOUS_ADC สำหรับหลาย kHz
+#if BINARY_PROTOCOL
+#define SAMPLE_RATE_HZ  100
+#else
+#define SAMPLE_RATE_HZ  10         // ค่าเดิม (ทุก 100ms) ตรงกับ sample_rate ใน ldr_telemetry/config.py
+#endif
+#if SAMPLE_RATE_HZ > CONFIG_FREERTOS_HZ
+#error "SAMPLE_RATE_HZ เกิน CONFIG_FREERTOS_HZ: เพิ่ม tick rate ใน menuconfig หรือใช้ CONTINUOUS_ADC"
+#endif
+
+// 1 = อ่าน ADC แบบ continuous (DMA) ที่หลาย kHz แล้วส่งเป็น block ของ sample (ดู plotter_block_t)
+// แทนการอ่านทีละครั้งที่ SAMPLE_RATE_HZ ใช้จับการกระพริบของหลอดไฟหรือการเปลี่ยนแปลงเร็ว ๆ
+// (ไม่ใช้ BINARY_PROTOCOL / SEND_TIMESTAMP; block มี timestamp และ CRC ในตัว)
+#define CONTINUOUS_ADC     0
+#define ADC_SAMPLE_FREQ_HZ 20000   // อัตราของ ADC (ESP32 ทำได้ต่ำสุด 20 kHz)
+#define BLOCK_AVERAGE      10      // เฉลี่ยทีละ 10 ค่า → ส่ง 2000 samples/s
+#define BLOCK_SAMPLES      256     // sample ต่อ block (ตรงกับ BLOCK_SAMPLES ใน ldr_telemetry/protocol.py)
+#define BLOCK_SYNC         0xA55B
+#define BLOCK_OVERRUN      0x0001  // flags: DMA buffer ล้นก่อน block นี้ (sample หาย)
+// 2000 samples/s ใช้ ~4.2 kB/s จาก 11.5 kB/s ของ 115200 baud (สูงสุด ~5500 samples/s)
+// ถ้าต้องการมากกว่านี้ให้เพิ่ม CONFIG_ESP_CONSOLE_UART_BAUDRATE (เช่น 921600) ใน menuconfig
+#define READ_RESULTS       256     // ผลการแปลงต่อการอ่าน DMA หนึ่งครั้ง
+
+// Binary frame (little-endian) ตรงกับ FRAME_DTYPE ใน ldr_telemetry/protocol.py
+typedef struct __attribute__((packed)) {
+    uint16_t sync;          // FRAME_SYNC
+    uint16_t seq;           // เพิ่มทีละ 1 ใช้ตรวจจับ frame ที่หายไป
+    uint32_t timestamp_us;  // esp_timer_get_time()
+    int16_t adc;            // ค่า ADC เฉลี่ย (voltage/light/status คำนวณฝั่ง host)
+    uint16_t crc;           // CRC-16/CCITT-FALSE ของ field ด้านบน
+} plotter_frame_t;
+
+// Continuous ADC block (little-endian) ตรงกับ BLOCK_HEADER_DTYPE ใน ldr_telemetry/protocol.py
+typedef struct __attribute__((packed)) {
+    uint16_t sync;          // BLOCK_SYNC
+    uint16_t seq;           // เพิ่มทีละ 1 ต่อ block ใช้ตรวจจับ block ที่หายไป
+    uint32_t timestamp_us;  // เวลาของ sample แรก (esp_timer)
+    uint32_t sample_rate;   // samples/s หลังเฉลี่ย
+    uint16_t count;         // BLOCK_SAMPLES
+    uint16_t flags;         // BLOCK_OVERRUN
+    uint16_t adc[BLOCK_SAMPLES];
+    uint16_t crc;           // CRC-16/CCITT-FALSE ของ field ด้านบนทั้งหมด
+} plotter_block_t;
+
 static const char *TAG = "LDR_PLOTTER";
 static adc_oneshot_unit_handle_t adc1_handle;
 static adc_cali_handle_t adc1_cali_handle = NULL;
@@ -55,9 +115,157 @@ static bool adc_calibration_init(void)
     return calibrated;
 }
 
+#if BINARY_PROTOCOL || CONTINUOUS_ADC
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+static uint16_t crc16_ccitt(const uint8_t *data, size_t len)
+{
+    uint16_t crc = 0xFFFF;
+    for (size_t i = 0; i < len; i++) {
+        crc ^= (uint16_t)data[i] << 8;
+        for (int bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}
+#endif
+
+#if BINARY_PROTOCOL
+static void send_frame(uint16_t seq, uint32_t timestamp_us, int adc_reading)
+{
+    plotter_frame_t frame = {
+        .sync = FRAME_SYNC,
+        .seq = seq,
+        .timestamp_us = timestamp_us,
+        .adc = (int16_t)adc_reading,
+    };
+    frame.crc = crc16_ccitt((const uint8_t *)&frame, offsetof(plotter_frame_t, crc));
+    fwrite(&frame, sizeof(frame), 1, stdout);
+    fflush(stdout);
+}
+#endif
+
+#if CONTINUOUS_ADC
+// ESP32 / ESP32-S2 ใช้ output format TYPE1, chip รุ่นใหม่ใช้ TYPE2
+#if CONFIG_IDF_TARGET_ESP32 || CONFIG_IDF_TARGET_ESP32S2
+#define ADC_OUTPUT_TYPE     ADC_DIGI_OUTPUT_FORMAT_TYPE1
+#define ADC_GET_CHANNEL(p)  ((p)->type1.channel)
+#define ADC_GET_DATA(p)     ((p)->type1.data)
+#else
+#define ADC_OUTPUT_TYPE     ADC_DIGI_OUTPUT_FORMAT_TYPE2
+#define ADC_GET_CHANNEL(p)  ((p)->type2.channel)
+#define ADC_GET_DATA(p)     ((p)->type2.data)
+#endif
+
+static volatile bool adc_overrun = false;
+
+static bool IRAM_ATTR on_pool_overflow(adc_continuous_handle_t handle, const adc_continuous_evt_data_t *edata,
+                                       void *user_data)
+{
+    adc_overrun = true;  // ส่งข้อมูลไม่ทัน (UART ช้ากว่า ADC) บอก host ใน block ถัดไป
+    return false;
+}
+
+static void send_block(plotter_block_t *block, uint16_t seq)
+{
+    block->sync = BLOCK_SYNC;
+    block->seq = seq;
+    block->sample_rate = ADC_SAMPLE_FREQ_HZ / BLOCK_AVERAGE;
+    block->count = BLOCK_SAMPLES;
+    block->flags = adc_overrun ? BLOCK_OVERRUN : 0;
+    adc_overrun = false;
+    block->crc = crc16_ccitt((const uint8_t *)block, offsetof(plotter_block_t, crc));
+    fwrite(block, sizeof(*block), 1, stdout);
+    fflush(stdout);
+}
+
+// อ่าน ADC ผ่าน DMA ต่อเนื่อง เฉลี่ยทีละ BLOCK_AVERAGE ค่า แล้วส่งทีละ BLOCK_SAMPLES sample (ไม่ return)
+static void run_continuous(void)
+{
+    adc_continuous_handle_t handle = NULL;
+    adc_continuous_handle_cfg_t handle_config = {
+        .max_store_buf_size = 4 * READ_RESULTS * SOC_ADC_DIGI_RESULT_BYTES,
+        .conv_frame_size = READ_RESULTS * SOC_ADC_DIGI_RESULT_BYTES,
+    };
+    ESP_ERROR_CHECK(adc_continuous_new_handle(&handle_config, &handle));
+
+    adc_digi_pattern_config_t pattern = {
+        .atten = ADC_ATTEN_DB_12,
+        .channel = LDR_CHANNEL,
+        .unit = ADC_UNIT_1,
+        .bit_width = SOC_ADC_DIGI_MAX_BITWIDTH,
+    };
+    adc_continuous_config_t dig_config = {
+        .pattern_num = 1,
+        .adc_pattern = &pattern,
+        .sample_freq_hz = ADC_SAMPLE_FREQ_HZ,
+        .conv_mode = ADC_CONV_SINGLE_UNIT_1,
+        .format = ADC_OUTPUT_TYPE,
+    };
+    ESP_ERROR_CHECK(adc_continuous_config(handle, &dig_config));
+
+    adc_continuous_evt_cbs_t callbacks = {
+        .on_pool_ovf = on_pool_overflow,
+    };
+    ESP_ERROR_CHECK(adc_continuous_register_event_callbacks(handle, &callbacks, NULL));
+
+    ESP_LOGI(TAG, "Format: continuous ADC blocks (%d samples, %d bytes) at %d samples/s",
+             BLOCK_SAMPLES, (int)sizeof(plotter_block_t), ADC_SAMPLE_FREQ_HZ / BLOCK_AVERAGE);
+    ESP_LOGI(TAG, "=========================================");
+    // ไม่ให้ console แปลง '\n' เป็น "\r\n" ในข้อมูล binary
+    uart_vfs_dev_port_set_tx_line_endings(CONFIG_ESP_CONSOLE_UART_NUM, ESP_LINE_ENDINGS_LF);
+    ESP_ERROR_CHECK(adc_continuous_start(handle));
+
+    static uint8_t results[READ_RESULTS * SOC_ADC_DIGI_RESULT_BYTES];
+    static plotter_block_t block;
+    const int64_t result_period_us = 1000000 / ADC_SAMPLE_FREQ_HZ;
+    const int64_t sample_period_us = result_period_us * BLOCK_AVERAGE;
+    uint16_t seq = 0;
+    int filled = 0;
+    uint32_t sum = 0;
+    int averaged = 0;
+
+    while (1) {
+        uint32_t length = 0;
+        esp_err_t ret = adc_continuous_read(handle, results, sizeof(results), &length, ADC_MAX_DELAY);
+        // เวลาโดยประมาณของผลลัพธ์สุดท้ายใน buffer นี้
+        int64_t read_us = esp_timer_get_time();
+        if (ret != ESP_OK) {
+            continue;
+        }
+        uint32_t count = length / SOC_ADC_DIGI_RESULT_BYTES;
+        for (uint32_t i = 0; i < count; i++) {
+            adc_digi_output_data_t *result = (adc_digi_output_data_t *)&results[i * SOC_ADC_DIGI_RESULT_BYTES];
+            if (ADC_GET_CHANNEL(result) != LDR_CHANNEL) {
+                continue;
+            }
+            sum += ADC_GET_DATA(result);
+            if (++averaged < BLOCK_AVERAGE) {
+                continue;
+            }
+            block.adc[filled++] = (uint16_t)(sum / BLOCK_AVERAGE);
+            sum = 0;
+            averaged = 0;
+            if (filled == BLOCK_SAMPLES) {
+                // ย้อนจากเวลาที่อ่านไปหา sample แรกของ block
+                int64_t last_us = read_us - (int64_t)(count - 1 - i) * result_period_us;
+                block.timestamp_us = (uint32_t)(last_us - (BLOCK_SAMPLES - 1) * sample_period_us);
+                send_block(&block, seq++);
+                filled = 0;
+            }
+        }
+    }
+}
+#endif
+
 void app_main(void)
 {
     ESP_LOGI(TAG, "=== LDR Serial Plotter Mode ===");
+
+#if CONTINUOUS_ADC
+    // DMA ใช้ ADC1 เอง จึงไม่สร้าง oneshot unit
+    run_continuous();
+#endif
     
     // กำหนดค่า ADC
     adc_oneshot_unit_init_cfg_t init_config1 = {
@@ -76,11 +284,24 @@ void app_main(void)
     bool do_calibration = adc_calibration_init();
 
     ESP_LOGI(TAG, "LDR Serial Plotter Ready");
+#if BINARY_PROTOCOL
+    ESP_LOGI(TAG, "Format: binary frames (%d bytes)", (int)sizeof(plotter_frame_t));
+    // ไม่ให้ console แปลง '\n' เป็น "\r\n" ในข้อมูล binary
+    uart_vfs_dev_port_set_tx_line_endings(CONFIG_ESP_CONSOLE_UART_NUM, ESP_LINE_ENDINGS_LF);
+#else
     ESP_LOGI(TAG, "Format: ADC,Voltage,LightLevel,Status");
+#endif
     ESP_LOGI(TAG, "=========================================");
 
-    // อ่านค่า ADC จาก LDR อย่างต่อเนื่อง
+#if BINARY_PROTOCOL
+    uint16_t seq = 0;
+#endif
+
+    // อ่านค่า ADC จาก LDR อย่างต่อเนื่อง ทุก 1/SAMPLE_RATE_HZ วินาที (นับจากรอบก่อน ไม่สะสมเวลาที่ใช้ส่ง)
+    TickType_t last_wake = xTaskGetTickCount();
     while (1) {
+        // เวลาที่เริ่มสุ่มสัญญาณ (วนรอบทุก ~71 นาที ฝั่ง host จัดการให้)
+        uint32_t timestamp_us = (uint32_t)esp_timer_get_time();
         int adc_reading = 0;
         int min_val = 4095;
         int max_val = 0;
@@ -94,7 +315,12 @@ void app_main(void)
             if (raw > max_val) max_val = raw;
         }
         adc_reading /= NO_OF_SAMPLES;
-        
+
+#if BINARY_PROTOCOL
+        // ส่งเฉพาะ ADC, voltage/light level/status คำนวณฝั่ง host
+        (void)do_calibration;
+        send_frame(seq++, timestamp_us, adc_reading);
+#else
         // แปลง adc_reading เป็นแรงดัน
         int voltage_mv = 0;
         if (do_calibration) {
@@ -123,8 +349,14 @@ void app_main(void)
         }
         
         // ส่งข้อมูลแบบ Serial Plotter
+#if SEND_TIMESTAMP
+        printf("%d,%.2f,%.1f,%d,%lu\n", adc_reading, voltage, lightLevel, lightStatus, (unsigned long)timestamp_us);
+#else
+        (void)timestamp_us;
         printf("%d,%.2f,%.1f,%d\n", adc_reading, voltage, lightLevel, lightStatus);
+#endif
+#endif
         
-        vTaskDelay(pdMS_TO_TICKS(100));  // หน่วงเวลา 100ms เพื่อความเร็ว
+        xTaskDelayUntil(&last_wake, configTICK_RATE_HZ / SAMPLE_RATE_HZ);
     }
 }